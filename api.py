@@ -1,19 +1,43 @@
-from scraper import SearchResultsScraper, MangaDetailsScarper, ChapterImagesScraper
-from models import MangaSearchResult, MangaDetails, ChapterImage
-from fastapi import FastAPI, HTTPException, Response, BackgroundTasks
+from scraper import SearchResultsScraper, MangaDetailsScarper, set_hedging, set_circuit_breakers
+from models import MangaSearchResult, MangaDetails, ChapterImage, ChapterDetailed
+from fastapi import FastAPI, HTTPException, Response, Header, Request, Query, Depends
+from fastapi.responses import FileResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
-from database import Session, Manga, Chapter, ChapterImage, init_db
+from database import init_db
+from repository import MangaRepository, reading_position
+from jobs import JobQueue, PRIORITY_READER, fetch_image
+from cache import TTLCache
+from prefetch import ReadAhead
+from images import DerivativeStore, ImagePipeline, choose_variant, VARIANTS
+from image_cache import DiskImageCache
+from posters import PosterPipeline, POSTER_SIZES, DEFAULT_SIZE
+from streaming import stream_format, stream_response
+from batch import BatchRunner
+from chapters import parse_chapter_number
+from updates import UpdatePoller, UpdateBroadcaster, WebhookNotifier
+from responses import FastJSONResponse, CompressionMiddleware
+from deadlines import deadline, DeadlineExceeded
+from breaker import CircuitOpenError, StaleWhileRevalidate
+import anyio.to_thread
 import requests
+import metrics
+import logging
+import time
+from contextlib import asynccontextmanager
+from logging_config import setup_logging, shutdown_logging
 from typing import List, Optional
 import mimetypes
+import os
 from io import BytesIO
 from pydantic import BaseModel
 from datetime import datetime
 
+logger = logging.getLogger(__name__)
+
 # Response models
 class MangaResponse(BaseModel):
-    id: int
+    id: str
     title: str
     description: Optional[str] = None
     status: Optional[str] = None
@@ -26,30 +50,148 @@ class MangaResponse(BaseModel):
     updated_at: Optional[datetime] = None
 
 class ChapterStatusResponse(BaseModel):
-    chapter_id: int
+    chapter_id: str
     title: str
     total_images: int
     downloaded_images: int
     is_complete: bool
     progress: float
+    job_id: Optional[str] = None
+    job_status: Optional[str] = None
+    job_attempts: int = 0
+    job_error: Optional[str] = None
 
 class ChapterResponse(BaseModel):
     message: str
-    chapter_id: int
-    total_images: int
+    chapter_id: str
+    total_images: Optional[int] = None
+
+class ChapterEntry(BaseModel):
+    chapter_id: str
+    title: str
+    url: str
+    number: Optional[float] = None
+    sort_key: int
+    is_downloaded: bool
+
+class JobCancelResponse(BaseModel):
+    message: str
+    job_id: str
 
 class MangaCreateResponse(BaseModel):
     message: str
-    manga_id: int
+    manga_id: str
+
+class BatchRequest(BaseModel):
+    urls: List[str]
+
+class MangaBatchItem(BaseModel):
+    url: str
+    details: Optional[MangaDetails] = None
+    error: Optional[str] = None
+
+class ChapterImagesBatchItem(BaseModel):
+    url: str
+    images: Optional[List[ChapterImage]] = None
+    error: Optional[str] = None
+
+# Shared services, the database itself is initialized on startup
+repository = MangaRepository()
+job_queue = JobQueue(session_factory=repository.session_factory)
+read_ahead = ReadAhead(TTLCache(maxsize=512, ttl=600), repository, job_queue, budget=8)
+image_pipeline = ImagePipeline(DerivativeStore(), max_workers=2)
+batch_runner = BatchRunner(max_workers=8)
+metrics.register_cache("chapter_images", read_ahead.image_cache)
+metrics.register_cache("chapter_lists", read_ahead.chapter_cache)
+metrics.register_queue(job_queue)
+# Pages not downloaded yet are served through a size-bounded disk cache (see MANGA_IMAGE_CACHE_BYTES),
+# opened on startup
+image_cache: Optional[DiskImageCache] = None
+update_broadcaster = UpdateBroadcaster()
+# Posters are fetched, resized and stored in the background, never inside a request
+poster_pipeline = PosterPipeline(repository)
+
+def start_update_poller() -> Optional[UpdatePoller]:
+    """
+    Start the new chapter poller when MANGA_POLL_INTERVAL is set.
+
+    MANGA_POLL_PAGES bounds the listing pages read per poll and
+    MANGA_WEBHOOKS is a comma-separated list of webhook URLs.
+    """
+    interval = float(os.environ.get("MANGA_POLL_INTERVAL", "0"))
+    if interval <= 0:
+        return None
+    listeners = [update_broadcaster.publish]
+    webhooks = [url.strip() for url in os.environ.get("MANGA_WEBHOOKS", "").split(",") if url.strip()]
+    if webhooks:
+        listeners.append(WebhookNotifier(webhooks))
+    poller = UpdatePoller(repository, listeners, interval=interval,
+                          max_pages=int(os.environ.get("MANGA_POLL_PAGES", "3")))
+    poller.start()
+    return poller
+
+# Upstream time budget of a request, clients may ask for less with an X-Request-Deadline header (seconds)
+REQUEST_DEADLINE = float(os.environ.get("MANGA_REQUEST_DEADLINE", "10"))
+
+# Last good scrapes, served marked as stale while the upstream fails (up to MANGA_STALE_TTL seconds old)
+stale_results = StaleWhileRevalidate(
+    TTLCache(maxsize=2048, ttl=float(os.environ.get("MANGA_STALE_TTL", "86400"))),
+    (CircuitOpenError, DeadlineExceeded, requests.RequestException),
+)
+metrics.register_cache("stale", stale_results.cache)
+
+def upstream_error(e: Exception, action: str) -> HTTPException:
+    """Map an upstream failure to an HTTP error."""
+    if isinstance(e, CircuitOpenError):
+        return HTTPException(status_code=503, detail=f"Upstream unavailable: {e}", headers={"Retry-After": "30"})
+    if isinstance(e, DeadlineExceeded):
+        return HTTPException(status_code=504, detail=f"Upstream too slow: {e}")
+    logger.error("Error %s: %s", action, e, exc_info=e)
+    return HTTPException(status_code=500, detail=f"Error {action}: {str(e)}")
+
+def fresh_or_stale(content, stale: bool) -> FastJSONResponse:
+    """JSON response, marked as stale when served from the last good scrape."""
+    headers = {"Warning": '110 - "Response is Stale"', "X-Cache-Status": "STALE"} if stale else None
+    return FastJSONResponse(content, headers=headers)
+
+def request_deadline(x_request_deadline: Optional[float] = Header(default=None, gt=0)) -> float:
+    """Time budget of the upstream fetches of a request."""
+    return min(REQUEST_DEADLINE, x_request_deadline) if x_request_deadline else REQUEST_DEADLINE
 
-# Initialize database
-init_db()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Configure logging, create missing tables, open the page cache and start the update poller on startup."""
+    global image_cache
+    setup_logging()
+    init_db()
+    image_cache = DiskImageCache.from_env()
+    if image_cache is not None:
+        metrics.register_cache("disk_images", image_cache)
+    # Hedge slow page fetches after this latency percentile, e.g. MANGA_HEDGE_QUANTILE=95. Every request
+    # thread may run a primary attempt and a hedge, so the hedge pool gets two threads per request thread
+    request_threads = int(anyio.to_thread.current_default_thread_limiter().total_tokens)
+    set_hedging(float(os.environ.get("MANGA_HEDGE_QUANTILE", "0")), max_workers=2 * request_threads)
+    set_circuit_breakers(os.environ.get("MANGA_CIRCUIT_BREAKER", "1") != "0")
+    poller = start_update_poller()
+    yield
+    if poller is not None:
+        poller.stop()
+    poster_pipeline.stop(drain=False)
+    image_pipeline.shutdown()
+    if image_cache is not None:
+        image_cache.close()
+    shutdown_logging()
 
 app = FastAPI(
     title= "Mangaha API",
-    deprecated= False
+    deprecated= False,
+    lifespan=lifespan,
+    default_response_class=FastJSONResponse
 )
 
+# Compress JSON bodies above MANGA_COMPRESS_MIN_SIZE bytes with zstd, brotli or gzip
+app.add_middleware(CompressionMiddleware, minimum_size=int(os.environ.get("MANGA_COMPRESS_MIN_SIZE", "1024")))
+
 app.add_middleware(
     CORSMiddleware,
     allow_methods=["*"],
@@ -58,235 +200,401 @@ app.add_middleware(
     allow_headers=["*"]
 )
 
-async def download_image(url: str, timeout: int = 10) -> tuple[bytes, str]:
-    """Download image with timeout and return content and mime type."""
+@app.middleware("http")
+async def record_latency(request: Request, call_next):
+    """Record endpoint latency by route template."""
+    start = time.perf_counter()
+    status = 500
     try:
-        response = requests.get(url, timeout=timeout)
-        response.raise_for_status()
-        content_type = response.headers.get('content-type', 'image/jpeg')
-        return response.content, content_type
-    except Exception as e:
-        print(f"Error downloading image from {url}: {e}")
-        return None, None
-
-async def download_chapter_images(chapter_id: int):
-    """Background task to download chapter images."""
-    with Session() as session:
-        chapter = session.query(Chapter).filter(Chapter.id == chapter_id).first()
-        if not chapter:
-            return
-            
-        for image in chapter.images:
-            if not image.is_downloaded:
-                content, mime_type = await download_image(image.url)
-                if content and mime_type:
-                    image.set_image_from_bytes(content, mime_type)
-        session.commit()
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        route = request.scope.get("route")
+        metrics.API_LATENCY.labels(
+            request.method, route.path if route else "unmatched", str(status)
+        ).observe(time.perf_counter() - start)
+
+@app.get("/metrics", include_in_schema=False)
+def get_metrics():
+    """Expose Prometheus metrics."""
+    payload, content_type = metrics.render()
+    return Response(content=payload, media_type=content_type)
 
 @app.get("/results", response_model=List[MangaSearchResult])
-def get_results(search: str):
-    try:
+def get_results(search: str, budget: float = Depends(request_deadline)):
+    def search_results() -> List[MangaSearchResult]:
         scraper = SearchResultsScraper(search=search)
         scraper.prepare_results()
         return scraper.results
+    try:
+        with deadline(budget):
+            results, stale = stale_results.get(("results", search), search_results)
+        return fresh_or_stale(results, stale)
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error searching manga: {str(e)}")
+        raise upstream_error(e, "searching manga")
+
+@app.get("/results/stream")
+def stream_results(search: str, format: Optional[str] = None, accept: Optional[str] = Header(default=None)):
+    """Stream search results as NDJSON or Server-Sent Events as each one is parsed."""
+    try:
+        fmt = stream_format(format, accept)
+    except KeyError:
+        raise HTTPException(status_code=400, detail="Unknown format, expected ndjson or sse")
+    scraper = SearchResultsScraper(search=search)
+    return stream_response(scraper.iter_results(), fmt)
+
+class DetailsProjection:
+    """
+    Query parameters selecting parts of the manga details.
+
+    ``fields`` is a comma-separated list of MangaDetails fields. Chapters are
+    selected by position, oldest first from 0 and newest first from -1, as
+    in a Python slice: ``chapters_from=-1`` is the latest chapter.
+    """
+
+    def __init__(self, fields: Optional[str] = None, chapters_from: Optional[int] = None,
+                 chapters_to: Optional[int] = None, limit: Optional[int] = Query(default=None, ge=0)):
+        self.fields = [name.strip() for name in fields.split(",") if name.strip()] if fields else None
+        unknown = set(self.fields or ()).difference(MangaDetailsScarper.DETAIL_FIELDS)
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}, "
+                                                        f"expected {', '.join(MangaDetailsScarper.DETAIL_FIELDS)}")
+        self.chapters_from = chapters_from
+        self.chapters_to = chapters_to
+        self.limit = limit
+
+    def __bool__(self) -> bool:
+        return any(value is not None for value in (self.fields, self.chapters_from, self.chapters_to, self.limit))
+
+    def apply(self, scraper: MangaDetailsScarper):
+        """Full details when nothing is selected, else only the selected parts."""
+        if not self:
+            return scraper.details
+        return scraper.project(self.fields, self.chapters_from, self.chapters_to, self.limit)
+
+    def apply_model(self, details: MangaDetails):
+        """Same selection as apply(), on details already extracted."""
+        if not self:
+            return details
+        projected = {name: getattr(details, name) for name in MangaDetailsScarper.DETAIL_FIELDS
+                     if self.fields is None or name in self.fields}
+        if "chapters" in projected:
+            chapters = details.chapters[self.chapters_from:self.chapters_to][:self.limit]
+            projected["chapters"] = [chapter.model_dump() for chapter in chapters]
+            if self.chapters_from is not None or self.chapters_to is not None or self.limit is not None:
+                projected["chapters_total"] = len(details.chapters)
+        return projected
 
 @app.get("/manga", response_model=MangaDetails)
-def get_details(url: str):
+def get_details(url: str, projection: DetailsProjection = Depends(), budget: float = Depends(request_deadline)):
+    """
+    Get manga details, or only the selected fields and chapter range.
+
+    Full details are remembered; when the upstream fails, the last good
+    details (or the stored ones) are served marked as stale.
+    """
+    key = ("manga", url)
     try:
-        scraper = MangaDetailsScarper(manga_url=url)
-        return scraper.details
+        with deadline(budget):
+            scraper = MangaDetailsScarper(manga_url=url)
+        if projection:
+            return FastJSONResponse(projection.apply(scraper))
+        details = scraper.details
+        stale_results.remember(key, details)
+        return FastJSONResponse(details)
+    except stale_results.errors as e:
+        details = stale_results.stale(key, lambda: repository.stored_details(url))
+        if details is None:
+            raise upstream_error(e, "getting manga details")
+        stale_results.revalidate(key, lambda: MangaDetailsScarper(manga_url=url).details)
+        return fresh_or_stale(projection.apply_model(details), True)
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error getting manga details: {str(e)}")
+        raise upstream_error(e, "getting manga details")
+
+@app.post("/manga/batch", response_model=List[MangaBatchItem])
+def get_details_batch(request: BatchRequest, projection: DetailsProjection = Depends()):
+    """
+    Get details of many manga concurrently, with a result or an error per URL.
+
+    Full and projected details take the same path: every item has its url,
+    details and error keys, details being a MangaDetails or its selected fields.
+    """
+    def details(url: str) -> dict:
+        result = projection.apply(MangaDetailsScarper(manga_url=url))
+        return result.model_dump(mode="json") if isinstance(result, MangaDetails) else result
+
+    try:
+        items = batch_runner.map(details, request.urls)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return FastJSONResponse([{"url": item.url, "details": item.result, "error": item.error} for item in items])
 
 @app.get("/chapter/images", response_model=List[ChapterImage])
-def get_chapter_images(url: str):
+def get_chapter_images(url: str, prefetch: int = 0, budget: float = Depends(request_deadline)):
+    """Get chapter images, optionally reading ahead the next `prefetch` chapters."""
     try:
-        scraper = ChapterImagesScraper(chapter_url=url)
-        return [ChapterImage(order_no=img.order_no, url=img.url) for img in scraper.images]
+        with deadline(budget):
+            images, stale = stale_results.get(("images", url), lambda: read_ahead.chapter_images(url),
+                                              lambda: repository.stored_chapter_images(url))
+        if not stale:
+            read_ahead.schedule(url, prefetch)
+        return fresh_or_stale(images, stale)
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error getting chapter images: {str(e)}")
+        raise upstream_error(e, "getting chapter images")
+
+@app.post("/chapter/images/batch", response_model=List[ChapterImagesBatchItem])
+def get_chapter_images_batch(request: BatchRequest):
+    """Get the images of many chapters concurrently, with a result or an error per URL."""
+    try:
+        items = batch_runner.map(read_ahead.chapter_images, request.urls)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return [{"url": item.url, "images": item.result, "error": item.error} for item in items]
+
+@app.get("/chapter/images/stream")
+def stream_chapter_images(url: str, format: Optional[str] = None, accept: Optional[str] = Header(default=None)):
+    """Stream chapter images as NDJSON or Server-Sent Events as each one is parsed."""
+    try:
+        fmt = stream_format(format, accept)
+    except KeyError:
+        raise HTTPException(status_code=400, detail="Unknown format, expected ndjson or sse")
+    return stream_response(read_ahead.iter_chapter_images(url), fmt)
 
 @app.post("/manga/save", response_model=MangaCreateResponse)
 def save_manga(url: str):
     """Save manga and its details to database."""
-    with Session() as session:
-        # Check if manga already exists
-        existing_manga = session.query(Manga).filter(Manga.url == url).first()
-        if existing_manga:
-            return {"message": "Manga already exists", "manga_id": existing_manga.id}
-            
-        # Scrape manga details
-        scraper = MangaDetailsScarper(manga_url=url)
-        details = scraper.details
-        
-        # Create manga object
-        manga = Manga(
-            url=url,
-            title=details.title,
-            poster_url=details.poster_url,
-            description=details.description,
-            status=details.status,
-            rate=details.rate
-        )
+    # Check if manga already exists
+    existing_manga = repository.get_manga_by_url(url)
+    if existing_manga:
+        return {"message": "Manga already exists", "manga_id": existing_manga.id}
         
-        # Download and save poster image
-        if details.poster_url:
-            try:
-                response = requests.get(details.poster_url)
-                if response.status_code == 200:
-                    content_type = response.headers.get('content-type', 'image/jpeg')
-                    manga.set_poster_from_bytes(response.content, content_type)
-            except Exception as e:
-                print(f"Error downloading poster: {e}")
-        
-        session.add(manga)
-        session.commit()
-        return {"message": "Manga saved successfully", "manga_id": manga.id}
+    # Scrape manga details
+    scraper = MangaDetailsScarper(manga_url=url)
+    details = scraper.details
+    manga_id = repository.save_manga(details)
+    
+    # The poster is fetched by the ingestion pipeline
+    poster_pipeline.submit([details.poster])
+    
+    return {"message": "Manga saved successfully", "manga_id": manga_id}
 
 @app.get("/manga/{manga_id}", response_model=MangaResponse)
-def get_manga(manga_id: int):
+def get_manga(manga_id: str):
     """Get manga details from database."""
     try:
-        with Session() as session:
-            manga = session.query(Manga).filter(Manga.id == manga_id).first()
-            if not manga:
-                raise HTTPException(status_code=404, detail="Manga not found")
-            
-            # Get chapter count
-            chapter_count = len(manga.chapters)
-            
-            # Get downloaded chapter count
-            downloaded_chapters = sum(1 for chapter in manga.chapters 
-                                   if all(image.is_downloaded for image in chapter.images))
-            
-            return {
-                "id": manga.id,
-                "title": manga.title,
-                "description": manga.description,
-                "status": manga.status,
-                "rate": manga.rate,
-                "url": manga.url,
-                "has_poster": bool(manga.poster_image),
-                "total_chapters": chapter_count,
-                "downloaded_chapters": downloaded_chapters,
-                "created_at": manga.created_at,
-                "updated_at": manga.updated_at
-            }
+        manga = repository.get_manga(manga_id)
     except Exception as e:
+        logger.exception("Error retrieving manga %s", manga_id)
         raise HTTPException(status_code=500, detail=f"Error retrieving manga: {str(e)}")
+    if not manga:
+        raise HTTPException(status_code=404, detail="Manga not found")
+    
+    # Get chapter counts
+    chapter_count, downloaded_chapters = repository.manga_stats(manga_id)
+    
+    return {
+        "id": manga.id,
+        "title": manga.title,
+        "description": manga.description,
+        "status": manga.status,
+        "rate": manga.rate,
+        "url": manga.url,
+        "has_poster": repository.has_poster(manga_id),
+        "total_chapters": chapter_count,
+        "downloaded_chapters": downloaded_chapters,
+        "created_at": manga.created_at,
+        "updated_at": manga.updated_at
+    }
 
 @app.get("/manga/{manga_id}/poster")
-def get_manga_poster(manga_id: int):
-    """Get manga poster image."""
-    with Session() as session:
-        manga = session.query(Manga).filter(Manga.id == manga_id).first()
-        if not manga or not manga.poster_image:
-            raise HTTPException(status_code=404, detail="Poster not found")
-        return Response(
-            content=manga.poster_image,
-            media_type=manga.poster_mime_type
-        )
+def get_manga_poster(manga_id: str, size: str = DEFAULT_SIZE):
+    """Get manga poster image, `size` is `small`, `medium` or `large`."""
+    if size not in POSTER_SIZES:
+        raise HTTPException(status_code=400, detail=f"Unknown size, expected one of: {', '.join(POSTER_SIZES)}")
+    poster = repository.get_poster(manga_id, size)
+    if poster is None:
+        manga = repository.get_manga(manga_id)
+        if manga and manga.poster:
+            poster_pipeline.submit([manga.poster])
+        raise HTTPException(status_code=404, detail="Poster not found")
+    content, mime_type = poster
+    return Response(
+        content=content,
+        media_type=mime_type
+    )
+
+def chapter_entry(chapter) -> dict:
+    """Convert a chapter row into a ChapterEntry."""
+    return {
+        "chapter_id": chapter.id,
+        "title": chapter.title,
+        "url": chapter.url,
+        "number": chapter.number,
+        "sort_key": chapter.sort_key,
+        "is_downloaded": chapter.downloaded_at is not None
+    }
+
+@app.get("/manga/{manga_id}/chapters", response_model=List[ChapterEntry])
+def get_manga_chapters(manga_id: str, after: Optional[str] = None, limit: int = 100):
+    """List stored chapters in reading order, only those following chapter `after` when given."""
+    position = -1
+    if after is not None:
+        chapter = repository.get_chapter(after)
+        if not chapter or chapter.manga_id != manga_id:
+            raise HTTPException(status_code=404, detail="Chapter not found")
+        position = reading_position(chapter)
+    return [chapter_entry(chapter) for chapter in repository.chapters_after(manga_id, position, min(limit, 1000))]
+
+@app.get("/updates/stream")
+async def stream_updates(manga_id: Optional[str] = None):
+    """Push new chapters detected by the update poller as Server-Sent Events."""
+    return StreamingResponse(update_broadcaster.events(manga_id), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
 
 @app.post("/chapter/save", response_model=ChapterResponse)
-async def save_chapter(manga_id: int, url: str, background_tasks: BackgroundTasks):
-    """Save chapter and its images to database."""
-    with Session() as session:
-        manga = session.query(Manga).filter(Manga.id == manga_id).first()
-        if not manga:
-            raise HTTPException(status_code=404, detail="Manga not found")
-            
-        # Check if chapter already exists
-        existing_chapter = session.query(Chapter).filter(Chapter.url == url).first()
-        if existing_chapter:
-            return {"message": "Chapter already exists", "chapter_id": existing_chapter.id}
-            
-        try:
-            # Scrape chapter images
-            scraper = ChapterImagesScraper(chapter_url=url)
-            images = scraper.images
-            
-            # Create chapter
-            chapter = Chapter(
-                manga_id=manga_id,
-                url=url,
-                title=url.split('/')[-1],
-                order_no=len(manga.chapters) + 1
-            )
-            session.add(chapter)
-            session.flush()  # Get chapter ID
-            
-            # Create image entries
-            for idx, img in enumerate(images, 1):
-                chapter_image = ChapterImage(
-                    chapter_id=chapter.id,
-                    url=img.url,
-                    order_no=idx
-                )
-                session.add(chapter_image)
-            
-            session.commit()
-            
-            # Start background download task
-            background_tasks.add_task(download_chapter_images, chapter.id)
-            
-            return {
-                "message": "Chapter saved successfully, images downloading in background",
-                "chapter_id": chapter.id,
-                "total_images": len(images)
-            }
-            
-        except Exception as e:
-            session.rollback()
-            raise HTTPException(status_code=500, detail=f"Error saving chapter: {str(e)}")
+def save_chapter(manga_id: str, url: str, priority: int = PRIORITY_READER, prefetch: int = 0):
+    """Save chapter and its images to database and queue the image download."""
+    if not repository.get_manga(manga_id):
+        raise HTTPException(status_code=404, detail="Manga not found")
+        
+    # Check if chapter already exists
+    existing_chapter = repository.get_chapter_by_url(url)
+    if existing_chapter:
+        read_ahead.schedule(url, prefetch)
+        return {"message": "Chapter already exists", "chapter_id": existing_chapter.id}
+        
+    try:
+        # Scrape chapter images
+        images = read_ahead.chapter_images(url)
+        
+        # Create chapter and image entries, ordered by the chapter number in the URL
+        title = url.rstrip('/').split('/')[-1]
+        number = parse_chapter_number(title, url)
+        chapter = ChapterDetailed(
+            url=url,
+            title=title,
+            order_no=repository.chapter_position(manga_id, number.key) if number else repository.chapter_count(manga_id)
+        )
+        chapter_id = repository.upsert_chapters(manga_id, [chapter])[url]
+        repository.upsert_chapter_images(chapter_id, images)
+        
+        # Queue the download for the worker pool
+        job_queue.enqueue(chapter_id, priority=priority)
+        read_ahead.schedule(url, prefetch)
+        
+        return {
+            "message": "Chapter saved successfully, images queued for download",
+            "chapter_id": chapter_id,
+            "total_images": len(images)
+        }
+        
+    except Exception as e:
+        logger.exception("Error saving chapter %s", url)
+        raise HTTPException(status_code=500, detail=f"Error saving chapter: {str(e)}")
 
 @app.get("/chapter/{chapter_id}/pdf")
-def get_chapter_pdf(chapter_id: int):
+def get_chapter_pdf(chapter_id: str):
     """Get chapter as PDF."""
-    with Session() as session:
-        chapter = session.query(Chapter).filter(Chapter.id == chapter_id).first()
-        if not chapter:
-            raise HTTPException(status_code=404, detail="Chapter not found")
-            
-        pdf_data = chapter.generate_pdf()
-        return Response(
-            content=pdf_data,
-            media_type="application/pdf",
-            headers={"Content-Disposition": f'attachment; filename="{chapter.title}.pdf"'}
-        )
+    chapter = repository.get_chapter(chapter_id)
+    if not chapter:
+        raise HTTPException(status_code=404, detail="Chapter not found")
+        
+    pdf_data = repository.chapter_pdf(chapter_id)
+    if pdf_data is None:
+        raise HTTPException(status_code=404, detail="Chapter images not downloaded")
+    return Response(
+        content=pdf_data,
+        media_type="application/pdf",
+        headers={"Content-Disposition": f'attachment; filename="{chapter.title}.pdf"'}
+    )
 
 @app.get("/chapter/{chapter_id}/images/{image_no}")
-def get_chapter_image(chapter_id: int, image_no: int):
-    """Get specific chapter image."""
-    with Session() as session:
-        image = session.query(ChapterImage).filter(
-            ChapterImage.chapter_id == chapter_id,
-            ChapterImage.order_no == image_no
-        ).first()
-        if not image or not image.image_data:
+def get_chapter_image(chapter_id: str, image_no: int, variant: Optional[str] = None,
+                      accept: Optional[str] = Header(default=None)):
+    """
+    Get specific chapter image.
+
+    `variant` selects `thumb`, `webp`, `avif` or `original`. Without it the
+    most compact format listed in the Accept header is served. Images not
+    downloaded yet are fetched through the disk image cache.
+    """
+    try:
+        name = choose_variant(variant, accept)
+    except KeyError:
+        raise HTTPException(status_code=400, detail=f"Unknown variant, expected one of: original, {', '.join(VARIANTS)}")
+    headers = {"Vary": "Accept"}
+    if name:
+        path = image_pipeline.store.get(chapter_id, image_no, name)
+        if path:
+            return FileResponse(path, media_type=VARIANTS[name].media_type, headers=headers)
+    image = repository.get_image(chapter_id, image_no)
+    if not image:
+        raise HTTPException(status_code=404, detail="Image not found")
+    data, mime_type = image.image_data, image.mime_type
+    if not data:
+        if image_cache is None:
             raise HTTPException(status_code=404, detail="Image not found")
-        return Response(
-            content=image.image_data,
-            media_type=image.mime_type
-        )
+        chapter = repository.get_chapter(chapter_id)
+        try:
+            data, mime_type = image_cache.fetch(image.url, fetch_image, series=chapter.manga_id if chapter else None)
+        except Exception as e:
+            raise upstream_error(e, "getting chapter image")
+    if name:
+        try:
+            path = image_pipeline.render(chapter_id, image_no, name, data)
+            return FileResponse(path, media_type=VARIANTS[name].media_type, headers=headers)
+        except Exception:
+            logger.exception("Error deriving %s of image %s/%s", name, chapter_id, image_no)
+    return Response(
+        content=data,
+        media_type=mime_type,
+        headers=headers
+    )
 
 @app.get("/chapter/{chapter_id}/status", response_model=ChapterStatusResponse)
-def get_chapter_status(chapter_id: int):
+def get_chapter_status(chapter_id: str):
     """Get chapter download status."""
-    with Session() as session:
-        chapter = session.query(Chapter).filter(Chapter.id == chapter_id).first()
-        if not chapter:
-            raise HTTPException(status_code=404, detail="Chapter not found")
-            
-        total_images = len(chapter.images)
-        downloaded_images = sum(1 for image in chapter.images if image.is_downloaded)
+    chapter = repository.get_chapter(chapter_id)
+    if not chapter:
+        raise HTTPException(status_code=404, detail="Chapter not found")
         
-        return {
-            "chapter_id": chapter.id,
-            "title": chapter.title,
-            "total_images": total_images,
-            "downloaded_images": downloaded_images,
-            "is_complete": total_images == downloaded_images,
-            "progress": (downloaded_images / total_images * 100) if total_images > 0 else 0
-        }
+    total_images, downloaded_images = repository.chapter_status(chapter_id)
+    job = job_queue.latest_for_chapter(chapter_id)
+    
+    return {
+        "chapter_id": chapter.id,
+        "title": chapter.title,
+        "total_images": total_images,
+        "downloaded_images": downloaded_images,
+        "is_complete": total_images == downloaded_images,
+        "progress": (downloaded_images / total_images * 100) if total_images > 0 else 0,
+        "job_id": job.id if job else None,
+        "job_status": job.status if job else None,
+        "job_attempts": job.attempts if job else 0,
+        "job_error": job.error if job else None
+    }
+
+@app.get("/chapter/{chapter_id}/next", response_model=ChapterEntry)
+def get_next_chapter(chapter_id: str):
+    """Get the chapter following a stored chapter."""
+    chapter = repository.adjacent_chapter(chapter_id, 1)
+    if not chapter:
+        raise HTTPException(status_code=404, detail="No next chapter")
+    return chapter_entry(chapter)
+
+@app.get("/chapter/{chapter_id}/previous", response_model=ChapterEntry)
+def get_previous_chapter(chapter_id: str):
+    """Get the chapter preceding a stored chapter."""
+    chapter = repository.adjacent_chapter(chapter_id, -1)
+    if not chapter:
+        raise HTTPException(status_code=404, detail="No previous chapter")
+    return chapter_entry(chapter)
+
+@app.delete("/chapter/{chapter_id}/job", response_model=JobCancelResponse)
+def cancel_chapter_job(chapter_id: str):
+    """Cancel the pending download job of a chapter."""
+    job = job_queue.latest_for_chapter(chapter_id)
+    if not job or not job_queue.cancel(job.id):
+        raise HTTPException(status_code=404, detail="No active download job")
+    return {"message": "Download cancelled", "job_id": job.id}
@@ -0,0 +1,75 @@
+"""
+Concurrent fan-out of batch requests.
+
+Batch endpoints accept many URLs in one call. BatchRunner scrapes them on a
+shared thread pool so the number of concurrent upstream fetches is capped
+server-wide, no matter how many batch requests are in flight, and reports
+a result or an error for every item.
+"""
+
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Iterable, List, NamedTuple, Optional
+
+logger = logging.getLogger(__name__)
+
+class BatchItem(NamedTuple):
+    """Outcome of one item of a batch."""
+    url: str
+    result: Any
+    error: Optional[str]
+
+class BatchRunner:
+    """
+    Run a function over many URLs with a server-wide concurrency cap.
+
+    Attributes:
+        MAX_ITEMS (int): Maximum number of URLs accepted per batch
+        max_workers (int): Maximum number of concurrent upstream fetches
+
+    Example:
+        >>> runner = BatchRunner(max_workers=8)
+        >>> items = runner.map(lambda url: MangaDetailsScarper(url).details, urls)
+    """
+
+    MAX_ITEMS = 100
+
+    def __init__(self, max_workers: int = 8):
+        """
+        Initialize the runner.
+
+        Args:
+            max_workers (int): Maximum number of concurrent upstream fetches
+        """
+        self.max_workers = max_workers
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="batch")
+
+    def map(self, fn: Callable[[str], Any], urls: Iterable[str]) -> List[BatchItem]:
+        """
+        Apply a function to every URL concurrently.
+
+        Duplicate URLs are fetched once. A failing item does not affect
+        the others, its error message is returned instead of a result.
+
+        Args:
+            fn (Callable[[str], Any]): Function fetching one URL
+            urls (Iterable[str]): URLs to fetch
+
+        Returns:
+            List[BatchItem]: One item per URL, in request order
+
+        Raises:
+            ValueError: If more than MAX_ITEMS URLs are given
+        """
+        urls = list(urls)
+        if len(urls) > self.MAX_ITEMS:
+            raise ValueError(f"At most {self.MAX_ITEMS} URLs per batch")
+        futures = {url: self._executor.submit(fn, url) for url in dict.fromkeys(urls)}
+        items = []
+        for url in urls:
+            try:
+                items.append(BatchItem(url, futures[url].result(), None))
+            except Exception as e:
+                logger.warning("Batch item failed for %s: %s", url, e)
+                items.append(BatchItem(url, None, str(e)))
+        return items
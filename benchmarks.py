@@ -0,0 +1,293 @@
+"""
+Offline benchmark suite.
+
+Benchmarks exercise the hot paths on synthetic data, without touching the
+upstream site, so results are comparable between runs and machines. Each
+benchmark returns the number of items it processed; the runner reports the
+best and median time over several rounds and the resulting throughput.
+
+Run them with:
+    python benchmarks.py [name ...]
+"""
+
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from functools import lru_cache
+from io import BytesIO
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+BENCHMARKS: Dict[str, Callable[[], int]] = {}
+
+def register(name: str) -> Callable[[Callable[[], int]], Callable[[], int]]:
+    """
+    Register a benchmark under a name.
+
+    Args:
+        name (str): Benchmark name
+
+    Returns:
+        Callable: Decorator registering the function
+    """
+    def decorator(fn: Callable[[], int]) -> Callable[[], int]:
+        BENCHMARKS[name] = fn
+        return fn
+    return decorator
+
+def search_page_html(results: int = 12) -> str:
+    """
+    Build a search result page shaped like the upstream markup.
+
+    Args:
+        results (int): Number of result cards
+
+    Returns:
+        str: HTML document
+    """
+    card = '''
+    <div class="row c-tabs-item__content">
+      <div class="c-image-hover"><a href="https://example.com/series/title-{n}/" title="Title {n}">
+        <img src="https://example.com/posters/{n}.jpg"></a></div>
+      <div class="mg_genres"><div class="summary-content"><a>Action</a><a>Drama</a><a>Fantasy</a></div></div>
+      <div class="mg_status"><div class="summary-content">Ongoing</div></div>
+      <span class="total_votes">4.{n}</span>
+      <div class="latest-chap"><a href="https://example.com/series/title-{n}/chapter-{n}/">Chapter {n}</a></div>
+    </div>'''
+    body = "".join(card.format(n=n % 10) for n in range(results))
+    return f"<html><body><h1>{results} results</h1>{body}</body></html>"
+
+@lru_cache(maxsize=None)
+def details_page_html(chapters: int = 300) -> str:
+    """
+    Build a manga details page shaped like the upstream markup.
+
+    Args:
+        chapters (int): Number of chapter entries
+
+    Returns:
+        str: HTML document
+    """
+    items = "".join(
+        f'<li class="wp-manga-chapter"><a href="https://example.com/series/title/chapter-{n}/">Chapter {n}</a>'
+        f'<span class="chapter-release-date"><i>2 days ago</i></span></li>'
+        for n in range(chapters, 0, -1)
+    )
+    return (
+        '<html><body><h1>Title</h1>'
+        '<div class="summary_image"><a><img class="img-responsive" src="https://example.com/p.jpg"></a></div>'
+        f'<div class="manga-summary"><p>{"Lorem ipsum dolor sit amet. " * 40}</p></div>'
+        '<div class="genres-content"><a>Action</a><a>Drama</a><a>Fantasy</a></div>'
+        '<div class="summary-content"><div class="tags-content">Ongoing</div></div>'
+        '<span id="averagerate">4.5</span>'
+        f'<ul class="main version-chap">{items}</ul></body></html>'
+    )
+
+def parse_details_page(manga_url: str):
+    """
+    Stand-in for SerieScraper._fetch_details that parses a synthetic page.
+
+    Args:
+        manga_url (str): URL reported in the details
+
+    Returns:
+        MangaRecord: Parsed details
+    """
+    from selectolax.lexbor import LexborHTMLParser
+    from scraper import MangaDetailsScarper
+    return MangaDetailsScarper(manga_url, LexborHTMLParser(details_page_html())).record
+
+def synthetic_details(count: int, chapters: int):
+    """
+    Build synthetic manga details.
+
+    Args:
+        count (int): Number of manga
+        chapters (int): Chapters per manga
+
+    Returns:
+        List[MangaDetails]: Synthetic details
+    """
+    from models import MangaDetails, ChapterDetailed
+    return [
+        MangaDetails(
+            url=f"https://example.com/series/title-{n}/", title=f"Title {n}", poster="p",
+            genres=["Action", "Drama"], status="Ongoing", rate=4.5, description="d" * 200,
+            chapters=[ChapterDetailed(url=f"https://example.com/series/title-{n}/chapter-{c}/",
+                                      title=f"Chapter {c}", order_no=c) for c in range(chapters)]
+        )
+        for n in range(count)
+    ]
+
+@register("parse_search")
+def bench_parse_search() -> int:
+    """Parse 50 search result pages of 12 cards."""
+    from selectolax.lexbor import LexborHTMLParser
+    from scraper import SearchResultsScraper
+    html = search_page_html()
+    parsed = 0
+    for _ in range(50):
+        page = LexborHTMLParser(html)
+        for node in page.css("div.row.c-tabs-item__content"):
+            SearchResultsScraper._parse_result(node)
+            parsed += 1
+    return parsed
+
+@register("db_upsert")
+def bench_db_upsert() -> int:
+    """Upsert 200 manga with 100 chapters each into a fresh SQLite file."""
+    from repository import MangaRepository
+    items = synthetic_details(200, 100)
+    with tempfile.TemporaryDirectory() as tmp:
+        repository = MangaRepository(f"sqlite:///{Path(tmp) / 'bench.db'}")
+        for n in range(0, len(items), 50):
+            repository.upsert_manga(items[n:n + 50])
+        repository.session_factory.kw["bind"].dispose()
+    return len(items)
+
+@lru_cache(maxsize=None)
+def catalog_snapshot() -> str:
+    """Export 200 manga with 100 chapters each to a snapshot file, once."""
+    from repository import MangaRepository
+    from snapshots import export_snapshot
+    tmp = tempfile.mkdtemp()
+    repository = MangaRepository(f"sqlite:///{Path(tmp) / 'source.db'}")
+    repository.upsert_manga(synthetic_details(200, 100))
+    export_snapshot(repository, str(Path(tmp) / "catalog.jsonl.gz"))
+    repository.session_factory.kw["bind"].dispose()
+    return str(Path(tmp) / "catalog.jsonl.gz")
+
+@register("snapshot_import")
+def bench_snapshot_import() -> int:
+    """Bootstrap a fresh SQLite file from a snapshot of 200 manga with 100 chapters each."""
+    from repository import MangaRepository
+    from snapshots import import_snapshot
+    path = catalog_snapshot()
+    with tempfile.TemporaryDirectory() as tmp:
+        repository = MangaRepository(f"sqlite:///{Path(tmp) / 'bench.db'}")
+        manga = import_snapshot(repository, [path])[0].manga
+        repository.session_factory.kw["bind"].dispose()
+    return manga
+
+def _crawl(processes: int) -> int:
+    """Parse 400 synthetic details pages through SerieScraper.iter_details."""
+    from scraper import SerieScraper
+    urls = [f"https://example.com/series/title-{n}/" for n in range(400)]
+    return sum(len(details) for _, details in SerieScraper.iter_details(
+        urls, max_workers=4, processes=processes, shard_size=25, fetch=parse_details_page))
+
+@register("crawl_threads")
+def bench_crawl_threads() -> int:
+    """Parse details pages on the thread pool of a single process."""
+    return _crawl(1)
+
+@register("crawl_processes")
+def bench_crawl_processes() -> int:
+    """Parse details pages sharded across one process per core."""
+    return _crawl(max(2, os.cpu_count() or 1))
+
+@register("derive_images")
+def bench_derive_images() -> int:
+    """Derive every variant of a 1080x6000 long-strip page."""
+    from PIL import Image
+    from images import derive, VARIANTS
+    buffer = BytesIO()
+    Image.linear_gradient("L").resize((1080, 6000)).convert("RGB").save(buffer, format="PNG")
+    data = buffer.getvalue()
+    for variant in VARIANTS:
+        derive(data, variant)
+    return len(VARIANTS)
+
+@lru_cache(maxsize=1)
+def long_webtoon():
+    """Details of a long webtoon with 5000 chapters, as returned by /manga."""
+    return synthetic_details(1, 5000)[0]
+
+@register("serialize_stdlib")
+def bench_serialize_stdlib() -> int:
+    """Encode a 5000-chapter manga 20 times the way JSONResponse did."""
+    import json
+    from fastapi.encoders import jsonable_encoder
+    details = long_webtoon()
+    for _ in range(20):
+        json.dumps(jsonable_encoder(details), ensure_ascii=False, separators=(",", ":")).encode()
+    return 20
+
+@register("serialize_fast")
+def bench_serialize_fast() -> int:
+    """Encode a 5000-chapter manga 20 times with responses.dumps."""
+    from responses import dumps
+    details = long_webtoon()
+    for _ in range(20):
+        dumps(details)
+    return 20
+
+@lru_cache(maxsize=None)
+def _report_ratio(encoding: str, before: int, after: int) -> None:
+    """Print the size reduction of an encoding once."""
+    print(f"  {encoding}: {before} -> {after} bytes ({after / before:.1%})")
+
+def _compress(encoding: str) -> int:
+    """Compress a 5000-chapter manga 20 times, skipped when the encoder is not installed."""
+    from responses import dumps, ENCODERS
+    if encoding not in ENCODERS:
+        return 0
+    body = dumps(long_webtoon())
+    for _ in range(20):
+        size = len(ENCODERS[encoding](body))
+    _report_ratio(encoding, len(body), size)
+    return 20
+
+for _encoding in ("gzip", "br", "zstd"):
+    register(f"compress_{_encoding}")(lambda encoding=_encoding: _compress(encoding))
+
+def _cold_import(module: str) -> int:
+    """Import a module in a fresh interpreter, as a new API or crawler worker does."""
+    subprocess.run([sys.executable, "-c", f"import {module}"], cwd=Path(__file__).parent, check=True)
+    return 1
+
+@register("import_api")
+def bench_import_api() -> int:
+    """Cold start of the API module, including interpreter startup."""
+    return _cold_import("api")
+
+@register("import_scraper")
+def bench_import_scraper() -> int:
+    """Cold start of the scraper module, including interpreter startup."""
+    return _cold_import("scraper")
+
+def run(names: Optional[List[str]] = None, rounds: int = 3) -> Dict[str, dict]:
+    """
+    Run benchmarks and print a summary table.
+
+    Args:
+        names (List[str], optional): Benchmarks to run, all of them by default
+        rounds (int): Number of timed rounds per benchmark
+
+    Returns:
+        Dict[str, dict]: best, median and items per second for each benchmark
+
+    Raises:
+        KeyError: If a benchmark name is unknown
+    """
+    results = {}
+    for name in names or list(BENCHMARKS):
+        fn = BENCHMARKS[name]
+        times = []
+        items = 0
+        for _ in range(rounds):
+            start = time.perf_counter()
+            items = fn()
+            times.append(time.perf_counter() - start)
+        best = min(times)
+        results[name] = {"best": best, "median": statistics.median(times),
+                         "items": items, "per_second": items / best if best else 0.0}
+        print(f"{name:<20} best={best:8.4f}s median={results[name]['median']:8.4f}s "
+              f"items={items:<8d} {results[name]['per_second']:12.1f}/s")
+    return results
+
+if __name__ == "__main__":
+    run(sys.argv[1:] or None)
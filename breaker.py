@@ -0,0 +1,263 @@
+"""
+Circuit breakers for upstream hosts and stale-while-revalidate serving.
+
+When the upstream site degrades, every API call used to run its retries to
+exhaustion before failing with a 500. A CircuitBreaker per host watches the
+outcome and latency of recent requests and, once too many fail or are slow,
+rejects requests immediately for a cool-down period, after which a single
+probe decides whether to close it again.
+
+While requests are rejected (or failing), StaleWhileRevalidate answers with
+the last good result, from memory or from the database, marked as stale,
+and refreshes it in the background.
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+class CircuitOpenError(Exception):
+    """Requests to a host are rejected while its circuit is open."""
+
+class CircuitBreaker:
+    """
+    Failure and latency based circuit breaker of one upstream host.
+
+    The breaker trips when, among the last ``window`` requests (and at least
+    ``min_calls``), the share of failures reaches ``failure_rate`` or the
+    share of requests slower than ``slow_call_seconds`` reaches
+    ``slow_call_rate``. It then stays open for ``cooldown`` seconds, lets one
+    probe through (half open) and closes when the probe succeeds.
+
+    Attributes:
+        host (str): Upstream host
+        state (str): closed, open or half_open
+    """
+
+    def __init__(self, host: str, window: int = 20, min_calls: int = 10, failure_rate: float = 0.5,
+                 slow_call_seconds: float = 5.0, slow_call_rate: float = 0.8, cooldown: float = 30.0):
+        """
+        Initialize a closed breaker.
+
+        Args:
+            host (str): Upstream host
+            window (int): Number of recent requests considered
+            min_calls (int): Requests needed before the breaker may trip
+            failure_rate (float): Share of failures tripping the breaker
+            slow_call_seconds (float): Latency above which a request counts as slow
+            slow_call_rate (float): Share of slow requests tripping the breaker
+            cooldown (float): Seconds the breaker stays open before a probe
+        """
+        self.host = host
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.slow_call_seconds = slow_call_seconds
+        self.slow_call_rate = slow_call_rate
+        self.cooldown = cooldown
+        self.state = CLOSED
+        self._calls: deque = deque(maxlen=window)
+        self._opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def before(self) -> None:
+        """
+        Ask permission to send a request.
+
+        Raises:
+            CircuitOpenError: If the circuit is open, or half open with a probe in flight
+        """
+        with self._lock:
+            if self.state == OPEN and time.monotonic() - self._opened_at >= self.cooldown:
+                self.state = HALF_OPEN
+                self._probing = False
+            if self.state == CLOSED:
+                return
+            if self.state == HALF_OPEN and not self._probing:
+                self._probing = True
+                return
+        raise CircuitOpenError(f"Circuit open for {self.host}")
+
+    def record(self, success: bool, seconds: float = 0.0) -> None:
+        """
+        Report the outcome of a request allowed by before().
+
+        Args:
+            success (bool): Whether the upstream answered properly
+            seconds (float): Request latency
+        """
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self._probing = False
+                if success and seconds < self.slow_call_seconds:
+                    logger.info("Circuit closed for %s", self.host, extra={"host": self.host})
+                    self.state = CLOSED
+                    self._calls.clear()
+                else:
+                    self._open()
+                return
+            self._calls.append((success, seconds >= self.slow_call_seconds))
+            if self.state == CLOSED and len(self._calls) >= self.min_calls:
+                failures = sum(1 for ok, _ in self._calls if not ok) / len(self._calls)
+                slow = sum(1 for _, is_slow in self._calls if is_slow) / len(self._calls)
+                if failures >= self.failure_rate or slow >= self.slow_call_rate:
+                    logger.warning("Circuit opened for %s: %.0f%% failed, %.0f%% slow", self.host,
+                                   failures * 100, slow * 100, extra={"host": self.host})
+                    self._open()
+
+    def release(self) -> None:
+        """
+        End a request allowed by before() without counting its outcome.
+
+        Used when the caller, not the upstream, cut the request short, for
+        instance when its deadline ran out.
+        """
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self._probing = False
+
+    def _open(self) -> None:
+        """Reject requests for the cool-down period."""
+        self.state = OPEN
+        self._opened_at = time.monotonic()
+
+class BreakerRegistry:
+    """
+    One circuit breaker per upstream host, sharing the same settings.
+
+    Example:
+        >>> breakers = BreakerRegistry(cooldown=10)
+        >>> breakers.get("azoramoon.com").before()
+    """
+
+    def __init__(self, **settings):
+        """
+        Initialize the registry.
+
+        Args:
+            **settings: CircuitBreaker arguments
+        """
+        self.settings = settings
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    def get(self, host: str) -> CircuitBreaker:
+        """Breaker of a host, created on first use."""
+        with self._lock:
+            breaker = self._breakers.get(host)
+            if breaker is None:
+                breaker = self._breakers[host] = CircuitBreaker(host, **self.settings)
+            return breaker
+
+    def states(self) -> Dict[str, str]:
+        """State of every known host."""
+        with self._lock:
+            return {host: breaker.state for host, breaker in self._breakers.items()}
+
+class StaleWhileRevalidate:
+    """
+    Serve the last good result when a fetch fails, and refresh it in the background.
+
+    Attributes:
+        cache (TTLCache): Last good results
+        errors (tuple): Exception types answered with a stale result
+
+    Example:
+        >>> swr = StaleWhileRevalidate(TTLCache(maxsize=1024, ttl=86400), (CircuitOpenError,))
+        >>> details, stale = swr.get(("manga", url), lambda: scrape(url), lambda: stored(url))
+    """
+
+    def __init__(self, cache: TTLCache, errors: Tuple[type, ...], max_workers: int = 2):
+        """
+        Initialize the policy.
+
+        Args:
+            cache (TTLCache): Cache of last good results, its TTL bounds how stale they may get
+            errors (tuple): Exception types answered with a stale result
+            max_workers (int): Concurrent background refreshes
+        """
+        self.cache = cache
+        self.errors = errors
+        self._inflight: set = set()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="revalidate")
+
+    def get(self, key: Hashable, fetch: Callable[[], Any],
+            fallback: Optional[Callable[[], Any]] = None) -> Tuple[Any, bool]:
+        """
+        Fetch a value, or fall back to its last good version.
+
+        Args:
+            key (Hashable): Cache key
+            fetch (Callable): Fetches a fresh value
+            fallback (Callable, optional): Loads a stored value when the cache has none
+
+        Returns:
+            Tuple[Any, bool]: The value, and whether it is stale
+
+        Raises:
+            Exception: The fetch error, when no stale value is available
+        """
+        try:
+            value = fetch()
+        except self.errors as e:
+            value = self.stale(key, fallback)
+            if value is None:
+                raise
+            logger.info("Serving stale %s after %s", key, type(e).__name__)
+            self.revalidate(key, fetch)
+            return value, True
+        self.remember(key, value)
+        return value, False
+
+    def remember(self, key: Hashable, value: Any) -> None:
+        """Store the last good value of a key."""
+        self.cache.set(key, value)
+
+    def stale(self, key: Hashable, fallback: Optional[Callable[[], Any]] = None) -> Any:
+        """
+        Get the last good value of a key.
+
+        Args:
+            key (Hashable): Cache key
+            fallback (Callable, optional): Loads a stored value when the cache has none
+
+        Returns:
+            Any: The value, or None
+        """
+        value = self.cache.get(key)
+        if value is None and fallback is not None:
+            try:
+                value = fallback()
+            except Exception:
+                logger.exception("Error loading stored value of %s", key)
+        return value
+
+    def revalidate(self, key: Hashable, fetch: Callable[[], Any]) -> None:
+        """Refresh a value in the background, once at a time per key."""
+        with self._lock:
+            if key in self._inflight:
+                return
+            self._inflight.add(key)
+
+        def run() -> None:
+            try:
+                self.cache.set(key, fetch())
+            except Exception as e:
+                logger.debug("Revalidation of %s failed: %s", key, e)
+            finally:
+                with self._lock:
+                    self._inflight.discard(key)
+
+        self._executor.submit(run)
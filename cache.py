@@ -0,0 +1,106 @@
+"""
+In-memory caches shared by the API and the background helpers.
+
+This module provides a small thread-safe LRU cache with per-entry expiry,
+used to keep recently scraped chapter lists and image lists warm between
+requests.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+class TTLCache:
+    """
+    Thread-safe LRU cache whose entries expire after a fixed time.
+
+    Attributes:
+        maxsize (int): Maximum number of entries kept
+        ttl (float): Entry lifetime in seconds
+        hits (int): Number of successful lookups
+        misses (int): Number of failed lookups
+
+    Example:
+        >>> cache = TTLCache(maxsize=100, ttl=60)
+        >>> cache.set("key", [1, 2, 3])
+        >>> cache.get("key")
+        [1, 2, 3]
+    """
+
+    def __init__(self, maxsize: int = 256, ttl: float = 600.0):
+        """
+        Initialize the cache.
+
+        Args:
+            maxsize (int): Maximum number of entries kept
+            ttl (float): Entry lifetime in seconds
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data: "OrderedDict[Hashable, tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Look up a key.
+
+        Args:
+            key (Hashable): Cache key
+            default (Any): Value returned on a miss
+
+        Returns:
+            Any: The cached value, or default if missing or expired
+        """
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._data[key]
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """
+        Store a value, evicting the least recently used entry when full.
+
+        Args:
+            key (Hashable): Cache key
+            value (Any): Value to store
+            ttl (float, optional): Lifetime overriding the cache default
+        """
+        expires = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (expires, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Remove a key.
+
+        Args:
+            key (Hashable): Cache key
+            default (Any): Value returned if the key is missing
+
+        Returns:
+            Any: The removed value, or default
+        """
+        with self._lock:
+            entry = self._data.pop(key, None)
+        return default if entry is None else entry[1]
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            entry = self._data.get(key)
+            return entry is not None and entry[0] >= time.monotonic()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._data)
@@ -0,0 +1,96 @@
+"""
+Chapter number parsing and sortable chapter keys.
+
+Chapter positions taken from the page (or from a count of stored chapters)
+drift whenever the site inserts or removes a chapter. Instead, each chapter
+gets a key derived from its own title or URL: "Chapter 12.5" sorts between
+12 and 13, "Season 2 Chapter 3" after every chapter of season 1, and
+unnumbered extras right after the chapter they follow on the page.
+
+Keys are integers so they can be stored and indexed next to the manga id,
+making "next chapter" or "new since" queries single index lookups.
+"""
+
+import re
+from typing import Iterable, List, NamedTuple, Optional, Tuple
+
+# Key units: three decimals of chapter number, up to 99,999 chapters per season
+NUMBER_SCALE = 1000
+SEASON_SCALE = 100_000 * NUMBER_SCALE
+
+_SEASON = re.compile(r"\b(?:season|s)[\s.-]*(\d+)\b", re.IGNORECASE)
+_NUMBERED = re.compile(r"\b(?:chapter|chap|ch|episode|ep)[\s.#-]*(\d+(?:[.,-]\d{1,3})?)(?!\d)", re.IGNORECASE)
+_EXTRA = re.compile(r"\b(?:extra|special|side[\s-]*story|bonus|omake|notice|announcement|hiatus)\b", re.IGNORECASE)
+_BARE = re.compile(r"^\s*#?(\d+(?:\.\d{1,3})?)(?!\d)")
+
+class ChapterNumber(NamedTuple):
+    """Parsed chapter number."""
+    season: int
+    number: float
+
+    @property
+    def key(self) -> int:
+        """Integer sort key of the chapter."""
+        return self.season * SEASON_SCALE + round(self.number * NUMBER_SCALE)
+
+def _slug(url: str) -> str:
+    """Last path segment of a chapter URL."""
+    return url.rstrip("/").rsplit("/", 1)[-1]
+
+def parse_chapter_number(title: str, url: str = "") -> Optional[ChapterNumber]:
+    """
+    Parse the season and chapter number of a chapter.
+
+    The title is tried first, then the last segment of the URL
+    ("chapter-12-5" reads as 12.5). Extras and announcements without an
+    explicit chapter number are not numbered.
+
+    Args:
+        title (str): Chapter title, such as "Chapter 12.5" or "S2 Ep. 3"
+        url (str): Chapter URL
+
+    Returns:
+        ChapterNumber | None: Season (0 when not given) and number, or None
+
+    Example:
+        >>> parse_chapter_number("Season 2 Chapter 3")
+        ChapterNumber(season=2, number=3.0)
+    """
+    for text in (title, _slug(url) if url else ""):
+        match = _NUMBERED.search(text)
+        if match is None:
+            if _EXTRA.search(text):
+                return None
+            match = _BARE.match(text)
+        if match is None:
+            continue
+        number = float(re.sub(r"[,-]", ".", match.group(1)))
+        season = _SEASON.search(text[:match.start()] + " " + text[match.end():])
+        return ChapterNumber(int(season.group(1)) if season else 0, number)
+    return None
+
+def sort_keys(chapters: Iterable[Tuple[str, str]], previous: int = -1) -> List[Tuple[Optional[float], int]]:
+    """
+    Compute the sort keys of chapters listed in reading order.
+
+    Numbered chapters get the key of their number. Unnumbered ones (extras,
+    prologues) and repeated numbers get the key following the previous
+    chapter, so they stay where the page lists them.
+
+    Args:
+        chapters (Iterable[Tuple[str, str]]): (title, url) of the chapters, oldest first
+        previous (int): Key of the chapter before the first one
+
+    Returns:
+        List[Tuple[float | None, int]]: Parsed number (None when unnumbered) and key of each chapter
+    """
+    keys = []
+    last_parsed = None
+    for title, url in chapters:
+        parsed = parse_chapter_number(title, url)
+        if parsed is not None and parsed.key != last_parsed:
+            previous = last_parsed = parsed.key
+        else:
+            previous += 1
+        keys.append((parsed.number if parsed else None, previous))
+    return keys
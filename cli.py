@@ -0,0 +1,349 @@
+"""
+Command-line interface for production jobs.
+
+Installed as the ``manga`` console script:
+    manga crawl --processes 4 --rate-limit 5    full catalog crawl, refreshing stored manga
+    manga sync --workers 6                      only add manga not stored yet
+    manga download URL [URL ...] --images       store one series and its chapters
+    manga export CHAPTER_URL ... --out-dir pdf  export chapters as PDF files
+    manga warm URL [URL ...] --chapters 5       store image lists and queue downloads
+    manga poll --interval 300 --webhook URL     store new chapters and notify webhooks
+    manga bench [NAME ...]                      run the offline benchmark suite
+    manga upstream --port 8081 --latency 0.2    serve a local stand-in of the upstream site
+    manga loadtest --concurrency 16             load-test the API against the stand-in
+    manga cache pin URL [URL ...]               keep the cached pages of series out of eviction
+    manga snapshot import catalog.jsonl.gz      bootstrap a database from a catalog snapshot
+
+Every subcommand accepts --db-url, --rate-limit, --log-level and --metrics-port.
+"""
+
+import argparse
+import logging
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import List, Optional
+
+logger = logging.getLogger(__name__)
+
+def _repository(args):
+    """Open the repository selected by --db-url."""
+    from database import init_db
+    from repository import MangaRepository
+    if args.db_url is None:
+        init_db()
+    return MangaRepository(args.db_url)
+
+def cmd_crawl(args) -> int:
+    """Crawl the whole catalog."""
+    from scraper import SerieScraper
+    from posters import PosterPipeline
+    repository = _repository(args)
+    SerieScraper.save_all_manga(
+        max_workers=args.workers,
+        batch_size=args.batch_size,
+        repository=repository,
+        trace_path=args.trace,
+        update_existing=args.command == "crawl",
+        processes=args.processes,
+        skip_unchanged=not args.full,
+        posters=PosterPipeline(repository) if args.posters else None,
+    )
+    return 0
+
+def cmd_download(args) -> int:
+    """Store series and their chapters, optionally downloading the images."""
+    from manga_downloader import MangaDownloader
+    from image_cache import DiskImageCache
+    downloader = MangaDownloader(download_dir=args.download_dir, image_cache=DiskImageCache.from_env(),
+                                 repository=_repository(args))
+    ok = True
+    for url in args.urls:
+        ok = downloader.download_manga(url) and ok
+        if args.chapters:
+            ok = downloader.download_all_chapters(url, download_images=args.images, pin=args.pin) and ok
+    return 0 if ok else 1
+
+def cmd_export(args) -> int:
+    """Export chapters as PDF files."""
+    from scraper import ChapterImagesScraper
+    from image_cache import DiskImageCache
+    cache = DiskImageCache.from_env()
+    out_dir = Path(args.out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    failed = 0
+    for url in args.urls:
+        out_path = out_dir / f"{url.rstrip('/').split('/')[-1]}.pdf"
+        try:
+            ChapterImagesScraper(url).download_images_as_pdf(str(out_path), max_workers=args.workers, cache=cache)
+            logger.info("Exported %s to %s", url, out_path)
+        except Exception:
+            failed += 1
+            logger.exception("Failed to export %s", url)
+    return 1 if failed else 0
+
+def cmd_warm(args) -> int:
+    """Store chapter image lists and queue their downloads."""
+    from jobs import JobQueue, PRIORITY_ARCHIVE
+    from scraper import MangaDetailsScarper, ChapterImagesScraper
+    repository = _repository(args)
+    queue = JobQueue(session_factory=repository.session_factory)
+
+    def warm_chapter(manga_id: str, chapter) -> None:
+        chapter_id = repository.upsert_chapters(manga_id, [chapter])[chapter.url]
+        repository.upsert_chapter_images(chapter_id, ChapterImagesScraper(chapter.url).images)
+        if args.download:
+            queue.enqueue(chapter_id, priority=PRIORITY_ARCHIVE)
+
+    failed = 0
+    with ThreadPoolExecutor(max_workers=args.workers) as ex:
+        futures = {}
+        for url in args.urls:
+            try:
+                details = MangaDetailsScarper(url).details
+                manga_id = repository.save_manga(details)
+            except Exception:
+                failed += 1
+                logger.exception("Failed to load %s", url)
+                continue
+            chapters = details.chapters[-args.chapters:] if args.chapters else details.chapters
+            for chapter in chapters:
+                futures[ex.submit(warm_chapter, manga_id, chapter)] = chapter.url
+        for fut in as_completed(futures):
+            try:
+                fut.result()
+            except Exception:
+                failed += 1
+                logger.exception("Failed to warm %s", futures[fut])
+    logger.info("Warmed %d chapters, %d failures", len(futures), failed)
+    return 1 if failed else 0
+
+def cmd_poll(args) -> int:
+    """Store new chapters from the latest-updates listing and notify webhooks."""
+    from updates import UpdatePoller, WebhookNotifier
+    listeners = [WebhookNotifier(args.webhooks)] if args.webhooks else []
+    poller = UpdatePoller(_repository(args), listeners, interval=args.interval, max_pages=args.pages)
+    if args.once:
+        for update in poller.poll_once():
+            print(f"{update.manga_title}: {update.title} {update.url}")
+        return 0
+    try:
+        poller.run()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+def cmd_bench(args) -> int:
+    """Run the offline benchmark suite."""
+    import benchmarks
+    try:
+        benchmarks.run(args.names or None, rounds=args.rounds)
+    except KeyError as e:
+        print(f"Unknown benchmark {e}, expected one of: {', '.join(benchmarks.BENCHMARKS)}", file=sys.stderr)
+        return 2
+    return 0
+
+def _fake_upstream(args, port: int = 0):
+    """Build the upstream stand-in selected by the --upstream-* options."""
+    from fake_upstream import FakeUpstream
+    return FakeUpstream(series=args.series, latency=args.upstream_latency, jitter=args.upstream_jitter,
+                        error_rate=args.error_rate, throttle_rate=args.throttle_rate,
+                        recorded_dir=args.recorded_dir, port=port)
+
+def cmd_upstream(args) -> int:
+    """Serve the upstream stand-in until interrupted."""
+    upstream = _fake_upstream(args, args.port).start()
+    print(f"Serving a fake upstream on {upstream.url}, set MANGA_UPSTREAM_URL={upstream.url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        upstream.stop()
+    return 0
+
+def cmd_loadtest(args) -> int:
+    """Load-test the API, against an in-process API and upstream stand-in by default."""
+    import json
+    import loadtest
+    with _fake_upstream(args) as upstream:
+        upstream_url = args.upstream_url or upstream.url
+        paths = loadtest.scenario_paths(upstream_url, series=args.series, count=max(args.requests or 0, 200))
+        if args.api_url:
+            report = loadtest.run(args.api_url, paths, args.concurrency, args.requests, args.duration)
+        else:
+            with loadtest.serve_api(upstream_url) as api_url:
+                report = loadtest.run(api_url, paths, args.concurrency, args.requests, args.duration)
+        print(report.format())
+        print("upstream " + " ".join(f"{status}={count}" for status, count in sorted(upstream.stats.items())))
+    if args.json:
+        Path(args.json).write_text(json.dumps(report._asdict(), indent=2))
+    return 0
+
+def cmd_cache(args) -> int:
+    """Inspect the page cache, pin series or evict pages."""
+    from image_cache import DiskImageCache
+    cache = DiskImageCache.from_env()
+    if cache is None:
+        print("The image cache is disabled (MANGA_IMAGE_CACHE_BYTES=0)", file=sys.stderr)
+        return 2
+    if args.action in ("pin", "unpin"):
+        repository = _repository(args)
+        for target in args.series:
+            manga = repository.get_manga_by_url(target) if "://" in target else repository.get_manga(target)
+            if manga is None:
+                print(f"Unknown series {target}, store it first with: manga download", file=sys.stderr)
+                return 1
+            (cache.pin if args.action == "pin" else cache.unpin)(manga.id)
+    elif args.action == "evict":
+        print(f"Freed {cache.evict()} bytes")
+    elif args.action == "clear":
+        cache.clear()
+    stats = cache.stats()
+    print(f"entries={stats.entries} size={stats.size} max_bytes={stats.max_bytes} "
+          f"pinned_size={stats.pinned_size} pinned_series={len(cache.pinned())}")
+    return 0
+
+def cmd_snapshot(args) -> int:
+    """Export, diff or import catalog snapshots."""
+    from snapshots import SnapshotError, diff_snapshots, export_snapshot, import_snapshot
+    expected = {"export": 1, "diff": 3}.get(args.action)
+    if expected is not None and len(args.paths) != expected:
+        print(f"snapshot {args.action} takes {expected} path(s)", file=sys.stderr)
+        return 2
+    try:
+        if args.action == "export":
+            infos = [export_snapshot(_repository(args), args.paths[0], base=args.base)]
+        elif args.action == "diff":
+            infos = [diff_snapshots(*args.paths)]
+        else:
+            infos = import_snapshot(_repository(args), args.paths, force=args.force)
+    except SnapshotError as e:
+        print(e, file=sys.stderr)
+        return 1
+    for info in infos:
+        print(f"{info.kind} id={info.id} base={info.base} manga={info.manga} deleted={info.deleted}")
+    return 0
+
+def build_parser() -> argparse.ArgumentParser:
+    """
+    Build the argument parser.
+
+    Returns:
+        argparse.ArgumentParser: Parser with one subcommand per operation
+    """
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--db-url", default=None, help="SQLAlchemy database URL (default: manga.db next to the code)")
+    common.add_argument("--rate-limit", type=float, default=None, help="maximum upstream requests per second")
+    common.add_argument("--log-level", default=None, help="log level (default: MANGA_LOG_LEVEL or INFO)")
+    common.add_argument("--metrics-port", type=int, default=None, help="serve Prometheus metrics on this port")
+
+    parser = argparse.ArgumentParser(prog="manga", description="Manga API operations")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    for name, help_text in (("crawl", "crawl the whole catalog, refreshing stored manga"),
+                            ("sync", "crawl the catalog, only adding manga not stored yet")):
+        p = sub.add_parser(name, parents=[common], help=help_text)
+        p.add_argument("--workers", type=int, default=6, help="concurrent detail fetches")
+        p.add_argument("--processes", type=int, default=1, help="shard detail pages across worker processes")
+        p.add_argument("--batch-size", type=int, default=50, help="manga written per transaction")
+        p.add_argument("--trace", default=None, metavar="PATH", help="write a per-stage timing report")
+        p.add_argument("--full", action="store_true",
+                       help="re-scrape every stored series, even when its listing card is unchanged")
+        p.add_argument("--no-posters", dest="posters", action="store_false", help="do not fetch poster images")
+        p.set_defaults(func=cmd_crawl)
+
+    p = sub.add_parser("download", parents=[common], help="store series and their chapters")
+    p.add_argument("urls", nargs="+", help="manga URLs")
+    p.add_argument("--download-dir", default="downloads", help="directory for downloaded files")
+    p.add_argument("--no-chapters", dest="chapters", action="store_false", help="only store the series")
+    p.add_argument("--images", action="store_true", help="also download chapter images as PDF")
+    p.add_argument("--pin", action="store_true", help="archive: never evict the cached pages of these series")
+    p.set_defaults(func=cmd_download)
+
+    p = sub.add_parser("export", parents=[common], help="export chapters as PDF files")
+    p.add_argument("urls", nargs="+", help="chapter URLs")
+    p.add_argument("--out-dir", default="exports", help="output directory")
+    p.add_argument("--workers", type=int, default=6, help="concurrent image downloads per chapter")
+    p.set_defaults(func=cmd_export)
+
+    p = sub.add_parser("warm", parents=[common], help="store chapter image lists and queue downloads")
+    p.add_argument("urls", nargs="+", help="manga URLs")
+    p.add_argument("--chapters", type=int, default=0, help="only the latest N chapters (default: all)")
+    p.add_argument("--workers", type=int, default=4, help="concurrent chapter fetches")
+    p.add_argument("--no-download", dest="download", action="store_false", help="do not queue image downloads")
+    p.set_defaults(func=cmd_warm)
+
+    p = sub.add_parser("poll", parents=[common], help="store new chapters of stored series and notify webhooks")
+    p.add_argument("--interval", type=float, default=300.0, help="seconds between polls")
+    p.add_argument("--pages", type=int, default=3, help="maximum latest-updates pages read per poll")
+    p.add_argument("--webhook", dest="webhooks", action="append", default=[], metavar="URL",
+                   help="POST new chapters to this URL (repeatable)")
+    p.add_argument("--once", action="store_true", help="poll once and print the new chapters")
+    p.set_defaults(func=cmd_poll)
+
+    p = sub.add_parser("bench", parents=[common], help="run the offline benchmark suite")
+    p.add_argument("names", nargs="*", help="benchmarks to run (default: all)")
+    p.add_argument("--rounds", type=int, default=3, help="timed rounds per benchmark")
+    p.set_defaults(func=cmd_bench)
+
+    upstream = argparse.ArgumentParser(add_help=False)
+    upstream.add_argument("--series", type=int, default=60, help="series in the fake catalog")
+    upstream.add_argument("--upstream-latency", type=float, default=0.0, help="delay of every upstream response")
+    upstream.add_argument("--upstream-jitter", type=float, default=0.0, help="maximum random delay added on top")
+    upstream.add_argument("--error-rate", type=float, default=0.0, help="share of upstream responses failing with 503")
+    upstream.add_argument("--throttle-rate", type=float, default=0.0, help="share of upstream responses failing with 429")
+    upstream.add_argument("--recorded-dir", default=None, help="serve recorded pages from this directory")
+
+    p = sub.add_parser("upstream", parents=[common, upstream], help="serve a local stand-in of the upstream site")
+    p.add_argument("--port", type=int, default=8081, help="port to listen on")
+    p.set_defaults(func=cmd_upstream)
+
+    p = sub.add_parser("loadtest", parents=[common, upstream], help="load-test the API offline")
+    p.add_argument("--api-url", default=None, help="API to test (default: start one in this process)")
+    p.add_argument("--upstream-url", default=None,
+                   help="upstream the tested API scrapes, for request paths (default: the stand-in)")
+    p.add_argument("--concurrency", type=int, default=8, help="concurrent clients")
+    p.add_argument("--requests", type=int, default=None, help="total requests (default: 200)")
+    p.add_argument("--duration", type=float, default=None, help="run for this many seconds instead")
+    p.add_argument("--json", default=None, metavar="PATH", help="also write the report as JSON")
+    p.set_defaults(func=cmd_loadtest)
+
+    p = sub.add_parser("cache", parents=[common], help="inspect the page cache, pin series or evict pages")
+    p.add_argument("action", choices=["stats", "pin", "unpin", "evict", "clear"], help="operation")
+    p.add_argument("series", nargs="*", help="manga URLs or ids to pin or unpin")
+    p.set_defaults(func=cmd_cache)
+
+    p = sub.add_parser("snapshot", parents=[common], help="export, diff or import catalog snapshots")
+    p.add_argument("action", choices=["export", "diff", "import"], help="operation")
+    p.add_argument("paths", nargs="+",
+                   help="export: OUT, diff: OLD NEW OUT, import: a full snapshot and/or diffs, in order")
+    p.add_argument("--base", default=None, metavar="PATH", help="export a diff against this full snapshot")
+    p.add_argument("--force", action="store_true", help="import a first diff even if the database is not at its base")
+    p.set_defaults(func=cmd_snapshot)
+    return parser
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Run the command line.
+
+    Args:
+        argv (List[str], optional): Arguments, defaults to sys.argv
+
+    Returns:
+        int: Process exit code
+    """
+    args = build_parser().parse_args(argv)
+    from logging_config import setup_logging
+    setup_logging(level=args.log_level)
+    if args.rate_limit:
+        from scraper import set_rate_limit
+        set_rate_limit(args.rate_limit)
+    if args.metrics_port:
+        import metrics
+        metrics.serve(args.metrics_port)
+    return args.func(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -6,9 +6,12 @@ and session management for SQLAlchemy ORM operations.
 """
 
 import logging
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, inspect, literal, Connection, Engine, Integer, Table, UniqueConstraint
 from sqlalchemy.orm import sessionmaker, Session
 from pathlib import Path
+from itertools import groupby
+from typing import List, Set
+from chapters import sort_keys
 from db_models import Base
 
 logger = logging.getLogger(__name__)
@@ -17,30 +20,194 @@ logger = logging.getLogger(__name__)
 DB_PATH = Path(__file__).parent / "manga.db"
 DATABASE_URL = f"sqlite:///{DB_PATH}"
 
+def create_db_engine(database_url: str = DATABASE_URL) -> Engine:
+    """
+    Create an engine with connection pooling for the given database URL.
+
+    SQLite connections are shared between worker threads, so the
+    same-thread check is disabled for them.
+
+    Args:
+        database_url (str): SQLAlchemy database URL
+
+    Returns:
+        Engine: Configured SQLAlchemy engine
+    """
+    connect_args = {"check_same_thread": False} if database_url.startswith("sqlite") else {}
+    return create_engine(
+        database_url,
+        connect_args=connect_args,
+        echo=False,
+        pool_pre_ping=True,
+        pool_size=10,
+        max_overflow=20
+    )
+
 # Create engine with connection pooling
-engine = create_engine(
-    DATABASE_URL,
-    connect_args={"check_same_thread": False},
-    echo=False,
-    pool_pre_ping=True,
-    pool_size=10,
-    max_overflow=20
-)
+engine = create_db_engine(DATABASE_URL)
 
 # Create session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
-def init_db() -> None:
+def init_db(bind: Engine | None = None) -> None:
     """
     Initialize the database by creating all tables.
     
     This function creates all tables defined in the SQLAlchemy models.
     It's safe to call multiple times as it uses CREATE TABLE IF NOT EXISTS.
+    Tables written by an older version are upgraded, see upgrade_db().
+
+    Args:
+        bind (Engine, optional): Engine to initialize, defaults to the module engine
     """
-    logger.info("Initializing database at %s", DB_PATH)
-    Base.metadata.create_all(bind=engine)
+    bind = bind or engine
+    logger.info("Initializing database at %s", bind.url)
+    Base.metadata.create_all(bind=bind)
+    upgrade_db(bind)
     logger.info("Database initialized successfully")
 
+def _outdated(conn: Connection, table: Table) -> bool:
+    """
+    Check whether an existing table differs from its model.
+
+    Args:
+        conn (Connection): Open connection
+        table (Table): Model table
+
+    Returns:
+        bool: True when a column is missing, an integer column is stored with
+        another type, or a unique constraint is missing
+    """
+    inspector = inspect(conn)
+    if not inspector.has_table(table.name):
+        return False
+    stored = {column["name"]: column["type"] for column in inspector.get_columns(table.name)}
+    for column in table.columns:
+        if column.name not in stored:
+            return True
+        if isinstance(column.type, Integer) and not isinstance(stored[column.name], Integer):
+            return True
+    unique = {tuple(c["column_names"]) for c in inspector.get_unique_constraints(table.name)}
+    unique |= {tuple(i["column_names"]) for i in inspector.get_indexes(table.name) if i["unique"]}
+    return any(tuple(column.name for column in constraint.columns) not in unique
+               for constraint in table.constraints if isinstance(constraint, UniqueConstraint))
+
+def _rebuild(conn: Connection, table: Table) -> Set[str]:
+    """
+    Rebuild an outdated SQLite table from its model, keeping its rows.
+
+    The table is renamed, created again and filled back: integer columns are
+    cast, new NOT NULL columns take their default, and rows breaking a new
+    unique constraint keep the most recently written one.
+
+    Args:
+        conn (Connection): Open connection to a SQLite database
+        table (Table): Model table
+
+    Returns:
+        Set[str]: Names of the columns added to the table
+    """
+    inspector = inspect(conn)
+    stored = {column["name"] for column in inspector.get_columns(table.name)}
+    old = f"_{table.name}_old"
+    for index in inspector.get_indexes(table.name):
+        conn.exec_driver_sql(f'DROP INDEX "{index["name"]}"')
+    # Keep the foreign keys of other tables pointing at the new table
+    conn.exec_driver_sql("PRAGMA legacy_alter_table = ON")
+    conn.exec_driver_sql(f'ALTER TABLE "{table.name}" RENAME TO "{old}"')
+    conn.exec_driver_sql("PRAGMA legacy_alter_table = OFF")
+    table.create(conn)
+    names, values = [], []
+    for column in table.columns:
+        if column.name in stored:
+            value = f'"{column.name}"'
+            values.append(f"CAST({value} AS INTEGER)" if isinstance(column.type, Integer) else value)
+        elif not column.nullable and column.default is not None:
+            values.append(str(literal(column.default.arg, column.type).compile(
+                conn, compile_kwargs={"literal_binds": True})))
+        else:
+            continue
+        names.append(f'"{column.name}"')
+    conn.exec_driver_sql(f'INSERT OR IGNORE INTO "{table.name}" ({", ".join(names)}) '
+                         f'SELECT {", ".join(values)} FROM "{old}" ORDER BY rowid DESC')
+    conn.exec_driver_sql(f'DROP TABLE "{old}"')
+    return {column.name for column in table.columns} - stored
+
+def _backfill_chapter_keys(conn: Connection) -> None:
+    """
+    Compute the chapter numbers and sort keys of chapters stored without them.
+
+    Chapters are read in page order (order_no) per manga and keyed with
+    chapters.sort_keys(), as the crawler does when storing them.
+
+    Args:
+        conn (Connection): Open connection
+    """
+    rows = conn.exec_driver_sql(
+        'SELECT id, manga_id, title, url FROM chapter ORDER BY manga_id, order_no, rowid').all()
+    updates = []
+    for _, chapters in groupby(rows, key=lambda row: row.manga_id):
+        chapters = list(chapters)
+        keys = sort_keys((chapter.title, chapter.url) for chapter in chapters)
+        updates += [(number, key, chapter.id) for chapter, (number, key) in zip(chapters, keys)]
+    if updates:
+        conn.exec_driver_sql("UPDATE chapter SET number = ?, sort_key = ? WHERE id = ?", updates)
+    logger.info("Computed sort keys of %d stored chapters", len(updates))
+
+def upgrade_db(bind: Engine) -> List[str]:
+    """
+    Bring the tables of a database written by an older version up to the models.
+
+    create_all() never alters existing tables. A manga.db written by the
+    original crawler lacks the download and poster columns, stores order
+    numbers as text and misses the unique (chapter_id, order_no) constraint
+    the image upserts rely on. On SQLite such tables are rebuilt in place
+    and their rows kept; other databases are not migrated. Missing indexes
+    are created in both cases.
+
+    Args:
+        bind (Engine): Engine of the database
+
+    Returns:
+        List[str]: Names of the rebuilt tables
+
+    Raises:
+        RuntimeError: If a table of a non-SQLite database is outdated
+    """
+    with bind.begin() as conn:
+        outdated = [table for table in Base.metadata.sorted_tables if _outdated(conn, table)]
+        if outdated and conn.dialect.name != "sqlite":
+            raise RuntimeError(f"Tables {', '.join(t.name for t in outdated)} were created by an older version "
+                               f"and can only be upgraded on SQLite, recreate them with 'manga crawl'")
+        for table in outdated:
+            logger.info("Upgrading table %s to the current schema", table.name)
+            added = _rebuild(conn, table)
+            if table.name == "chapter" and "sort_key" in added:
+                _backfill_chapter_keys(conn)
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(conn, checkfirst=True)
+    return [table.name for table in outdated]
+
+def create_session_factory(database_url: str | None = None) -> sessionmaker:
+    """
+    Get a session factory for a database URL.
+
+    The default URL reuses the module-level SessionLocal, any other URL
+    gets its own engine with all tables created.
+
+    Args:
+        database_url (str, optional): SQLAlchemy database URL
+
+    Returns:
+        sessionmaker: Session factory bound to the database
+    """
+    if database_url is None or database_url == DATABASE_URL:
+        return SessionLocal
+    bind = create_db_engine(database_url)
+    init_db(bind)
+    return sessionmaker(autocommit=False, autoflush=False, bind=bind)
+
 def get_db_session() -> Session:
     """
     Get a new database session.
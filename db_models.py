@@ -2,10 +2,11 @@
 SQLAlchemy ORM models for manga database.
 
 This module defines the database schema using SQLAlchemy ORM,
-providing models for Manga, Genre, Chapter, and ChapterImage entities.
+providing models for Manga, Genre, Chapter, ChapterImage, DownloadJob, PosterImage
+and CatalogSnapshot entities.
 """
 
-from sqlalchemy import Column, String, Float, Text, DateTime, ForeignKey
+from sqlalchemy import Column, String, Float, Text, DateTime, ForeignKey, Integer, BigInteger, Boolean, LargeBinary, UniqueConstraint, Index
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -33,6 +34,8 @@ class MangaDB(Base):
     description = Column(Text)
     status = Column(String(50))
     rate = Column(Float, default=0.0)
+    poster_image = Column(LargeBinary)
+    poster_mime_type = Column(String(50))
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
@@ -48,7 +51,7 @@ class GenreDB(Base):
     __tablename__ = "genre"
     
     id = Column(String(36), primary_key=True, default=get_uuid)
-    manga_id = Column(String(36), ForeignKey("manga.id"), nullable=False)
+    manga_id = Column(String(36), ForeignKey("manga.id"), nullable=False, index=True)
     name = Column(String(100), nullable=False, index=True)
     
     # Relationships
@@ -60,12 +63,17 @@ class GenreDB(Base):
 class ChapterDB(Base):
     """Database model for manga chapters."""
     __tablename__ = "chapter"
+    __table_args__ = (Index("ix_chapter_manga_sort", "manga_id", "sort_key"),)
     
     id = Column(String(36), primary_key=True, default=get_uuid)
-    manga_id = Column(String(36), ForeignKey("manga.id"), nullable=False)
-    order_no = Column(String, nullable=False)
+    manga_id = Column(String(36), ForeignKey("manga.id"), nullable=False, index=True)
+    order_no = Column(Integer, nullable=False)
+    number = Column(Float)
+    sort_key = Column(BigInteger, nullable=False, default=0)
     title = Column(String(255), nullable=False)
     url = Column(String(500), unique=True, nullable=False, index=True)
+    pdf_path = Column(String(500))
+    downloaded_at = Column(DateTime)
     created_at = Column(DateTime, default=datetime.utcnow)
     
     # Relationships
@@ -78,14 +86,73 @@ class ChapterDB(Base):
 class ChapterImageDB(Base):
     """Database model for chapter images."""
     __tablename__ = "chapter_image"
+    __table_args__ = (UniqueConstraint("chapter_id", "order_no"),)
     
     id = Column(String(36), primary_key=True, default=get_uuid)
-    chapter_id = Column(String(36), ForeignKey("chapter.id"), nullable=False)
-    order_no = Column(String, nullable=False)
+    chapter_id = Column(String(36), ForeignKey("chapter.id"), nullable=False, index=True)
+    order_no = Column(Integer, nullable=False)
     url = Column(String(500), nullable=False)
+    image_data = Column(LargeBinary)
+    mime_type = Column(String(50))
+    local_path = Column(String(500))
+    is_downloaded = Column(Boolean, default=False, nullable=False)
     
     # Relationships
     chapter = relationship("ChapterDB", back_populates="images")
     
     def __repr__(self):
         return f"<ChapterImageDB(id={self.id}, order_no={self.order_no})>"
+
+class PosterImageDB(Base):
+    """Database model for resized poster images, stored once per poster URL and size."""
+    __tablename__ = "poster_image"
+    __table_args__ = (UniqueConstraint("url", "size"),)
+    
+    id = Column(String(36), primary_key=True, default=get_uuid)
+    url = Column(String(500), nullable=False, index=True)
+    size = Column(String(16), nullable=False)
+    width = Column(Integer, nullable=False)
+    height = Column(Integer, nullable=False)
+    data = Column(LargeBinary, nullable=False)
+    mime_type = Column(String(50), nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f"<PosterImageDB(url='{self.url}', size='{self.size}')>"
+
+class DownloadJobDB(Base):
+    """Database model for queued chapter download jobs."""
+    __tablename__ = "download_job"
+    __table_args__ = (Index("ix_download_job_claim", "status", "priority", "available_at"),)
+    
+    id = Column(String(36), primary_key=True, default=get_uuid)
+    chapter_id = Column(String(36), ForeignKey("chapter.id"), nullable=False, index=True)
+    status = Column(String(20), nullable=False, default="queued")
+    priority = Column(Integer, nullable=False, default=0)
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=5)
+    progress = Column(Float, nullable=False, default=0.0)
+    error = Column(Text)
+    worker = Column(String(100))
+    available_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    finished_at = Column(DateTime)
+    
+    def __repr__(self):
+        return f"<DownloadJobDB(id={self.id}, chapter_id={self.chapter_id}, status='{self.status}')>"
+
+class CatalogSnapshotDB(Base):
+    """Database model for catalog snapshots applied to this database."""
+    __tablename__ = "catalog_snapshot"
+    
+    id = Column(String(36), primary_key=True, default=get_uuid)
+    snapshot_id = Column(String(64), nullable=False, index=True)
+    kind = Column(String(10), nullable=False)
+    base_id = Column(String(64))
+    manga_count = Column(Integer, nullable=False, default=0)
+    deleted_count = Column(Integer, nullable=False, default=0)
+    applied_at = Column(DateTime, default=datetime.utcnow, index=True)
+    
+    def __repr__(self):
+        return f"<CatalogSnapshotDB(snapshot_id={self.snapshot_id}, kind='{self.kind}')>"
@@ -0,0 +1,130 @@
+"""
+Time budgets for upstream fetches.
+
+An API request used to wait up to 10 seconds per upstream attempt, times
+the retries. A deadline set around an operation now bounds every fetch the
+current thread makes inside it: each attempt gets a timeout cut to its
+share of the remaining budget, a retry is only made when it still fits,
+and DeadlineExceeded is raised once the budget is spent.
+
+Like tracing bindings, deadlines belong to the current thread. Work handed
+to another thread carries its deadline explicitly with ``run_until``.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Iterator, Optional, TypeVar
+
+T = TypeVar("T")
+
+_local = threading.local()
+
+# Share of the remaining budget a single attempt may use, so a retry still fits after a timeout
+ATTEMPT_SHARE = 0.5
+
+class DeadlineExceeded(Exception):
+    """The time budget of the current operation ran out."""
+
+@contextmanager
+def deadline(seconds: Optional[float]) -> Iterator[None]:
+    """
+    Bound the upstream fetches of the current thread within the block.
+
+    Nested deadlines can only shorten the budget.
+
+    Args:
+        seconds (float, optional): Budget in seconds, None leaves fetches unbounded
+
+    Example:
+        >>> with deadline(5.0):
+        ...     details = MangaDetailsScarper(url).details
+    """
+    if seconds is None:
+        yield
+        return
+    with _until(time.monotonic() + seconds):
+        yield
+
+@contextmanager
+def _until(at: Optional[float]) -> Iterator[None]:
+    """Set the deadline of the current thread to a monotonic time."""
+    previous = getattr(_local, "at", None)
+    _local.at = previous if at is None else at if previous is None else min(previous, at)
+    try:
+        yield
+    finally:
+        _local.at = previous
+
+def deadline_at() -> Optional[float]:
+    """Monotonic time the current budget ends at, None when unbounded."""
+    return getattr(_local, "at", None)
+
+def remaining() -> Optional[float]:
+    """Seconds left in the current budget, None when unbounded."""
+    at = getattr(_local, "at", None)
+    return None if at is None else at - time.monotonic()
+
+def check(what: str = "operation") -> Optional[float]:
+    """
+    Ensure the current budget is not spent.
+
+    Args:
+        what (str): Description used in the error message
+
+    Returns:
+        float | None: Seconds left, None when unbounded
+
+    Raises:
+        DeadlineExceeded: If the budget is spent
+    """
+    left = remaining()
+    if left is not None and left <= 0:
+        raise DeadlineExceeded(f"Deadline exceeded before {what}")
+    return left
+
+def attempt_timeout(timeout: float) -> float:
+    """
+    Cut the timeout of an attempt to its share of the remaining budget.
+
+    The result is remembered for retry_fits().
+
+    Args:
+        timeout (float): Timeout the caller asked for
+
+    Returns:
+        float: Timeout to use for the attempt
+    """
+    left = remaining()
+    if left is not None:
+        timeout = max(0.001, min(timeout, left * ATTEMPT_SHARE))
+    _local.attempt = timeout
+    return timeout
+
+def retry_fits(backoff: float) -> bool:
+    """
+    Check whether another attempt, after a backoff, ends before the deadline.
+
+    Args:
+        backoff (float): Delay before the attempt in seconds
+
+    Returns:
+        bool: True when unbounded or when the attempt fits
+    """
+    left = remaining()
+    return left is None or left >= backoff + getattr(_local, "attempt", 0.0)
+
+def run_until(at: Optional[float], fn: Callable[..., T], *args) -> T:
+    """
+    Run a function under a deadline captured in another thread.
+
+    Args:
+        at (float, optional): Monotonic deadline, from deadline_at()
+        fn (Callable): Function to run
+        *args: Arguments of the function
+
+    Returns:
+        The result of the function
+    """
+    with _until(at):
+        return fn(*args)
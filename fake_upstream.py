@@ -0,0 +1,285 @@
+"""
+Local stand-in for the upstream site.
+
+Serves search, listing, details and chapter pages shaped like the upstream
+markup, plus synthetic JPEG pages and posters, so the scrapers and the API
+can be exercised (and load-tested) without sending a single request to the
+real site. Latency, server errors and 429 responses are injected at
+configurable rates to reproduce a slow or throttling upstream.
+
+Pages recorded from the real site can be served instead of the synthetic
+ones: a file at ``<recorded_dir>/<path>/index.html`` answers ``GET /<path>/``,
+with the upstream host rewritten to the fake one.
+
+Point the scrapers at it with ``MANGA_UPSTREAM_URL`` (or by setting
+``scraper.UPSTREAM_URL``), and run it standalone with ``manga upstream``.
+"""
+
+import logging
+import random
+import re
+import threading
+import time
+from collections import Counter
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import BytesIO
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+logger = logging.getLogger(__name__)
+
+RECORDED_HOST = "https://azoramoon.com"
+PER_PAGE = 12
+
+_SEARCH = re.compile(r"^/(?:page(\d+)/)?$")
+_LISTING = re.compile(r"^/series/page/(\d+)/$")
+_DETAILS = re.compile(r"^/series/([\w-]+)/$")
+_CHAPTER = re.compile(r"^/series/([\w-]+)/chapter-(\d+)/$")
+_IMAGE = re.compile(r"^/(?:images/[\w-]+/\d+/(\d+)|posters/[\w-]+)\.jpg$")
+
+@lru_cache(maxsize=8)
+def synthetic_jpeg(variant: int = 0, width: int = 720, height: int = 1040) -> bytes:
+    """
+    Build a JPEG page, cached so serving it costs no encoding.
+
+    Args:
+        variant (int): Variant number, changes the pixels
+        width (int): Width in pixels
+        height (int): Height in pixels
+
+    Returns:
+        bytes: JPEG content
+    """
+    from PIL import Image
+    noise = random.Random(variant).randbytes(width * height)
+    image = Image.frombytes("L", (width, height), noise).convert("RGB")
+    buf = BytesIO()
+    image.save(buf, "JPEG", quality=80)
+    return buf.getvalue()
+
+class FakeUpstream:
+    """
+    HTTP server imitating the upstream site.
+
+    Attributes:
+        series (int): Number of series in the catalog
+        chapters (int): Chapters per series
+        images (int): Images per chapter
+        latency (float): Base delay added to every response, in seconds
+        jitter (float): Maximum random delay added on top of latency
+        error_rate (float): Share of requests answered with 503
+        throttle_rate (float): Share of requests answered with 429
+        recorded_dir (Path | None): Directory of recorded pages
+        stats (Counter): Responses served per status code
+
+    Example:
+        >>> with FakeUpstream(latency=0.05, throttle_rate=0.01) as upstream:
+        ...     scraper.UPSTREAM_URL = upstream.url
+        ...     SearchResultsScraper("title").results
+    """
+
+    def __init__(self, series: int = 60, chapters: int = 40, images: int = 8, latency: float = 0.0,
+                 jitter: float = 0.0, error_rate: float = 0.0, throttle_rate: float = 0.0,
+                 recorded_dir: Optional[str] = None, seed: Optional[int] = None,
+                 host: str = "127.0.0.1", port: int = 0):
+        """
+        Initialize the server, it listens once start() is called.
+
+        Args:
+            series (int): Number of series in the catalog
+            chapters (int): Chapters per series
+            images (int): Images per chapter
+            latency (float): Base delay added to every response, in seconds
+            jitter (float): Maximum random delay added on top of latency
+            error_rate (float): Share of requests answered with 503
+            throttle_rate (float): Share of requests answered with 429
+            recorded_dir (str, optional): Directory of recorded pages
+            seed (int, optional): Seed of the fault and jitter generator
+            host (str): Interface to listen on
+            port (int): Port to listen on, 0 picks a free one
+        """
+        self.series = series
+        self.chapters = chapters
+        self.images = images
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.recorded_dir = Path(recorded_dir) if recorded_dir else None
+        self.stats: Counter = Counter()
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), _Handler)
+        self._server.daemon_threads = True
+        self._server.upstream = self
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        """Base URL of the server, without a trailing slash."""
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeUpstream":
+        """Serve requests in a background thread."""
+        self._thread = threading.Thread(target=self._server.serve_forever, name="fake-upstream", daemon=True)
+        self._thread.start()
+        logger.info("Fake upstream listening on %s", self.url)
+        return self
+
+    def stop(self) -> None:
+        """Stop serving and close the socket."""
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def __enter__(self) -> "FakeUpstream":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def fault(self) -> Tuple[float, Optional[int]]:
+        """
+        Draw the delay and the injected error of a request.
+
+        Returns:
+            Tuple[float, int | None]: Delay in seconds and status code to fail with, if any
+        """
+        with self._lock:
+            delay = self.latency + (self._random.uniform(0, self.jitter) if self.jitter else 0.0)
+            draw = self._random.random()
+        if draw < self.throttle_rate:
+            return delay, 429
+        if draw < self.throttle_rate + self.error_rate:
+            return delay, 503
+        return delay, None
+
+    def render(self, path: str, query: Dict[str, list]) -> Tuple[int, str, bytes]:
+        """
+        Build the response to a request.
+
+        Args:
+            path (str): Request path
+            query (Dict[str, list]): Parsed query string
+
+        Returns:
+            Tuple[int, str, bytes]: Status code, content type and body
+        """
+        recorded = self._recorded(path)
+        if recorded is not None:
+            return 200, "text/html; charset=utf-8", recorded
+        match = _IMAGE.match(path)
+        if match:
+            return 200, "image/jpeg", synthetic_jpeg(int(match.group(1) or 0) % 4)
+        if "s" in query and (match := _SEARCH.match(path)):
+            html = self._search_page(query["s"][0], int(match.group(1) or 1))
+        elif match := _LISTING.match(path):
+            html = self._listing_page(int(match.group(1)), query.get("m_orderby") == ["latest"])
+        elif (match := _CHAPTER.match(path)) and self._exists(match.group(1), int(match.group(2))):
+            html = self._chapter_page(match.group(1), int(match.group(2)))
+        elif (match := _DETAILS.match(path)) and self._exists(match.group(1)):
+            html = self._details_page(match.group(1))
+        else:
+            return 404, "text/html; charset=utf-8", b"<html><body><h1>Not Found</h1></body></html>"
+        return 200, "text/html; charset=utf-8", html.encode()
+
+    def _recorded(self, path: str) -> Optional[bytes]:
+        """Read a recorded page, with the upstream host rewritten."""
+        if self.recorded_dir is None:
+            return None
+        file = (self.recorded_dir / path.strip("/") / "index.html").resolve()
+        if not file.is_relative_to(self.recorded_dir.resolve()) or not file.is_file():
+            return None
+        return file.read_bytes().replace(RECORDED_HOST.encode(), self.url.encode())
+
+    def _exists(self, slug: str, chapter: int = 1) -> bool:
+        """Check that a series (and chapter) is part of the catalog."""
+        n = slug.removeprefix("title-")
+        return n.isdigit() and int(n) < self.series and 1 <= chapter <= self.chapters
+
+    def _series_url(self, n: int) -> str:
+        return f"{self.url}/series/title-{n}/"
+
+    def _search_page(self, search: str, page: int) -> str:
+        """Search results: every series whose title contains the query."""
+        matches = [n for n in range(self.series) if search.lower() in f"title {n}"]
+        cards = "".join(f'''
+        <div class="row c-tabs-item__content">
+          <div class="c-image-hover"><a href="{self._series_url(n)}" title="Title {n}">
+            <img src="{self.url}/posters/title-{n}.jpg"></a></div>
+          <div class="mg_genres"><div class="summary-content"><a>Action</a><a>Drama</a></div></div>
+          <div class="mg_status"><div class="summary-content">Ongoing</div></div>
+          <span class="total_votes">4.{n % 10}</span>
+          <div class="latest-chap"><a href="{self._series_url(n)}chapter-{self.chapters}/">Chapter {self.chapters}</a></div>
+        </div>''' for n in matches[(page - 1) * PER_PAGE:page * PER_PAGE])
+        heading = f"<h1>{len(matches)} results for \"{search}\"</h1>" if matches else ""
+        return f"<html><body>{heading}{cards}</body></html>"
+
+    def _listing_page(self, page: int, latest: bool) -> str:
+        """Series listing, twelve cards per page."""
+        order = list(range(self.series))[::-1] if latest else list(range(self.series))
+        cards = "".join(f'''
+        <div class="page-item-detail"><h3><a href="{self._series_url(n)}">Title {n}</a></h3>
+          <div class="meta-item rating"><span class="score">4.{n % 10}</span></div>
+          <span class="chapter"><a href="{self._series_url(n)}chapter-{self.chapters}/">Chapter {self.chapters}</a></span>
+          <span class="chapter"><a href="{self._series_url(n)}chapter-{self.chapters - 1}/">Chapter {self.chapters - 1}</a></span>
+        </div>''' for n in order[(page - 1) * PER_PAGE:page * PER_PAGE])
+        return f'<html><body><div class="h4">{self.series} results</div>{cards}</body></html>'
+
+    def _details_page(self, slug: str) -> str:
+        """Series details with every chapter, newest first."""
+        url = f"{self.url}/series/{slug}/"
+        items = "".join(
+            f'<li class="wp-manga-chapter"><a href="{url}chapter-{c}/">Chapter {c}</a></li>'
+            for c in range(self.chapters, 0, -1)
+        )
+        return (
+            f'<html><body><h1>Title {slug.removeprefix("title-")}</h1>'
+            f'<div class="summary_image"><a><img class="img-responsive" src="{self.url}/posters/{slug}.jpg"></a></div>'
+            f'<div class="manga-summary"><p>{"Lorem ipsum dolor sit amet. " * 20}</p></div>'
+            '<div class="genres-content"><a>Action</a><a>Drama</a></div>'
+            '<div class="summary-content"><div class="tags-content">Ongoing</div></div>'
+            '<span id="averagerate">4.5</span>'
+            f'<ul class="main version-chap">{items}</ul></body></html>'
+        )
+
+    def _chapter_page(self, slug: str, chapter: int) -> str:
+        """Chapter reader with its images in reading order."""
+        images = "".join(
+            f'<img class="wp-manga-chapter-img" src=" {self.url}/images/{slug}/{chapter}/{n}.jpg ">'
+            for n in range(self.images)
+        )
+        return f'<html><body><div class="reading-content">{images}</div></body></html>'
+
+class _Handler(BaseHTTPRequestHandler):
+    """Request handler delegating to the FakeUpstream of its server."""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self) -> None:
+        upstream: FakeUpstream = self.server.upstream
+        delay, error = upstream.fault()
+        if delay:
+            time.sleep(delay)
+        if error is not None:
+            status, content_type, body = error, "text/plain", b"injected failure"
+        else:
+            parts = urlsplit(self.path)
+            status, content_type, body = upstream.render(parts.path, parse_qs(parts.query))
+        with upstream._lock:
+            upstream.stats[status] += 1
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        if status == 429:
+            self.send_header("Retry-After", "1")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args) -> None:
+        logger.debug(format, *args)
@@ -0,0 +1,313 @@
+"""
+Size-bounded disk cache of chapter pages.
+
+Pages fetched for PDFs used to be discarded right after the conversion, and
+every later export or reader request fetched them from the upstream again.
+DiskImageCache keeps them on disk under a byte budget: an SQLite index next
+to the files tracks their size, hit count, last access and series, and the
+least recently (or least frequently) used pages are evicted once the budget
+is exceeded. Pages of pinned series, the ones explicitly archived, are never
+evicted.
+
+The index is shared by every process using the same directory, so the API,
+the CLI and the download workers of a cache node fill and serve one cache.
+"""
+
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Callable, List, NamedTuple, Optional, Tuple
+from urllib.parse import urlsplit
+
+logger = logging.getLogger(__name__)
+
+# Default location of the page cache
+IMAGE_CACHE_DIR = Path(__file__).parent / "cache" / "pages"
+
+# Eviction frees space down to this share of the budget, so it does not run on every write
+LOW_WATER = 0.9
+
+# Writes between two recounts of the cache size, which picks up the writes of other processes
+RECOUNT_WRITES = 256
+
+class CacheStats(NamedTuple):
+    """Usage of a disk image cache."""
+    entries: int
+    size: int
+    max_bytes: int
+    pinned_size: int
+    hits: int
+    misses: int
+    evictions: int
+
+class DiskImageCache:
+    """
+    Disk cache of images keyed by URL, with a byte budget.
+
+    Files live under ``root/<digest[:2]>/<digest><extension>``, indexed in
+    ``root/index.sqlite``. Hit and miss counters are kept per process.
+
+    Attributes:
+        root (Path): Root directory of the cache
+        max_bytes (int): Byte budget of the cached files
+        policy (str): ``lru`` evicts the least recently used pages first, ``lfu`` the least used
+        hits (int): Lookups served from disk
+        misses (int): Lookups not in the cache
+        evictions (int): Files evicted by this process
+
+    Example:
+        >>> cache = DiskImageCache(max_bytes=2 * 1024 ** 3)
+        >>> data, mime_type = cache.fetch(url, fetch_image, series=manga_id)
+        >>> cache.pin(manga_id)
+    """
+
+    POLICIES = ("lru", "lfu")
+
+    def __init__(self, root: Path = IMAGE_CACHE_DIR, max_bytes: int = 1024 ** 3, policy: str = "lru"):
+        """
+        Initialize the cache, creating its directory and index.
+
+        Args:
+            root (Path): Root directory of the cache
+            max_bytes (int): Byte budget of the cached files
+            policy (str): Eviction policy, ``lru`` or ``lfu``
+
+        Raises:
+            ValueError: If the policy is unknown
+        """
+        if policy not in self.POLICIES:
+            raise ValueError(f"Unknown eviction policy {policy!r}, expected one of: {', '.join(self.POLICIES)}")
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.policy = policy
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._used_bytes: Optional[int] = None
+        self._writes = 0
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.root / "index.sqlite", timeout=30, isolation_level=None,
+                                   check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("CREATE TABLE IF NOT EXISTS entry (url TEXT PRIMARY KEY, file TEXT NOT NULL, "
+                         "size INTEGER NOT NULL, mime_type TEXT, series TEXT, hits INTEGER NOT NULL DEFAULT 0, "
+                         "last_access REAL NOT NULL)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS entry_series ON entry (series)")
+        self._db.execute("CREATE TABLE IF NOT EXISTS pin (series TEXT PRIMARY KEY)")
+
+    @classmethod
+    def from_env(cls) -> Optional["DiskImageCache"]:
+        """
+        Build the cache configured by the environment.
+
+        MANGA_IMAGE_CACHE_BYTES sets the budget (default 1 GiB, 0 disables
+        the cache), MANGA_IMAGE_CACHE_DIR the directory and
+        MANGA_IMAGE_CACHE_POLICY the eviction policy.
+
+        Returns:
+            Optional[DiskImageCache]: The cache, or None when disabled
+        """
+        max_bytes = int(os.environ.get("MANGA_IMAGE_CACHE_BYTES", str(1024 ** 3)))
+        if max_bytes <= 0:
+            return None
+        return cls(Path(os.environ.get("MANGA_IMAGE_CACHE_DIR", IMAGE_CACHE_DIR)), max_bytes,
+                   os.environ.get("MANGA_IMAGE_CACHE_POLICY", "lru"))
+
+    def path(self, url: str) -> Path:
+        """
+        Get the file path of an image.
+
+        Args:
+            url (str): Image URL
+
+        Returns:
+            Path: Location of the cached file
+        """
+        digest = hashlib.sha256(url.encode()).hexdigest()
+        suffix = Path(urlsplit(url).path).suffix[:8] or ".img"
+        return self.root / digest[:2] / f"{digest}{suffix}"
+
+    def get(self, url: str) -> Optional[Tuple[Path, str]]:
+        """
+        Look up an image, counting the access.
+
+        Args:
+            url (str): Image URL
+
+        Returns:
+            Optional[Tuple[Path, str]]: The cached file and its MIME type, or None
+        """
+        with self._lock:
+            row = self._db.execute("SELECT file, mime_type FROM entry WHERE url = ?", (url,)).fetchone()
+            if row is not None and not (self.root / row[0]).exists():
+                self._db.execute("DELETE FROM entry WHERE url = ?", (url,))
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+            self._db.execute("UPDATE entry SET hits = hits + 1, last_access = ? WHERE url = ?", (time.time(), url))
+            self.hits += 1
+        return self.root / row[0], row[1]
+
+    def read(self, url: str) -> Optional[Tuple[bytes, str]]:
+        """
+        Read a cached image.
+
+        Args:
+            url (str): Image URL
+
+        Returns:
+            Optional[Tuple[bytes, str]]: Image content and MIME type, or None
+        """
+        cached = self.get(url)
+        if cached is None:
+            return None
+        try:
+            return cached[0].read_bytes(), cached[1]
+        except FileNotFoundError:
+            # Evicted by another process in between
+            return None
+
+    def put(self, url: str, data: bytes, mime_type: str, series: Optional[str] = None) -> Path:
+        """
+        Store an image atomically, then evict if the budget is exceeded.
+
+        Args:
+            url (str): Image URL
+            data (bytes): Image content
+            mime_type (str): MIME type of the image
+            series (str, optional): Manga id the image belongs to, used by pin()
+
+        Returns:
+            Path: Location of the cached file
+        """
+        path = self.path(url)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp.write_bytes(data)
+        tmp.replace(path)
+        with self._lock:
+            replaced = self._db.execute("SELECT size FROM entry WHERE url = ?", (url,)).fetchone()
+            self._db.execute(
+                "INSERT INTO entry (url, file, size, mime_type, series, last_access) VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (url) DO UPDATE SET size = excluded.size, mime_type = excluded.mime_type, "
+                "series = coalesce(excluded.series, entry.series), last_access = excluded.last_access",
+                (url, path.relative_to(self.root).as_posix(), len(data), mime_type, series, time.time()),
+            )
+            self._writes += 1
+            if self._used_bytes is None or self._writes % RECOUNT_WRITES == 0:
+                self._used_bytes = self._used()
+            else:
+                self._used_bytes += len(data) - (replaced[0] if replaced else 0)
+            over = self._used_bytes > self.max_bytes
+        if over:
+            self.evict()
+        return path
+
+    def fetch(self, url: str, fetcher: Callable[[str], Tuple[bytes, str]],
+              series: Optional[str] = None) -> Tuple[bytes, str]:
+        """
+        Read an image from the cache, or fetch and store it.
+
+        Args:
+            url (str): Image URL
+            fetcher (Callable): Downloads an image, returning its content and MIME type
+            series (str, optional): Manga id the image belongs to
+
+        Returns:
+            Tuple[bytes, str]: Image content and MIME type
+        """
+        cached = self.read(url)
+        if cached is not None:
+            return cached
+        data, mime_type = fetcher(url)
+        self.put(url, data, mime_type, series)
+        return data, mime_type
+
+    def __contains__(self, url: str) -> bool:
+        with self._lock:
+            return self._db.execute("SELECT 1 FROM entry WHERE url = ?", (url,)).fetchone() is not None
+
+    def pin(self, series: str) -> None:
+        """Never evict the images of a series."""
+        with self._lock:
+            self._db.execute("INSERT OR IGNORE INTO pin (series) VALUES (?)", (series,))
+
+    def unpin(self, series: str) -> None:
+        """Let the images of a series be evicted again."""
+        with self._lock:
+            self._db.execute("DELETE FROM pin WHERE series = ?", (series,))
+
+    def pinned(self) -> List[str]:
+        """Pinned series."""
+        with self._lock:
+            return [row[0] for row in self._db.execute("SELECT series FROM pin ORDER BY series")]
+
+    def evict(self, max_bytes: Optional[int] = None) -> int:
+        """
+        Remove unpinned images until the cache fits its budget.
+
+        Space is freed down to LOW_WATER of the budget, least recently used
+        (``lru``) or least used (``lfu``) images first.
+
+        Args:
+            max_bytes (int, optional): Budget to fit, defaults to max_bytes
+
+        Returns:
+            int: Bytes freed
+        """
+        budget = self.max_bytes if max_bytes is None else max_bytes
+        order = "last_access" if self.policy == "lru" else "hits, last_access"
+        freed = 0
+        with self._lock:
+            used = self._used_bytes = self._used()
+            if used <= budget:
+                return 0
+            target = int(budget * LOW_WATER)
+            rows = self._db.execute(
+                f"SELECT url, file, size FROM entry WHERE series IS NULL OR series NOT IN (SELECT series FROM pin) "
+                f"ORDER BY {order}").fetchall()
+            victims = []
+            for url, file, size in rows:
+                if used - freed <= target:
+                    break
+                victims.append((url,))
+                freed += size
+                (self.root / file).unlink(missing_ok=True)
+            self._db.executemany("DELETE FROM entry WHERE url = ?", victims)
+            self.evictions += len(victims)
+            self._used_bytes = used - freed
+        if victims:
+            logger.info("Evicted %d cached images (%d bytes)", len(victims), freed)
+        return freed
+
+    def clear(self) -> None:
+        """Remove every unpinned image."""
+        self.evict(0)
+
+    def stats(self) -> CacheStats:
+        """
+        Get the usage of the cache.
+
+        Returns:
+            CacheStats: Entries and bytes on disk, pinned bytes, and this process's counters
+        """
+        with self._lock:
+            entries, size = self._db.execute("SELECT count(*), coalesce(sum(size), 0) FROM entry").fetchone()
+            pinned, = self._db.execute("SELECT coalesce(sum(size), 0) FROM entry "
+                                       "WHERE series IN (SELECT series FROM pin)").fetchone()
+        return CacheStats(entries, size, self.max_bytes, pinned, self.hits, self.misses, self.evictions)
+
+    def _used(self) -> int:
+        """Bytes of the cached files, the lock must be held."""
+        return self._db.execute("SELECT coalesce(sum(size), 0) FROM entry").fetchone()[0]
+
+    def close(self) -> None:
+        """Close the index."""
+        with self._lock:
+            self._db.close()
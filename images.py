@@ -0,0 +1,253 @@
+"""
+Derived image variants for chapter pages.
+
+Pages are often multi-megabyte PNG/JPEG long strips. This module produces
+thumbnails and size-bounded WebP/AVIF transcodes with Pillow, stores them on
+disk next to each other and picks the variant a client asked for through a
+query parameter or its Accept header.
+
+Variants are generated on ingestion by the download workers, and on demand
+by the API through a process pool when a variant is still missing.
+"""
+
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+from pathlib import Path
+from typing import Dict, NamedTuple, Optional
+
+from PIL import Image, features
+
+logger = logging.getLogger(__name__)
+
+# Default location of the derived image cache
+DERIVED_DIR = Path(__file__).parent / "cache" / "images"
+
+# Largest dimension accepted by the WebP encoder
+WEBP_MAX_DIMENSION = 16383
+
+class VariantSpec(NamedTuple):
+    """Encoding parameters of a derived image variant."""
+    max_width: int
+    format: str
+    quality: int
+    media_type: str
+    extension: str
+
+VARIANTS: Dict[str, VariantSpec] = {
+    "thumb": VariantSpec(240, "WEBP", 60, "image/webp", "webp"),
+    "webp": VariantSpec(1080, "WEBP", 80, "image/webp", "webp"),
+}
+if features.check("avif"):
+    VARIANTS["avif"] = VariantSpec(1080, "AVIF", 60, "image/avif", "avif")
+
+ORIGINAL = "original"
+
+def derive(data: bytes, variant: str) -> bytes:
+    """
+    Encode an image as one of the derived variants.
+
+    The image is scaled down to the variant width (never up) and, for long
+    strips, further down so it fits the encoder's maximum dimension.
+
+    Args:
+        data (bytes): Original image content
+        variant (str): Name of the variant in VARIANTS
+
+    Returns:
+        bytes: Encoded variant
+    """
+    spec = VARIANTS[variant]
+    with Image.open(BytesIO(data)) as image:
+        image.load()
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA" if "transparency" in image.info else "RGB")
+        width, height = image.size
+        scale = min(1.0, spec.max_width / width, WEBP_MAX_DIMENSION / height)
+        if scale < 1.0:
+            image = image.resize((max(1, round(width * scale)), max(1, round(height * scale))),
+                                 Image.Resampling.LANCZOS)
+        out = BytesIO()
+        image.save(out, format=spec.format, quality=spec.quality)
+    return out.getvalue()
+
+def choose_variant(requested: Optional[str], accept: Optional[str]) -> Optional[str]:
+    """
+    Pick the variant to serve for a request.
+
+    An explicit variant always wins. Otherwise the most compact format the
+    client accepts is used, and None means the original image.
+
+    Args:
+        requested (str, optional): Variant from the query string
+        accept (str, optional): Accept header of the request
+
+    Returns:
+        Optional[str]: Variant name, or None for the original
+
+    Raises:
+        KeyError: If the requested variant is unknown
+    """
+    if requested:
+        if requested == ORIGINAL:
+            return None
+        if requested not in VARIANTS:
+            raise KeyError(requested)
+        return requested
+    accept = accept or ""
+    if "avif" in VARIANTS and "image/avif" in accept:
+        return "avif"
+    if "image/webp" in accept:
+        return "webp"
+    return None
+
+class DerivativeStore:
+    """
+    On-disk store of derived image variants.
+
+    Files live under ``root/<chapter_id>/<order_no>.<variant>.<extension>``.
+
+    Attributes:
+        root (Path): Root directory of the store
+
+    Example:
+        >>> store = DerivativeStore()
+        >>> store.derive_all(chapter_id, 0, data)
+        >>> store.path(chapter_id, 0, "thumb").exists()
+        True
+    """
+
+    def __init__(self, root: Path = DERIVED_DIR):
+        """
+        Initialize the store.
+
+        Args:
+            root (Path): Root directory of the store
+        """
+        self.root = Path(root)
+
+    def path(self, chapter_id: str, order_no: int, variant: str) -> Path:
+        """
+        Get the file path of a variant.
+
+        Args:
+            chapter_id (str): Chapter id
+            order_no (int): Image number
+            variant (str): Variant name
+
+        Returns:
+            Path: Location of the variant file
+        """
+        return self.root / chapter_id / f"{order_no}.{variant}.{VARIANTS[variant].extension}"
+
+    def get(self, chapter_id: str, order_no: int, variant: str) -> Optional[Path]:
+        """
+        Get a stored variant.
+
+        Args:
+            chapter_id (str): Chapter id
+            order_no (int): Image number
+            variant (str): Variant name
+
+        Returns:
+            Optional[Path]: The variant file, or None if not generated yet
+        """
+        path = self.path(chapter_id, order_no, variant)
+        return path if path.exists() else None
+
+    def put(self, chapter_id: str, order_no: int, variant: str, data: bytes) -> Path:
+        """
+        Store a variant atomically.
+
+        Args:
+            chapter_id (str): Chapter id
+            order_no (int): Image number
+            variant (str): Variant name
+            data (bytes): Encoded variant
+
+        Returns:
+            Path: Location of the stored file
+        """
+        path = self.path(chapter_id, order_no, variant)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(path.suffix + ".tmp")
+        tmp.write_bytes(data)
+        tmp.replace(path)
+        return path
+
+    def derive_all(self, chapter_id: str, order_no: int, data: bytes) -> None:
+        """
+        Generate every missing variant of an image in the current process.
+
+        Args:
+            chapter_id (str): Chapter id
+            order_no (int): Image number
+            data (bytes): Original image content
+        """
+        for variant in VARIANTS:
+            if self.get(chapter_id, order_no, variant) is None:
+                try:
+                    self.put(chapter_id, order_no, variant, derive(data, variant))
+                except Exception:
+                    logger.exception("Failed to derive %s of image %s/%s", variant, chapter_id, order_no)
+
+class ImagePipeline:
+    """
+    Generate image variants on a process pool.
+
+    Attributes:
+        store (DerivativeStore): Store receiving the variants
+
+    Example:
+        >>> pipeline = ImagePipeline(DerivativeStore(), max_workers=2)
+        >>> path = pipeline.render(chapter_id, 0, "webp", data)
+    """
+
+    def __init__(self, store: DerivativeStore, max_workers: Optional[int] = None):
+        """
+        Initialize the pipeline.
+
+        Args:
+            store (DerivativeStore): Store receiving the variants
+            max_workers (int, optional): Size of the process pool
+        """
+        self.store = store
+        self.max_workers = max_workers
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        """
+        Get the process pool, starting it on first use.
+
+        Returns:
+            ProcessPoolExecutor: The process pool
+        """
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._executor
+
+    def render(self, chapter_id: str, order_no: int, variant: str, data: bytes) -> Path:
+        """
+        Get a variant, encoding it on the process pool if missing.
+
+        Args:
+            chapter_id (str): Chapter id
+            order_no (int): Image number
+            variant (str): Variant name
+            data (bytes): Original image content
+
+        Returns:
+            Path: Location of the variant file
+        """
+        path = self.store.get(chapter_id, order_no, variant)
+        if path is None:
+            encoded = self.executor.submit(derive, data, variant).result()
+            path = self.store.put(chapter_id, order_no, variant, encoded)
+        return path
+
+    def shutdown(self) -> None:
+        """Stop the process pool, cancelling the derivations not started yet."""
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
@@ -0,0 +1,72 @@
+"""
+Integrity checks for downloaded chapter images.
+
+A truncated or corrupt page used to surface only when img2pdf choked on
+it, after the whole chapter had been downloaded. Pages are now checked as
+soon as they arrive: the transferred size against Content-Length, an
+optional SHA-256 digest, and a full decode with Pillow.
+"""
+
+import hashlib
+from io import BytesIO
+from pathlib import Path
+from typing import BinaryIO, Optional
+
+class ImageIntegrityError(ValueError):
+    """A downloaded image is corrupt, not an image or does not match its checksum."""
+
+class IncompleteDownloadError(ImageIntegrityError):
+    """A transfer ended before the announced length, the partial data can be resumed."""
+
+def sha256_of(source: Path | bytes) -> str:
+    """
+    Compute the SHA-256 digest of a file or a byte string.
+
+    Args:
+        source (Path | bytes): File path or content
+
+    Returns:
+        str: Hexadecimal digest
+    """
+    if isinstance(source, bytes):
+        return hashlib.sha256(source).hexdigest()
+    digest = hashlib.sha256()
+    with open(source, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def _decode(f: BinaryIO) -> None:
+    """Fully decode an image, raising ImageIntegrityError when it cannot be."""
+    from PIL import Image, UnidentifiedImageError
+    try:
+        with Image.open(f) as image:
+            image.load()
+    except (UnidentifiedImageError, OSError, SyntaxError, ValueError) as e:
+        raise ImageIntegrityError(f"Image cannot be decoded: {e}") from e
+
+def check_image(source: Path | bytes, expected_size: Optional[int] = None, sha256: Optional[str] = None) -> None:
+    """
+    Verify a downloaded image.
+
+    Args:
+        source (Path | bytes): File path or content of the image
+        expected_size (int, optional): Size announced by the server
+        sha256 (str, optional): Expected SHA-256 digest
+
+    Raises:
+        IncompleteDownloadError: If the image is shorter than expected_size
+        ImageIntegrityError: If the size or digest do not match, or the image does not decode
+    """
+    size = len(source) if isinstance(source, bytes) else Path(source).stat().st_size
+    if expected_size is not None and size != expected_size:
+        if size < expected_size:
+            raise IncompleteDownloadError(f"Received {size} of {expected_size} bytes")
+        raise ImageIntegrityError(f"Received {size} bytes, expected {expected_size}")
+    if sha256 is not None and sha256_of(source) != sha256.lower():
+        raise ImageIntegrityError("Checksum mismatch")
+    if isinstance(source, bytes):
+        _decode(BytesIO(source))
+    else:
+        with open(source, "rb") as f:
+            _decode(f)
@@ -0,0 +1,473 @@
+"""
+Persistent chapter download queue and worker pool.
+
+Download jobs are stored in the database so they survive API restarts.
+Workers run in separate processes, claim jobs by priority, report progress
+as images land, retry failures with exponential backoff and stop early when
+a job is cancelled.
+
+Run a worker pool with:
+    python jobs.py --workers 4
+"""
+
+import argparse
+import logging
+import multiprocessing
+import os
+import socket
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import select, update, func, or_, and_
+from sqlalchemy.orm import sessionmaker
+
+from database import create_session_factory, init_db
+from db_models import DownloadJobDB
+from images import DerivativeStore
+from integrity import check_image
+from logging_config import setup_logging
+from repository import MangaRepository
+
+logger = logging.getLogger(__name__)
+
+# Job states
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+ACTIVE_STATES = (QUEUED, RUNNING)
+
+# Reader-requested chapters are served before read-ahead and bulk archive downloads
+PRIORITY_READER = 10
+PRIORITY_PREFETCH = 5
+PRIORITY_ARCHIVE = 0
+
+class JobCancelled(Exception):
+    """Raised inside a worker when its job has been cancelled or claimed by another worker."""
+
+class JobQueue:
+    """
+    Database-backed queue of chapter download jobs.
+
+    Jobs are claimed with an optimistic compare-and-set update, so any number
+    of worker processes can share the same queue. A running job whose worker
+    stops sending heartbeats for LEASE_SECONDS is handed to another worker.
+
+    Attributes:
+        LEASE_SECONDS (int): Heartbeat timeout before a running job is reclaimed
+        RETRY_BACKOFF (float): Base delay in seconds before retrying a failed job
+        MAX_BACKOFF (float): Upper bound of the retry delay
+        session_factory (sessionmaker): Factory used to open sessions
+
+    Example:
+        >>> queue = JobQueue()
+        >>> job_id = queue.enqueue(chapter_id, priority=PRIORITY_READER)
+        >>> queue.get(job_id).status
+        'queued'
+    """
+
+    LEASE_SECONDS = 300
+    RETRY_BACKOFF = 30.0
+    MAX_BACKOFF = 900.0
+
+    def __init__(self, database_url: Optional[str] = None, session_factory: Optional[sessionmaker] = None):
+        """
+        Initialize the queue.
+
+        Args:
+            database_url (str, optional): Database URL, defaults to the shared engine
+            session_factory (sessionmaker, optional): Explicit session factory to use
+        """
+        self.session_factory = session_factory or create_session_factory(database_url)
+
+    def enqueue(self, chapter_id: str, priority: int = PRIORITY_ARCHIVE, max_attempts: int = 5) -> str:
+        """
+        Queue a chapter download.
+
+        If the chapter already has an active job, that job is reused and its
+        priority raised when the new request is more urgent.
+
+        Args:
+            chapter_id (str): Chapter to download
+            priority (int): Higher values are claimed first
+            max_attempts (int): Attempts before the job is marked failed
+
+        Returns:
+            str: Id of the queued job
+        """
+        with self.session_factory() as session:
+            job = session.scalars(select(DownloadJobDB).where(
+                DownloadJobDB.chapter_id == chapter_id, DownloadJobDB.status.in_(ACTIVE_STATES)
+            )).first()
+            if job is None:
+                job = DownloadJobDB(chapter_id=chapter_id, priority=priority, max_attempts=max_attempts,
+                                    status=QUEUED, available_at=datetime.utcnow())
+                session.add(job)
+            elif priority > job.priority:
+                job.priority = priority
+            session.commit()
+            logger.debug("Queued download job %s for chapter %s", job.id, chapter_id)
+            return job.id
+
+    def claim(self, worker: str) -> Optional[DownloadJobDB]:
+        """
+        Claim the most urgent available job.
+
+        Args:
+            worker (str): Name of the claiming worker
+
+        Returns:
+            Optional[DownloadJobDB]: The claimed job, or None when the queue is empty
+        """
+        with self.session_factory() as session:
+            while True:
+                now = datetime.utcnow()
+                lease_expired = now - timedelta(seconds=self.LEASE_SECONDS)
+                candidate = session.execute(
+                    select(DownloadJobDB.id, DownloadJobDB.updated_at)
+                    .where(or_(
+                        and_(DownloadJobDB.status == QUEUED, DownloadJobDB.available_at <= now),
+                        and_(DownloadJobDB.status == RUNNING, DownloadJobDB.updated_at < lease_expired),
+                    ))
+                    .order_by(DownloadJobDB.priority.desc(), DownloadJobDB.created_at)
+                    .limit(1)
+                ).first()
+                if candidate is None:
+                    return None
+                result = session.execute(
+                    update(DownloadJobDB)
+                    .where(DownloadJobDB.id == candidate.id, DownloadJobDB.updated_at == candidate.updated_at)
+                    .values(status=RUNNING, worker=worker, attempts=DownloadJobDB.attempts + 1, updated_at=now)
+                    .execution_options(synchronize_session=False)
+                )
+                session.commit()
+                if result.rowcount == 1:
+                    return session.get(DownloadJobDB, candidate.id)
+
+    def heartbeat(self, job_id: str, worker: str, progress: float) -> bool:
+        """
+        Record job progress and extend its lease.
+
+        Args:
+            job_id (str): Running job
+            worker (str): Name of the worker that claimed the job
+            progress (float): Completion percentage
+
+        Returns:
+            bool: False if the job has been cancelled, or re-claimed by another
+            worker after the lease expired, and the worker should stop
+        """
+        with self.session_factory() as session:
+            result = session.execute(
+                update(DownloadJobDB)
+                .where(DownloadJobDB.id == job_id, DownloadJobDB.status == RUNNING,
+                       DownloadJobDB.worker == worker)
+                .values(progress=progress, updated_at=datetime.utcnow())
+                .execution_options(synchronize_session=False)
+            )
+            session.commit()
+            return result.rowcount == 1
+
+    def complete(self, job_id: str, worker: str) -> bool:
+        """
+        Mark a job as done.
+
+        Args:
+            job_id (str): Finished job
+            worker (str): Name of the worker that claimed the job
+
+        Returns:
+            bool: False if the job was cancelled, or re-claimed by another
+            worker after the lease expired, and is left as it is
+        """
+        now = datetime.utcnow()
+        return self._transition(job_id, worker, status=DONE, progress=100.0, error=None,
+                                finished_at=now, updated_at=now) == 1
+
+    def fail(self, job_id: str, worker: str, error: str) -> str:
+        """
+        Record a failed attempt and schedule a retry with exponential backoff.
+
+        A worker whose job was re-claimed by another worker after the lease
+        expired leaves the job untouched.
+
+        Args:
+            job_id (str): Failed job
+            worker (str): Name of the worker that claimed the job
+            error (str): Error description
+
+        Returns:
+            str: The new job status, QUEUED when it will be retried or FAILED,
+            or the current status when the job is no longer held by the worker
+        """
+        with self.session_factory() as session:
+            job = session.get(DownloadJobDB, job_id)
+            if job is None or job.status != RUNNING or job.worker != worker:
+                return job.status if job else FAILED
+            now = datetime.utcnow()
+            if job.attempts >= job.max_attempts:
+                values = {"status": FAILED, "finished_at": now}
+            else:
+                delay = min(self.RETRY_BACKOFF * 2 ** (job.attempts - 1), self.MAX_BACKOFF)
+                values = {"status": QUEUED, "available_at": now + timedelta(seconds=delay)}
+            result = session.execute(
+                update(DownloadJobDB)
+                .where(DownloadJobDB.id == job_id, DownloadJobDB.status == RUNNING,
+                       DownloadJobDB.worker == worker)
+                .values(error=error, updated_at=now, **values)
+                .execution_options(synchronize_session=False)
+            )
+            session.commit()
+            if result.rowcount == 1:
+                return values["status"]
+            return session.scalar(select(DownloadJobDB.status).where(DownloadJobDB.id == job_id))
+
+    def cancel(self, job_id: str) -> bool:
+        """
+        Cancel a queued or running job.
+
+        A running worker notices the cancellation at its next heartbeat.
+
+        Args:
+            job_id (str): Job to cancel
+
+        Returns:
+            bool: True if the job was still active
+        """
+        now = datetime.utcnow()
+        return self._transition(job_id, status=CANCELLED, finished_at=now, updated_at=now) == 1
+
+    def _transition(self, job_id: str, worker: Optional[str] = None, **values) -> int:
+        """
+        Update an active job.
+
+        Args:
+            job_id (str): Job to update
+            worker (str, optional): Only update the job while this worker runs it
+            **values: Column values to set
+
+        Returns:
+            int: Number of updated rows
+        """
+        condition = (DownloadJobDB.status.in_(ACTIVE_STATES) if worker is None
+                     else and_(DownloadJobDB.status == RUNNING, DownloadJobDB.worker == worker))
+        with self.session_factory() as session:
+            result = session.execute(
+                update(DownloadJobDB)
+                .where(DownloadJobDB.id == job_id, condition)
+                .values(**values)
+                .execution_options(synchronize_session=False)
+            )
+            session.commit()
+            return result.rowcount
+
+    def get(self, job_id: str) -> Optional[DownloadJobDB]:
+        """
+        Load a job by id.
+
+        Args:
+            job_id (str): Job id
+
+        Returns:
+            Optional[DownloadJobDB]: The detached job row, or None
+        """
+        with self.session_factory() as session:
+            return session.get(DownloadJobDB, job_id)
+
+    def latest_for_chapter(self, chapter_id: str) -> Optional[DownloadJobDB]:
+        """
+        Load the most recent job of a chapter.
+
+        Args:
+            chapter_id (str): Chapter id
+
+        Returns:
+            Optional[DownloadJobDB]: The detached job row, or None
+        """
+        with self.session_factory() as session:
+            return session.scalars(
+                select(DownloadJobDB).where(DownloadJobDB.chapter_id == chapter_id)
+                .order_by(DownloadJobDB.created_at.desc()).limit(1)
+            ).first()
+
+    def depth(self) -> Dict[str, int]:
+        """
+        Count jobs per status.
+
+        Returns:
+            Dict[str, int]: Mapping of status to number of jobs
+        """
+        with self.session_factory() as session:
+            return dict(session.execute(
+                select(DownloadJobDB.status, func.count()).group_by(DownloadJobDB.status)
+            ).tuples().all())
+
+def fetch_image(url: str, timeout: float = 15.0) -> Tuple[bytes, str]:
+    """
+    Download and verify an image through the shared scraper session.
+
+    Args:
+        url (str): Image URL
+        timeout (float): Request timeout in seconds
+
+    Returns:
+        Tuple[bytes, str]: Image content and MIME type
+
+    Raises:
+        requests.RequestException: If the download fails
+        ImageIntegrityError: If the image is truncated or does not decode
+    """
+    from scraper import get_response
+    resp = get_response(url, timeout=timeout)
+    length = resp.headers.get("content-length", "")
+    expected = int(length) if length.isdigit() and not resp.headers.get("content-encoding") else None
+    check_image(resp.content, expected_size=expected)
+    return resp.content, resp.headers.get("content-type", "image/jpeg")
+
+def process_job(job: DownloadJobDB, queue: JobQueue, repository: MangaRepository,
+                store: Optional[DerivativeStore] = None) -> None:
+    """
+    Download the pending images of a job's chapter.
+
+    Every image is stored as soon as it arrives, so a retried job only
+    fetches the images that are still missing. When a store is given, the
+    thumbnail and transcoded variants are derived right after ingestion.
+
+    Args:
+        job (DownloadJobDB): Claimed job
+        queue (JobQueue): Queue the job belongs to
+        repository (MangaRepository): Repository storing the images
+        store (DerivativeStore, optional): Store receiving derived variants
+
+    Raises:
+        JobCancelled: If the job is cancelled, or claimed by another worker, while running
+    """
+    total, downloaded = repository.chapter_status(job.chapter_id)
+    for order_no, url in repository.pending_images(job.chapter_id):
+        data, mime_type = fetch_image(url)
+        repository.mark_images_downloaded(job.chapter_id, [(order_no, data, mime_type, None)])
+        if store is not None:
+            store.derive_all(job.chapter_id, order_no, data)
+        downloaded += 1
+        if not queue.heartbeat(job.id, job.worker, downloaded / total * 100 if total else 100.0):
+            raise JobCancelled(job.id)
+    if not queue.complete(job.id, job.worker):
+        raise JobCancelled(job.id)
+
+def worker_loop(database_url: Optional[str] = None, poll_interval: float = 1.0,
+                stop_event=None, worker_name: Optional[str] = None) -> None:
+    """
+    Claim and process jobs until stopped.
+
+    Args:
+        database_url (str, optional): Database URL shared with the API
+        poll_interval (float): Seconds to sleep when the queue is empty
+        stop_event (multiprocessing.Event, optional): Set to stop the loop
+        worker_name (str, optional): Name recorded on claimed jobs
+    """
+    worker_name = worker_name or f"{socket.gethostname()}:{os.getpid()}"
+    queue = JobQueue(database_url)
+    repository = MangaRepository(session_factory=queue.session_factory)
+    store = DerivativeStore()
+    logger.info("Download worker %s started", worker_name, extra={"worker": worker_name})
+    while stop_event is None or not stop_event.is_set():
+        job = queue.claim(worker_name)
+        if job is None:
+            time.sleep(poll_interval)
+            continue
+        try:
+            process_job(job, queue, repository, store)
+            logger.info("Job %s done for chapter %s", job.id, job.chapter_id,
+                        extra={"worker": worker_name, "job_id": job.id, "chapter_id": job.chapter_id})
+        except JobCancelled:
+            logger.info("Job %s cancelled or taken over by another worker", job.id,
+                        extra={"worker": worker_name, "job_id": job.id})
+        except Exception as e:
+            status = queue.fail(job.id, job.worker, str(e))
+            logger.warning("Job %s attempt %d failed (%s): %s", job.id, job.attempts, status, e,
+                           extra={"worker": worker_name, "job_id": job.id, "chapter_id": job.chapter_id})
+    logger.info("Download worker %s stopped", worker_name, extra={"worker": worker_name})
+
+def _worker_process(database_url: Optional[str], poll_interval: float, stop_event, worker_name: str) -> None:
+    """
+    Entry point of a worker process.
+
+    Logging is configured again in the child, the queue listener of the
+    parent does not exist after the fork.
+    """
+    setup_logging()
+    worker_loop(database_url, poll_interval, stop_event, worker_name)
+
+class WorkerPool:
+    """
+    Pool of download worker processes.
+
+    Attributes:
+        processes (int): Number of worker processes
+        database_url (str): Database URL passed to each worker
+        poll_interval (float): Idle polling interval of each worker
+
+    Example:
+        >>> pool = WorkerPool(processes=4)
+        >>> pool.start()
+        >>> pool.join()
+    """
+
+    def __init__(self, processes: int = 2, database_url: Optional[str] = None, poll_interval: float = 1.0):
+        """
+        Initialize the pool.
+
+        Args:
+            processes (int): Number of worker processes
+            database_url (str, optional): Database URL passed to each worker
+            poll_interval (float): Idle polling interval of each worker
+        """
+        self.processes = processes
+        self.database_url = database_url
+        self.poll_interval = poll_interval
+        self._stop = multiprocessing.Event()
+        self._workers: list[multiprocessing.Process] = []
+
+    def start(self) -> None:
+        """Start the worker processes."""
+        for n in range(self.processes):
+            worker = multiprocessing.Process(
+                target=_worker_process,
+                args=(self.database_url, self.poll_interval, self._stop, f"{socket.gethostname()}:worker-{n}"),
+                daemon=True,
+            )
+            worker.start()
+            self._workers.append(worker)
+
+    def stop(self) -> None:
+        """Ask the workers to stop after their current job and wait for them."""
+        self._stop.set()
+        self.join()
+
+    def join(self) -> None:
+        """Wait for all worker processes to exit."""
+        for worker in self._workers:
+            worker.join()
+
+def main():
+    """Run a download worker pool until interrupted."""
+    parser = argparse.ArgumentParser(description="Run chapter download workers")
+    parser.add_argument("--workers", type=int, default=2, help="number of worker processes")
+    parser.add_argument("--db-url", default=None, help="database URL shared with the API")
+    parser.add_argument("--poll-interval", type=float, default=1.0, help="idle polling interval in seconds")
+    args = parser.parse_args()
+
+    setup_logging()
+    if args.db_url is None:
+        init_db()
+    pool = WorkerPool(processes=args.workers, database_url=args.db_url, poll_interval=args.poll_interval)
+    pool.start()
+    try:
+        pool.join()
+    except KeyboardInterrupt:
+        pool.stop()
+
+if __name__ == "__main__":
+    main()
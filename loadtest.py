@@ -0,0 +1,176 @@
+"""
+Load-test harness for the API.
+
+Drives API endpoints at a fixed concurrency and reports throughput, latency
+percentiles and status codes. Without an API URL, a fake upstream (see
+fake_upstream) and the API are started in this process, so worker counts
+and performance changes can be sized entirely offline:
+
+    manga loadtest --concurrency 16 --requests 1000 --upstream-latency 0.2
+    manga loadtest --api-url http://127.0.0.1:8000 --duration 60
+"""
+
+import itertools
+import logging
+import random
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+from urllib.parse import quote
+
+import requests
+
+from tracing import percentile
+
+logger = logging.getLogger(__name__)
+
+# Relative weights of the endpoints in the default scenario
+SCENARIO: Tuple[Tuple[int, str], ...] = (
+    (3, "/results?search=title+{n}"),
+    (4, "/manga?url={series}"),
+    (3, "/chapter/images?url={chapter}"),
+)
+
+class LoadReport(NamedTuple):
+    """Outcome of a load test."""
+    requests: int
+    errors: int
+    seconds: float
+    throughput: float
+    p50: float
+    p95: float
+    p99: float
+    statuses: Dict[str, int]
+
+    def format(self) -> str:
+        """Summary line, latencies in milliseconds."""
+        statuses = " ".join(f"{status}={count}" for status, count in sorted(self.statuses.items()))
+        return (f"requests={self.requests} errors={self.errors} time={self.seconds:.2f}s "
+                f"throughput={self.throughput:.1f}/s p50={self.p50 * 1000:.1f}ms "
+                f"p95={self.p95 * 1000:.1f}ms p99={self.p99 * 1000:.1f}ms {statuses}")
+
+def scenario_paths(upstream_url: str, series: int = 60, chapters: int = 40, count: int = 200,
+                   seed: int = 0) -> List[str]:
+    """
+    Build request paths of the default scenario against a fake upstream catalog.
+
+    Args:
+        upstream_url (str): Base URL of the fake upstream
+        series (int): Number of series of the catalog
+        chapters (int): Chapters per series
+        count (int): Number of paths
+        seed (int): Seed of the path generator
+
+    Returns:
+        List[str]: Paths, replayed in a loop by run()
+    """
+    rng = random.Random(seed)
+    templates = [template for weight, template in SCENARIO for _ in range(weight)]
+    paths = []
+    for _ in range(count):
+        n = rng.randrange(series)
+        series_url = f"{upstream_url}/series/title-{n}/"
+        paths.append(rng.choice(templates).format(
+            n=n, series=quote(series_url, safe=""),
+            chapter=quote(f"{series_url}chapter-{rng.randint(1, chapters)}/", safe="")))
+    return paths
+
+def run(base_url: str, paths: Sequence[str], concurrency: int = 8, requests_count: Optional[int] = None,
+        duration: Optional[float] = None, timeout: float = 30.0) -> LoadReport:
+    """
+    Send GET requests at a fixed concurrency and measure their latency.
+
+    Each of the ``concurrency`` clients sends its next request as soon as
+    the previous one completes (closed loop), cycling through ``paths``.
+
+    Args:
+        base_url (str): Base URL of the API
+        paths (Sequence[str]): Request paths, cycled through
+        concurrency (int): Concurrent clients
+        requests_count (int, optional): Total requests, defaults to one pass over paths
+        duration (float, optional): Stop after this many seconds instead
+        timeout (float): Per-request timeout in seconds
+
+    Returns:
+        LoadReport: Throughput, latency percentiles and status codes
+    """
+    base_url = base_url.rstrip("/")
+    if requests_count is None and duration is None:
+        requests_count = len(paths)
+    ticket = itertools.count()
+    lock = threading.Lock()
+    latencies: List[float] = []
+    statuses: Counter = Counter()
+    deadline = time.perf_counter() + duration if duration else None
+
+    def client() -> None:
+        with requests.Session() as session:
+            while True:
+                n = next(ticket)
+                if (requests_count is not None and n >= requests_count) or \
+                        (deadline is not None and time.perf_counter() >= deadline):
+                    return
+                start = time.perf_counter()
+                try:
+                    status = str(session.get(base_url + paths[n % len(paths)], timeout=timeout).status_code)
+                except requests.RequestException as e:
+                    status = type(e).__name__
+                elapsed = time.perf_counter() - start
+                with lock:
+                    latencies.append(elapsed)
+                    statuses[status] += 1
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="load") as ex:
+        for fut in [ex.submit(client) for _ in range(concurrency)]:
+            fut.result()
+    seconds = time.perf_counter() - start
+    latencies.sort()
+    errors = sum(count for status, count in statuses.items() if not status.startswith(("2", "3")))
+    return LoadReport(
+        requests=len(latencies),
+        errors=errors,
+        seconds=seconds,
+        throughput=len(latencies) / seconds if seconds else 0.0,
+        p50=percentile(latencies, 50),
+        p95=percentile(latencies, 95),
+        p99=percentile(latencies, 99),
+        statuses=dict(statuses),
+    )
+
+@contextmanager
+def serve_api(upstream_url: str, host: str = "127.0.0.1", port: int = 0) -> Iterator[str]:
+    """
+    Run the API in a background thread of this process, scraping a stand-in upstream.
+
+    Args:
+        upstream_url (str): Base URL the scrapers fetch from
+        host (str): Interface to listen on
+        port (int): Port to listen on, 0 picks a free one
+
+    Yields:
+        str: Base URL of the API
+    """
+    import socket
+    import uvicorn
+    import api
+    import scraper
+    scraper.UPSTREAM_URL = upstream_url
+    sock = socket.socket()
+    sock.bind((host, port))
+    server = uvicorn.Server(uvicorn.Config(api.app, log_level="warning"))
+    thread = threading.Thread(target=server.run, kwargs={"sockets": [sock]}, name="api", daemon=True)
+    thread.start()
+    while not server.started:
+        if not thread.is_alive():
+            raise RuntimeError("API server failed to start")
+        time.sleep(0.05)
+    try:
+        yield f"http://{host}:{sock.getsockname()[1]}"
+    finally:
+        server.should_exit = True
+        thread.join(timeout=10)
+        sock.close()
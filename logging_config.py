@@ -0,0 +1,122 @@
+"""
+Logging configuration for the entry points.
+
+Importing library modules never configures logging. Entry points (the API,
+the crawler, the download workers) call ``setup_logging()`` once. Records
+are put on an in-memory queue by the calling thread and written by a single
+background listener, so request and crawler threads never block on disk or
+console I/O.
+
+Settings can be passed explicitly or through environment variables:
+    MANGA_LOG_LEVEL    root level (default INFO)
+    MANGA_LOG_FORMAT   "json" or "text" (default json)
+    MANGA_LOG_FILE     optional log file, in addition to stderr
+    MANGA_LOG_SAMPLE   fraction of DEBUG records kept (default 1.0)
+"""
+
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+# Extra attributes copied into JSON records when present
+STRUCTURED_FIELDS = ("url", "status", "elapsed", "worker", "job_id", "chapter_id", "manga_url")
+
+# Chatty third-party loggers kept quiet unless overridden
+DEFAULT_LEVELS = {"urllib3": "WARNING", "PIL": "INFO"}
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_queue_handler: Optional[logging.handlers.QueueHandler] = None
+
+class JsonFormatter(logging.Formatter):
+    """Format records as one JSON object per line."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "process": record.processName,
+            "thread": record.threadName,
+        }
+        for field in STRUCTURED_FIELDS:
+            value = getattr(record, field, None)
+            if value is not None:
+                entry[field] = value
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+class DebugSampler(logging.Filter):
+    """Keep only a fraction of DEBUG records."""
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        return record.levelno > logging.DEBUG or random.random() < self.rate
+
+def setup_logging(level: Optional[str] = None, fmt: Optional[str] = None, log_file: Optional[str] = None,
+                  sample_rate: Optional[float] = None, levels: Optional[Dict[str, str]] = None) -> None:
+    """
+    Configure asynchronous logging for the process.
+
+    Calling it again replaces the previous configuration.
+
+    Args:
+        level (str, optional): Root log level
+        fmt (str, optional): "json" or "text"
+        log_file (str, optional): File written in addition to stderr
+        sample_rate (float, optional): Fraction of DEBUG records kept
+        levels (Dict[str, str], optional): Per-logger levels, merged over DEFAULT_LEVELS
+    """
+    global _listener, _queue_handler
+    level = level or os.environ.get("MANGA_LOG_LEVEL", "INFO")
+    fmt = fmt or os.environ.get("MANGA_LOG_FORMAT", "json")
+    log_file = log_file or os.environ.get("MANGA_LOG_FILE")
+    if sample_rate is None:
+        sample_rate = float(os.environ.get("MANGA_LOG_SAMPLE", "1.0"))
+
+    formatter = JsonFormatter() if fmt == "json" else logging.Formatter(
+        '%(asctime)s - %(name)s - %(processName)s - %(levelname)s - %(message)s')
+    handlers = [logging.StreamHandler()]
+    if log_file:
+        handlers.append(logging.FileHandler(log_file, encoding='utf-8'))
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    shutdown_logging()
+    records: queue.SimpleQueue = queue.SimpleQueue()
+    _queue_handler = logging.handlers.QueueHandler(records)
+    if sample_rate < 1.0:
+        _queue_handler.addFilter(DebugSampler(sample_rate))
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(_queue_handler)
+    root.setLevel(level.upper())
+    for name, logger_level in {**DEFAULT_LEVELS, **(levels or {})}.items():
+        logging.getLogger(name).setLevel(logger_level.upper())
+
+    _listener = logging.handlers.QueueListener(records, *handlers, respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown_logging)
+
+def shutdown_logging() -> None:
+    """Flush queued records and stop the background listener."""
+    global _listener, _queue_handler
+    if _queue_handler is not None:
+        logging.getLogger().removeHandler(_queue_handler)
+        _queue_handler = None
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
@@ -1,3 +1,11 @@
+import os
+
+import metrics
+from logging_config import setup_logging
 from scraper import SerieScraper
 
+setup_logging()
+# Serve metrics while crawling on this port, e.g. MANGA_METRICS_PORT=9100
+if os.environ.get("MANGA_METRICS_PORT"):
+    metrics.serve(int(os.environ["MANGA_METRICS_PORT"]))
 SerieScraper.save_all_manga(max_workers=6)
\ No newline at end of file
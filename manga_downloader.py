@@ -6,7 +6,11 @@ scraped manga information, chapters, and images.
 """
 
 from scraper import SearchResultsScraper, MangaDetailsScarper, ChapterImagesScraper, SerieScraper
-from database import Database
+from repository import MangaRepository
+from logging_config import setup_logging
+from image_cache import DiskImageCache
+from posters import PosterPipeline
+from typing import Optional
 import os
 from pathlib import Path
 import logging
@@ -16,15 +20,20 @@ logger = logging.getLogger(__name__)
 class MangaDownloader:
     """Class for downloading manga and storing in the database."""
 
-    def __init__(self, db_path: str = "sqlite:///manga.db", download_dir: str = "downloads"):
+    def __init__(self, db_path: str = "sqlite:///manga.db", download_dir: str = "downloads",
+                 image_cache: Optional[DiskImageCache] = None, repository: Optional[MangaRepository] = None):
         """
         Initialize the manga downloader.
 
         Args:
-            db_path: Path to the database
+            db_path: Database URL
             download_dir: Directory to store downloaded files
+            image_cache: Disk cache reused for chapter pages, see DiskImageCache
+            repository: Repository to store into, instead of opening db_path
         """
-        self.db = Database(db_path)
+        self.db = repository or MangaRepository(db_path)
+        self.image_cache = image_cache
+        self.posters = PosterPipeline(self.db)
         self.download_dir = Path(download_dir)
         self.download_dir.mkdir(parents=True, exist_ok=True)
         
@@ -51,29 +60,10 @@ class MangaDownloader:
             scraper = MangaDetailsScarper(manga_url)
             details = scraper.details
 
-            # Prepare manga data
-            manga_data = {
-                'url': manga_url,
-                'title': details.title,
-                'poster_url': details.poster,
-                'description': details.description,
-                'genres': details.genres,
-                'status': details.status,
-                'rate': float(details.rate)
-            }
-
-            # Save to database
-            manga = self.db.save_manga(manga_data)
-            logger.info(f"Saved manga: {manga.title}")
-
-            # Save all chapters
-            for chapter in details.chapters:
-                chapter_data = {
-                    'url': chapter.url,
-                    'title': chapter.title,
-                    'order_no': chapter.order_no
-                }
-                self.db.save_chapter(manga_url, chapter_data)
+            # Save manga, genres and chapters in one batch
+            self.db.upsert_manga([details])
+            logger.info(f"Saved manga: {details.title}")
+            self.posters.ingest([details.poster])
             
             logger.info(f"Saved {len(details.chapters)} chapters")
             return True
@@ -94,15 +84,16 @@ class MangaDownloader:
             bool: True if successful, False otherwise
         """
         try:
+            chapter = self.db.get_chapter_by_url(chapter_url)
+            if chapter is None:
+                logger.error(f"Chapter not in database, download its manga first: {chapter_url}")
+                return False
+
             # Get chapter images
             scraper = ChapterImagesScraper(chapter_url)
             
             # Save image information to database
-            images_data = [
-                {'url': img.url, 'order_no': img.order_no}
-                for img in scraper.images
-            ]
-            saved_images = self.db.save_chapter_images(chapter_url, images_data)
+            saved_images = self.db.upsert_chapter_images(chapter.id, scraper.images)
             
             if download_images:
                 # Create chapter directory
@@ -111,34 +102,30 @@ class MangaDownloader:
                 
                 # Download as PDF
                 pdf_path = str(chapter_dir / "chapter.pdf")
-                scraper.download_images_as_pdf(pdf_path)
+                scraper.download_images_as_pdf(pdf_path, cache=self.image_cache, series=chapter.manga_id)
                 
-                # Update database
-                self.db.update_chapter_download_status(chapter_url, pdf_path)
-                
-                for image in saved_images:
-                    # The images are already downloaded and included in the PDF
-                    # Just update their status
-                    self.db.update_image_download_status(
-                        chapter_url,
-                        image.order_no,
-                        str(chapter_dir / f"page_{image.order_no}.jpg")
-                    )
+                # Update database, the images are only stored in the PDF
+                self.db.mark_chapter_downloaded(chapter.id, pdf_path)
+                self.db.mark_images_downloaded(
+                    chapter.id,
+                    [(image.order_no, None, None, None) for image in scraper.images]
+                )
             
-            logger.info(f"Saved chapter with {len(saved_images)} images")
+            logger.info(f"Saved chapter with {saved_images} images")
             return True
             
         except Exception as e:
             logger.error(f"Error downloading chapter {chapter_url}: {str(e)}")
             return False
 
-    def download_all_chapters(self, manga_url: str, download_images: bool = False) -> bool:
+    def download_all_chapters(self, manga_url: str, download_images: bool = False, pin: bool = False) -> bool:
         """
         Download all chapters for a manga.
 
         Args:
             manga_url: URL of the manga
             download_images: Whether to download chapter images
+            pin: Keep the cached pages of the manga out of eviction (archive it)
 
         Returns:
             bool: True if all chapters were downloaded successfully
@@ -147,6 +134,11 @@ class MangaDownloader:
             # First ensure we have manga information
             scraper = MangaDetailsScarper(manga_url)
             details = scraper.details
+
+            if pin and self.image_cache is not None:
+                manga = self.db.get_manga_by_url(manga_url)
+                if manga is not None:
+                    self.image_cache.pin(manga.id)
             
             # Download each chapter
             success = True
@@ -197,10 +189,7 @@ class MangaDownloader:
 def main():
     """Example usage of the MangaDownloader."""
     # Configure logging
-    logging.basicConfig(
-        level=logging.INFO,
-        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-    )
+    setup_logging()
     
     # Initialize downloader
     downloader = MangaDownloader()
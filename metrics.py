@@ -0,0 +1,145 @@
+"""
+Prometheus metrics for the scraper, the database layer and the API.
+
+Hot paths record into the module-level metrics below. The API exposes them
+on ``/metrics``, command-line crawls can serve them over HTTP with
+``serve()`` or dump them to a file for the node exporter textfile collector
+with ``write()``.
+"""
+
+import logging
+from typing import Dict, Iterable
+
+from prometheus_client import (
+    CollectorRegistry, Counter, Histogram, REGISTRY, CONTENT_TYPE_LATEST,
+    generate_latest, start_http_server, write_to_textfile,
+)
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from prometheus_client.registry import Collector
+
+logger = logging.getLogger(__name__)
+
+UPSTREAM_REQUESTS = Counter(
+    "manga_upstream_requests_total", "Upstream HTTP requests", ["host", "status"])
+UPSTREAM_LATENCY = Histogram(
+    "manga_upstream_request_seconds", "Upstream request latency including retries", ["host"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 30))
+UPSTREAM_RETRIES = Counter(
+    "manga_upstream_retries_total", "Upstream request retries", ["host"])
+UPSTREAM_HEDGES = Counter(
+    "manga_upstream_hedges_total", "Hedged upstream requests by the attempt that answered first", ["host", "winner"])
+UPSTREAM_BYTES = Counter(
+    "manga_upstream_bytes_total", "Bytes downloaded from upstream", ["host"])
+PARSE_SECONDS = Histogram(
+    "manga_parse_seconds", "HTML parsing and extraction time", ["scraper"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1))
+DB_WRITE_SECONDS = Histogram(
+    "manga_db_write_seconds", "Database write latency", ["operation"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 5))
+POSTER_INGESTS = Counter(
+    "manga_poster_ingests_total", "Posters processed by the ingestion pipeline", ["result"])
+API_LATENCY = Histogram(
+    "manga_api_request_seconds", "API request latency", ["method", "route", "status"],
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 30))
+
+class _CacheCollector(Collector):
+    """Report hit and miss counters of registered caches."""
+
+    def __init__(self):
+        self.caches: Dict[str, object] = {}
+
+    def collect(self) -> Iterable[CounterMetricFamily]:
+        family = CounterMetricFamily("manga_cache_requests", "Cache lookups", labels=["cache", "result"])
+        for name, cache in self.caches.items():
+            family.add_metric([name, "hit"], cache.hits)
+            family.add_metric([name, "miss"], cache.misses)
+        yield family
+
+class _QueueCollector(Collector):
+    """Report the number of download jobs per status at scrape time."""
+
+    def __init__(self):
+        self.queue = None
+
+    def collect(self) -> Iterable[GaugeMetricFamily]:
+        family = GaugeMetricFamily("manga_download_jobs", "Download jobs per status", labels=["status"])
+        if self.queue is not None:
+            try:
+                for status, count in self.queue.depth().items():
+                    family.add_metric([status], count)
+            except Exception:
+                logger.exception("Error reading download queue depth")
+        yield family
+
+_caches = _CacheCollector()
+_queue = _QueueCollector()
+REGISTRY.register(_caches)
+REGISTRY.register(_queue)
+
+def register_cache(name: str, cache) -> None:
+    """
+    Report the hit rate of a cache.
+
+    Args:
+        name (str): Label of the cache
+        cache: Object exposing ``hits`` and ``misses`` counters, such as TTLCache
+    """
+    _caches.caches[name] = cache
+
+def register_queue(queue) -> None:
+    """
+    Report the depth of a download queue.
+
+    Args:
+        queue: Object exposing ``depth() -> Dict[str, int]``, such as JobQueue
+    """
+    _queue.queue = queue
+
+def observe_upstream(host: str, status: str, seconds: float, retries: int = 0, size: int = 0) -> None:
+    """
+    Record one upstream request.
+
+    Args:
+        host (str): Upstream host
+        status (str): HTTP status code, or "error" when no response was received
+        seconds (float): Wall time including retries
+        retries (int): Number of retries performed
+        size (int): Response body size in bytes
+    """
+    UPSTREAM_REQUESTS.labels(host, status).inc()
+    UPSTREAM_LATENCY.labels(host).observe(seconds)
+    if retries:
+        UPSTREAM_RETRIES.labels(host).inc(retries)
+    if size:
+        UPSTREAM_BYTES.labels(host).inc(size)
+
+def render(registry: CollectorRegistry = REGISTRY) -> tuple[bytes, str]:
+    """
+    Render metrics in the Prometheus text format.
+
+    Args:
+        registry (CollectorRegistry): Registry to render
+
+    Returns:
+        tuple[bytes, str]: Payload and content type
+    """
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+def serve(port: int = 9100) -> None:
+    """
+    Serve metrics over HTTP from a background thread.
+
+    Args:
+        port (int): Port to listen on
+    """
+    start_http_server(port)
+    logger.info("Serving metrics on port %d", port)
+
+def write(path: str) -> None:
+    """
+    Write metrics to a file for the node exporter textfile collector.
+
+    Args:
+        path (str): Output file path
+    """
+    write_to_textfile(path, REGISTRY)
@@ -1,5 +1,6 @@
 from pydantic import BaseModel
-from typing import List
+from typing import List, Optional
+from datetime import datetime
 
 class BaseManga(BaseModel) :
     url: str
@@ -26,4 +27,14 @@ class MangaDetails(BaseManga) :
 
 class ChapterImage(BaseModel) :
     order_no: int
-    url: str
\ No newline at end of file
+    url: str
+
+class ChapterUpdate(BaseModel) :
+    manga_id: str
+    manga_url: str
+    manga_title: str
+    chapter_id: str
+    url: str
+    title: str
+    number: Optional[float] = None
+    detected_at: datetime
@@ -0,0 +1,218 @@
+"""
+Batched poster ingestion.
+
+Saving a manga used to download its poster inside the request, and crawls
+only stored poster URLs. PosterPipeline fetches posters in the background
+instead: URLs submitted during crawls and saves are deduplicated (against
+each other and against the database), fetched concurrently in batches,
+resized into the standard sizes of POSTER_SIZES and written once per URL in
+a single transaction, so ``/manga/{id}/poster`` is always a local read.
+"""
+
+import logging
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from typing import Callable, Dict, Iterable, Optional, Set, Tuple
+
+from PIL import Image
+
+from cache import TTLCache
+from metrics import POSTER_INGESTS
+
+logger = logging.getLogger(__name__)
+
+# Standard poster widths, by size name
+POSTER_SIZES: Dict[str, int] = {"small": 160, "medium": 360, "large": 720}
+DEFAULT_SIZE = "medium"
+POSTER_QUALITY = 85
+
+def resize_poster(data: bytes) -> Dict[str, Tuple[bytes, str, int, int]]:
+    """
+    Encode a poster in every standard size.
+
+    Posters are scaled down to each width (never up) and encoded as JPEG,
+    each size from the next larger one.
+
+    Args:
+        data (bytes): Original image content
+
+    Returns:
+        Dict[str, Tuple[bytes, str, int, int]]: By size name: content, MIME type, width and height
+    """
+    sizes: Dict[str, Tuple[bytes, str, int, int]] = {}
+    with Image.open(BytesIO(data)) as image:
+        image.load()
+        if image.mode != "RGB":
+            image = image.convert("RGB")
+        for name, width in sorted(POSTER_SIZES.items(), key=lambda item: -item[1]):
+            if image.width > width:
+                image = image.resize((width, max(1, round(image.height * width / image.width))),
+                                     Image.Resampling.LANCZOS)
+            out = BytesIO()
+            image.save(out, format="JPEG", quality=POSTER_QUALITY, optimize=True)
+            sizes[name] = (out.getvalue(), "image/jpeg", image.width, image.height)
+    return sizes
+
+def _fetch(url: str) -> Tuple[bytes, str]:
+    """Download a poster through the shared scraper session."""
+    from jobs import fetch_image
+    return fetch_image(url)
+
+class PosterPipeline:
+    """
+    Background fetcher of posters, writing them in batches.
+
+    Attributes:
+        repository (MangaRepository): Repository storing the posters
+        batch_size (int): Posters written per transaction
+        flush_interval (float): Seconds to wait for a batch to fill up
+        stored (int): Posters stored by the pipeline
+        failures (int): Posters that could not be fetched or decoded
+
+    Example:
+        >>> pipeline = PosterPipeline(repository)
+        >>> pipeline.submit([details.poster])
+        >>> pipeline.stop()
+    """
+
+    def __init__(self, repository, batch_size: int = 32, max_workers: int = 4, flush_interval: float = 0.5,
+                 fetch: Optional[Callable[[str], Tuple[bytes, str]]] = None, retry_after: float = 300.0):
+        """
+        Initialize the pipeline, its thread starts on the first submit.
+
+        Args:
+            repository (MangaRepository): Repository storing the posters
+            batch_size (int): Posters written per transaction
+            max_workers (int): Concurrent poster downloads
+            flush_interval (float): Seconds to wait for a batch to fill up
+            fetch (Callable, optional): Downloads an image, returning its content and MIME type
+            retry_after (float): Seconds before a poster that failed is submitted again
+        """
+        self.repository = repository
+        self.batch_size = batch_size
+        self.max_workers = max_workers
+        self.flush_interval = flush_interval
+        self.fetch = fetch or _fetch
+        self.stored = 0
+        self.failures = 0
+        self._queue: "queue.Queue[str]" = queue.Queue()
+        self._pending: Set[str] = set()
+        self._failed = TTLCache(maxsize=4096, ttl=retry_after)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def submit(self, urls: Iterable[str]) -> int:
+        """
+        Queue posters for ingestion, without waiting for them.
+
+        URLs already queued, or that failed less than ``retry_after`` seconds
+        ago, are skipped.
+
+        Args:
+            urls (Iterable[str]): Poster URLs
+
+        Returns:
+            int: Number of URLs queued
+        """
+        with self._lock:
+            new = [url for url in dict.fromkeys(urls)
+                   if url and url not in self._pending and url not in self._failed]
+            self._pending.update(new)
+            if new and self._thread is None:
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, name="posters", daemon=True)
+                self._thread.start()
+        for url in new:
+            self._queue.put(url)
+        return len(new)
+
+    def drain(self) -> None:
+        """Wait until every submitted poster is processed."""
+        self._queue.join()
+
+    def stop(self, drain: bool = True) -> None:
+        """
+        Stop the background thread.
+
+        Args:
+            drain (bool): Process the queued posters first
+        """
+        if drain:
+            self.drain()
+        self._stop.set()
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            thread.join(timeout=10)
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def ingest(self, urls: Iterable[str]) -> int:
+        """
+        Fetch, resize and store posters not stored yet, in the calling thread.
+
+        Args:
+            urls (Iterable[str]): Poster URLs
+
+        Returns:
+            int: Number of posters stored
+        """
+        missing = sorted(self.repository.missing_posters(url for url in urls if url))
+        if not missing:
+            return 0
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="poster")
+        posters = {}
+        for url, sizes in zip(missing, self._executor.map(self._process, missing)):
+            if sizes is None:
+                self._failed.set(url, True)
+                with self._lock:
+                    self.failures += 1
+            else:
+                self._failed.pop(url)
+                posters[url] = sizes
+        if posters:
+            self.repository.store_posters(posters)
+            with self._lock:
+                self.stored += len(posters)
+            logger.info("Stored %d posters", len(posters))
+        return len(posters)
+
+    def _process(self, url: str) -> Optional[Dict[str, Tuple[bytes, str, int, int]]]:
+        """Download and resize one poster, None when it fails."""
+        try:
+            data, _ = self.fetch(url)
+            sizes = resize_poster(data)
+        except Exception as e:
+            POSTER_INGESTS.labels("error").inc()
+            logger.warning("Failed to ingest poster %s: %s", url, e)
+            return None
+        POSTER_INGESTS.labels("stored").inc()
+        return sizes
+
+    def _run(self) -> None:
+        """Collect submitted URLs into batches and ingest them."""
+        while not self._stop.is_set():
+            try:
+                batch = [self._queue.get(timeout=self.flush_interval)]
+            except queue.Empty:
+                continue
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get(timeout=self.flush_interval))
+                except queue.Empty:
+                    break
+            try:
+                self.ingest(batch)
+            except Exception:
+                logger.exception("Error ingesting %d posters", len(batch))
+            finally:
+                with self._lock:
+                    self._pending.difference_update(batch)
+                for _ in batch:
+                    self._queue.task_done()
@@ -0,0 +1,225 @@
+"""
+Read-ahead of upcoming chapters.
+
+Readers go through chapters in order, so when chapter N of a manga is
+requested the next chapters are likely to follow. ReadAhead scrapes the
+image lists of chapters N+1..N+k in the background, keeps them in a cache
+and, for chapters stored in the database, queues low-priority image
+downloads. A global budget caps how many prefetches run at once.
+"""
+
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable, Iterator, List, Optional
+
+from cache import TTLCache
+from jobs import JobQueue, PRIORITY_PREFETCH
+from models import ChapterDetailed, ChapterImage
+from repository import MangaRepository
+
+logger = logging.getLogger(__name__)
+
+def scrape_chapter_images(chapter_url: str) -> Iterator[ChapterImage]:
+    """
+    Scrape the image list of a chapter.
+
+    Args:
+        chapter_url (str): Chapter URL
+
+    Returns:
+        Iterator[ChapterImage]: Images in reading order, parsed lazily
+    """
+    from scraper import ChapterImagesScraper
+    return ChapterImagesScraper(chapter_url).iter_images()
+
+def scrape_chapters(manga_url: str) -> List[ChapterDetailed]:
+    """
+    Scrape the chapter list of a manga.
+
+    Args:
+        manga_url (str): Manga URL
+
+    Returns:
+        List[ChapterDetailed]: Chapters from oldest to newest
+    """
+    from scraper import MangaDetailsScarper
+    return MangaDetailsScarper(manga_url).chapters
+
+def manga_url_of(chapter_url: str) -> str:
+    """
+    Derive the manga URL from a chapter URL.
+
+    Args:
+        chapter_url (str): Chapter URL such as https://host/series/title/chapter-1/
+
+    Returns:
+        str: The manga URL
+    """
+    return "/".join(chapter_url.split("/")[:-2])
+
+class ReadAhead:
+    """
+    Prefetch image lists and images of the chapters after the one being read.
+
+    Attributes:
+        MAX_DEPTH (int): Maximum number of chapters prefetched per request
+        image_cache (TTLCache): Chapter URL to image list cache
+        chapter_cache (TTLCache): Manga URL to chapter list cache
+        repository (MangaRepository): Repository used to store image lists
+        queue (JobQueue): Queue receiving the low-priority downloads
+
+    Example:
+        >>> read_ahead = ReadAhead(TTLCache(), repository, queue, budget=8)
+        >>> images = read_ahead.chapter_images(chapter_url)
+        >>> read_ahead.schedule(chapter_url, depth=2)
+    """
+
+    MAX_DEPTH = 5
+
+    def __init__(self, image_cache: TTLCache, repository: Optional[MangaRepository] = None,
+                 queue: Optional[JobQueue] = None, budget: int = 8, max_workers: int = 2,
+                 chapter_ttl: float = 600.0,
+                 fetch_images: Callable[[str], Iterable[ChapterImage]] = scrape_chapter_images,
+                 fetch_chapters: Callable[[str], List[ChapterDetailed]] = scrape_chapters):
+        """
+        Initialize the read-ahead policy.
+
+        Args:
+            image_cache (TTLCache): Cache of chapter image lists
+            repository (MangaRepository, optional): Repository used to store image lists
+            queue (JobQueue, optional): Queue receiving the low-priority downloads
+            budget (int): Maximum number of chapters being prefetched at once
+            max_workers (int): Threads used for prefetching
+            chapter_ttl (float): Lifetime of cached chapter lists in seconds
+            fetch_images (Callable): Function scraping a chapter image list
+            fetch_chapters (Callable): Function scraping a manga chapter list
+        """
+        self.image_cache = image_cache
+        self.chapter_cache = TTLCache(maxsize=256, ttl=chapter_ttl)
+        self.repository = repository
+        self.queue = queue
+        self.fetch_images = fetch_images
+        self.fetch_chapters = fetch_chapters
+        self._budget = threading.BoundedSemaphore(budget)
+        self._inflight: set[str] = set()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="prefetch")
+
+    def chapter_images(self, chapter_url: str) -> List[ChapterImage]:
+        """
+        Get the image list of a chapter, from the cache when warm.
+
+        Args:
+            chapter_url (str): Chapter URL
+
+        Returns:
+            List[ChapterImage]: Images in reading order
+        """
+        images = self.image_cache.get(chapter_url)
+        if images is None:
+            images = list(self.fetch_images(chapter_url))
+            self.image_cache.set(chapter_url, images)
+        return images
+
+    def iter_chapter_images(self, chapter_url: str) -> Iterator[ChapterImage]:
+        """
+        Yield the images of a chapter as they are parsed.
+
+        A warm cache is replayed directly, otherwise the list is cached once
+        the chapter has been fully parsed.
+
+        Args:
+            chapter_url (str): Chapter URL
+
+        Yields:
+            ChapterImage: Images in reading order
+        """
+        images = self.image_cache.get(chapter_url)
+        if images is not None:
+            yield from images
+            return
+        images = []
+        for image in self.fetch_images(chapter_url):
+            images.append(image)
+            yield image
+        self.image_cache.set(chapter_url, images)
+
+    def next_chapters(self, chapter_url: str, depth: int) -> List[ChapterDetailed]:
+        """
+        Find the chapters following a chapter.
+
+        Args:
+            chapter_url (str): Chapter being read
+            depth (int): Number of following chapters
+
+        Returns:
+            List[ChapterDetailed]: Up to depth chapters, in reading order
+        """
+        manga_url = manga_url_of(chapter_url)
+        chapters = self.chapter_cache.get(manga_url)
+        if chapters is None:
+            chapters = self.fetch_chapters(manga_url)
+            self.chapter_cache.set(manga_url, chapters)
+        key = chapter_url.rstrip("/")
+        for n, chapter in enumerate(chapters):
+            if chapter.url.rstrip("/") == key:
+                return chapters[n + 1:n + 1 + depth]
+        return []
+
+    def schedule(self, chapter_url: str, depth: int) -> None:
+        """
+        Prefetch the chapters following a chapter in the background.
+
+        Args:
+            chapter_url (str): Chapter being read
+            depth (int): Number of following chapters, capped at MAX_DEPTH
+        """
+        depth = min(depth, self.MAX_DEPTH)
+        if depth > 0:
+            self._executor.submit(self._schedule, chapter_url, depth)
+
+    def _schedule(self, chapter_url: str, depth: int) -> None:
+        """
+        Resolve the following chapters and submit their prefetches.
+
+        Args:
+            chapter_url (str): Chapter being read
+            depth (int): Number of following chapters
+        """
+        try:
+            upcoming = self.next_chapters(chapter_url, depth)
+        except Exception:
+            logger.exception("Error resolving chapters after %s", chapter_url)
+            return
+        for chapter in upcoming:
+            with self._lock:
+                if chapter.url in self._inflight or chapter.url in self.image_cache:
+                    continue
+                if not self._budget.acquire(blocking=False):
+                    logger.debug("Prefetch budget exhausted, skipping %s", chapter.url)
+                    return
+                self._inflight.add(chapter.url)
+            self._executor.submit(self._prefetch, chapter.url)
+
+    def _prefetch(self, chapter_url: str) -> None:
+        """
+        Warm the image list of a chapter and queue its download.
+
+        Args:
+            chapter_url (str): Chapter to prefetch
+        """
+        try:
+            images = self.chapter_images(chapter_url)
+            if self.repository is not None and self.queue is not None:
+                chapter = self.repository.get_chapter_by_url(chapter_url)
+                if chapter is not None:
+                    self.repository.upsert_chapter_images(chapter.id, images)
+                    self.queue.enqueue(chapter.id, priority=PRIORITY_PREFETCH)
+            logger.debug("Prefetched %d images of %s", len(images), chapter_url)
+        except Exception:
+            logger.exception("Error prefetching %s", chapter_url)
+        finally:
+            with self._lock:
+                self._inflight.discard(chapter_url)
+            self._budget.release()
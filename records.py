@@ -0,0 +1,131 @@
+"""
+Compact records for the crawl pipeline.
+
+A full crawl holds thousands of manga and hundreds of thousands of chapters
+in memory between scraping and the database write. Pydantic models carry a
+``__dict__`` and validation state per object, so the pipeline uses plain
+tuples instead and pydantic stays at the API boundary.
+
+Repeated strings are shared rather than copied: genre names and statuses
+are interned, and chapters store their URL as a suffix of the manga URL,
+which is referenced once by every chapter of the series.
+"""
+
+import sys
+from typing import Iterable, NamedTuple, Optional, Tuple
+
+from models import ChapterDetailed, MangaDetails
+
+class ChapterRecord(NamedTuple):
+    """A chapter of a crawled manga."""
+    base: str
+    slug: str
+    title: str
+    order_no: int
+
+    @property
+    def url(self) -> str:
+        """Full URL of the chapter."""
+        return self.base + self.slug
+
+    @classmethod
+    def build(cls, base: str, url: str, title: str, order_no: int) -> "ChapterRecord":
+        """
+        Build a record sharing ``base`` when the URL starts with it.
+
+        Args:
+            base (str): URL of the manga the chapter belongs to
+            url (str): Full URL of the chapter
+            title (str): Chapter title
+            order_no (int): Chapter position
+
+        Returns:
+            ChapterRecord: The record
+        """
+        if url.startswith(base):
+            return cls(base, url[len(base):], title, order_no)
+        return cls("", url, title, order_no)
+
+    def to_model(self) -> ChapterDetailed:
+        """Convert to the API model."""
+        return ChapterDetailed(url=self.url, title=self.title, order_no=self.order_no)
+
+class ListingCard(NamedTuple):
+    """A series card of a listing page, with the signals it shows."""
+    url: str
+    title: str
+    chapters: Tuple[Tuple[str, str], ...]
+    status: Optional[str] = None
+    rate: Optional[float] = None
+
+class MangaRecord(NamedTuple):
+    """A crawled manga with its chapters."""
+    url: str
+    title: str
+    poster: str
+    genres: Tuple[str, ...]
+    status: str
+    rate: float
+    description: str
+    chapters: Tuple[ChapterRecord, ...]
+
+    @classmethod
+    def build(cls, url: str, title: str, poster: str, genres: Iterable[str], status: str, rate,
+              description: str, chapters: Iterable[Tuple[str, str]]) -> "MangaRecord":
+        """
+        Build a record, interning repeated strings.
+
+        Args:
+            url (str): Manga URL
+            title (str): Manga title
+            poster (str): Poster URL
+            genres (Iterable[str]): Genre names
+            status (str): Publication status
+            rate: Rating, converted to float
+            description (str): Summary
+            chapters (Iterable[Tuple[str, str]]): (url, title) of the chapters, oldest first
+
+        Returns:
+            MangaRecord: The record
+        """
+        return cls(
+            url=url,
+            title=title,
+            poster=poster,
+            genres=tuple(sys.intern(genre) for genre in genres),
+            status=sys.intern(status),
+            rate=float(rate) if rate else 0.0,
+            description=description,
+            chapters=tuple(ChapterRecord.build(url, chapter_url, chapter_title, n)
+                           for n, (chapter_url, chapter_title) in enumerate(chapters)),
+        )
+
+    @classmethod
+    def from_model(cls, details: MangaDetails) -> "MangaRecord":
+        """
+        Convert an API model into a record.
+
+        Args:
+            details (MangaDetails): Manga details
+
+        Returns:
+            MangaRecord: The record, chapters keep their order numbers
+        """
+        record = cls.build(details.url, details.title, details.poster, details.genres, details.status,
+                           details.rate, details.description, ())
+        return record._replace(chapters=tuple(
+            ChapterRecord.build(details.url, chapter.url, chapter.title, chapter.order_no)
+            for chapter in details.chapters))
+
+    def to_model(self) -> MangaDetails:
+        """Convert to the API model."""
+        return MangaDetails(
+            url=self.url,
+            title=self.title,
+            poster=self.poster,
+            genres=list(self.genres),
+            status=self.status,
+            rate=self.rate,
+            description=self.description,
+            chapters=[chapter.to_model() for chapter in self.chapters],
+        )
@@ -0,0 +1,955 @@
+"""
+Repository layer over the SQLAlchemy models.
+
+This module is the single write and read path for manga data. The API,
+the MangaDownloader and the SerieScraper crawler all go through
+MangaRepository, which performs batched upserts instead of per-row ORM
+loops so every caller shares the same bulk code.
+"""
+
+import logging
+import os
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from sqlalchemy import select, delete, update, func, exists, and_, case, bindparam, tuple_
+from sqlalchemy.dialects import sqlite
+from sqlalchemy.orm import Session, sessionmaker
+
+from database import create_session_factory
+from db_models import (MangaDB, GenreDB, ChapterDB, ChapterImageDB, PosterImageDB, DownloadJobDB,
+                       CatalogSnapshotDB, get_uuid)
+from models import MangaDetails, ChapterDetailed, ChapterImage
+from records import MangaRecord, ChapterRecord
+from chapters import sort_keys
+from metrics import DB_WRITE_SECONDS
+import tracing
+
+logger = logging.getLogger(__name__)
+
+# Keys per IN (...) lookup, keeps us well below SQLite's bound-parameter limit
+BATCH_SIZE = 500
+
+# Reading order of chapters: sort keys may tie (an extra and a chapter 0), page order and id break ties
+READING_ORDER = (ChapterDB.sort_key, ChapterDB.order_no, ChapterDB.id)
+
+def reading_position(chapter: ChapterDB) -> Tuple[int, int, str]:
+    """
+    Get the position of a chapter in READING_ORDER.
+
+    Args:
+        chapter (ChapterDB): Chapter row
+
+    Returns:
+        Tuple[int, int, str]: Sort key, order number and id
+    """
+    return chapter.sort_key, chapter.order_no, chapter.id
+
+class MangaRepository:
+    """
+    Batched persistence operations for manga, chapters and images.
+
+    Each public method opens its own short-lived session, so a repository
+    instance can be shared between threads.
+
+    Attributes:
+        session_factory (sessionmaker): Factory used to open sessions
+
+    Example:
+        >>> repo = MangaRepository()
+        >>> ids = repo.upsert_manga([details])
+        >>> repo.upsert_chapter_images(chapter_id, images)
+    """
+
+    def __init__(self, database_url: Optional[str] = None, session_factory: Optional[sessionmaker] = None):
+        """
+        Initialize the repository.
+
+        Args:
+            database_url (str, optional): Database URL, defaults to the shared engine
+            session_factory (sessionmaker, optional): Explicit session factory to use
+        """
+        self.session_factory = session_factory or create_session_factory(database_url)
+
+    @staticmethod
+    def _insert(session: Session, table):
+        """
+        Build a dialect-specific INSERT supporting ON CONFLICT clauses.
+
+        Args:
+            session (Session): Session whose dialect is used
+            table: ORM model or table to insert into
+
+        Returns:
+            Insert: Dialect INSERT construct
+        """
+        if session.get_bind().dialect.name == "postgresql":
+            # Imported on first use, the PostgreSQL dialect is slow to load
+            from sqlalchemy.dialects import postgresql
+            return postgresql.insert(table)
+        return sqlite.insert(table)
+
+    def existing_manga_urls(self, urls: Iterable[str]) -> Set[str]:
+        """
+        Return the subset of URLs already stored in the manga table.
+
+        Args:
+            urls (Iterable[str]): Manga URLs to check
+
+        Returns:
+            Set[str]: URLs that already exist
+        """
+        urls = list(urls)
+        found: Set[str] = set()
+        with self.session_factory() as session, tracing.stage("exists"):
+            for i in range(0, len(urls), BATCH_SIZE):
+                found.update(session.scalars(
+                    select(MangaDB.url).where(MangaDB.url.in_(urls[i:i + BATCH_SIZE]))
+                ))
+        return found
+
+    @DB_WRITE_SECONDS.labels("upsert_manga").time()
+    def upsert_manga(self, items: Iterable[MangaDetails | MangaRecord], with_chapters: bool = True) -> Dict[str, str]:
+        """
+        Insert or update a batch of manga with their genres and chapters.
+
+        All rows are written in a single transaction with executemany
+        INSERT ... ON CONFLICT statements, which SQLAlchemy sends as
+        batched multi-row statements compiled once.
+
+        Args:
+            items (Iterable[MangaDetails | MangaRecord]): Scraped manga details, as API
+                models or compact crawl records
+            with_chapters (bool): Whether to upsert the chapter lists too
+
+        Returns:
+            Dict[str, str]: Mapping of manga URL to manga id
+        """
+        items = list({item.url: item for item in items}.values())
+        if not items:
+            return {}
+        now = datetime.utcnow()
+        rows = [{
+            "id": get_uuid(),
+            "url": item.url,
+            "title": item.title,
+            "poster": item.poster,
+            "description": item.description,
+            "status": item.status,
+            "rate": float(item.rate) if item.rate else 0.0,
+            "created_at": now,
+            "updated_at": now,
+        } for item in items]
+        with self.session_factory() as session:
+            with tracing.stage("write"):
+                stmt = self._insert(session, MangaDB.__table__)
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=[MangaDB.url],
+                    set_={col: stmt.excluded[col] for col in
+                          ("title", "poster", "description", "status", "rate", "updated_at")}
+                )
+                session.execute(stmt, rows)
+                ids = self._manga_ids(session, [item.url for item in items])
+
+                session.execute(delete(GenreDB).where(GenreDB.manga_id.in_(list(ids.values()))))
+                genre_rows = [{"id": get_uuid(), "manga_id": ids[item.url], "name": name}
+                              for item in items for name in item.genres]
+                if genre_rows:
+                    session.execute(GenreDB.__table__.insert(), genre_rows)
+
+                if with_chapters:
+                    chapter_rows = [row for item in items
+                                    for row in self._chapter_rows(ids[item.url], item.chapters)]
+                    self._upsert_chapter_rows(session, chapter_rows)
+            with tracing.stage("commit"):
+                session.commit()
+        logger.debug("Upserted %d manga", len(ids))
+        return ids
+
+    def save_manga(self, details: MangaDetails) -> str:
+        """
+        Insert or update a single manga.
+
+        Args:
+            details (MangaDetails): Scraped manga details
+
+        Returns:
+            str: The manga id
+        """
+        return self.upsert_manga([details])[details.url]
+
+    @staticmethod
+    def _manga_ids(session: Session, urls: List[str]) -> Dict[str, str]:
+        """
+        Look up manga ids by URL.
+
+        Args:
+            session (Session): Open session
+            urls (List[str]): Manga URLs
+
+        Returns:
+            Dict[str, str]: Mapping of URL to id
+        """
+        ids: Dict[str, str] = {}
+        for i in range(0, len(urls), BATCH_SIZE):
+            ids.update(session.execute(
+                select(MangaDB.url, MangaDB.id).where(MangaDB.url.in_(urls[i:i + BATCH_SIZE]))
+            ).tuples().all())
+        return ids
+
+    def iter_catalog(self, batch_size: int = BATCH_SIZE) -> Iterator[dict]:
+        """
+        Read the whole catalog, one manga at a time in URL order.
+
+        Manga are read in batches, each with its genres, chapters (with their
+        number and sort key) and the image URLs of every chapter, so memory
+        stays bounded by the batch size.
+
+        Args:
+            batch_size (int): Manga read per batch
+
+        Yields:
+            dict: url, title, poster, description, status, rate, genres (sorted) and
+            chapters as dicts of url, title, order_no, number, sort_key and images
+        """
+        last = ""
+        with self.session_factory() as session:
+            while True:
+                mangas = session.execute(
+                    select(MangaDB.id, MangaDB.url, MangaDB.title, MangaDB.poster, MangaDB.description,
+                           MangaDB.status, MangaDB.rate)
+                    .where(MangaDB.url > last).order_by(MangaDB.url).limit(batch_size)
+                ).all()
+                if not mangas:
+                    return
+                ids = [manga.id for manga in mangas]
+                genres: Dict[str, List[str]] = defaultdict(list)
+                for manga_id, name in session.execute(
+                        select(GenreDB.manga_id, GenreDB.name).where(GenreDB.manga_id.in_(ids))
+                        .order_by(GenreDB.manga_id, GenreDB.name)):
+                    genres[manga_id].append(name)
+                chapters: Dict[str, List[dict]] = defaultdict(list)
+                by_id: Dict[str, dict] = {}
+                for row in session.execute(
+                        select(ChapterDB.id, ChapterDB.manga_id, ChapterDB.url, ChapterDB.title, ChapterDB.order_no,
+                               ChapterDB.number, ChapterDB.sort_key)
+                        .where(ChapterDB.manga_id.in_(ids))
+                        .order_by(ChapterDB.manga_id, ChapterDB.sort_key, ChapterDB.order_no)):
+                    chapter = {"url": row.url, "title": row.title, "order_no": row.order_no,
+                               "number": row.number, "sort_key": row.sort_key, "images": []}
+                    chapters[row.manga_id].append(chapter)
+                    by_id[row.id] = chapter
+                chapter_ids = list(by_id)
+                for i in range(0, len(chapter_ids), BATCH_SIZE):
+                    for chapter_id, url in session.execute(
+                            select(ChapterImageDB.chapter_id, ChapterImageDB.url)
+                            .where(ChapterImageDB.chapter_id.in_(chapter_ids[i:i + BATCH_SIZE]))
+                            .order_by(ChapterImageDB.chapter_id, ChapterImageDB.order_no)):
+                        by_id[chapter_id]["images"].append(url)
+                for manga in mangas:
+                    yield {"url": manga.url, "title": manga.title, "poster": manga.poster,
+                           "description": manga.description, "status": manga.status, "rate": manga.rate,
+                           "genres": genres[manga.id], "chapters": chapters[manga.id]}
+                last = mangas[-1].url
+
+    @DB_WRITE_SECONDS.labels("load_catalog").time()
+    def load_catalog(self, items: List[dict]) -> Dict[str, str]:
+        """
+        Bulk-load manga read by iter_catalog(), keeping their chapter keys and image lists.
+
+        Like upsert_manga, chapters missing from an item are kept.
+
+        Args:
+            items (List[dict]): Manga in the iter_catalog() format
+
+        Returns:
+            Dict[str, str]: Mapping of manga URL to manga id
+        """
+        ids = self.upsert_manga([MangaRecord(item["url"], item["title"], item["poster"], tuple(item["genres"]),
+                                             item["status"], item["rate"], item["description"], ())
+                                 for item in items], with_chapters=False)
+        now = datetime.utcnow()
+        chapter_rows = [{"id": get_uuid(), "manga_id": ids[item["url"]], "order_no": chapter["order_no"],
+                         "number": chapter["number"], "sort_key": chapter["sort_key"], "title": chapter["title"],
+                         "url": chapter["url"], "created_at": now}
+                        for item in items for chapter in item["chapters"]]
+        manifests = {chapter["url"]: chapter["images"] for item in items for chapter in item["chapters"]
+                     if chapter["images"]}
+        with self.session_factory() as session:
+            self._upsert_chapter_rows(session, chapter_rows)
+            urls = list(manifests)
+            chapter_ids: Dict[str, str] = {}
+            for i in range(0, len(urls), BATCH_SIZE):
+                chapter_ids.update(session.execute(
+                    select(ChapterDB.url, ChapterDB.id).where(ChapterDB.url.in_(urls[i:i + BATCH_SIZE]))
+                ).tuples().all())
+            image_rows = [{"id": get_uuid(), "chapter_id": chapter_ids[url], "order_no": n, "url": image_url,
+                           "is_downloaded": False}
+                          for url, images in manifests.items() for n, image_url in enumerate(images)]
+            if image_rows:
+                stmt = self._insert(session, ChapterImageDB.__table__)
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=[ChapterImageDB.chapter_id, ChapterImageDB.order_no],
+                    set_={"url": stmt.excluded.url}
+                )
+                session.execute(stmt, image_rows)
+            session.commit()
+        return ids
+
+    @DB_WRITE_SECONDS.labels("delete_manga").time()
+    def delete_manga(self, urls: Iterable[str]) -> int:
+        """
+        Delete manga with their genres, chapters, images and download jobs.
+
+        Args:
+            urls (Iterable[str]): Manga URLs
+
+        Returns:
+            int: Number of manga deleted
+        """
+        with self.session_factory() as session:
+            ids = list(self._manga_ids(session, list(urls)).values())
+            for i in range(0, len(ids), BATCH_SIZE):
+                batch = ids[i:i + BATCH_SIZE]
+                chapters = select(ChapterDB.id).where(ChapterDB.manga_id.in_(batch))
+                session.execute(delete(ChapterImageDB).where(ChapterImageDB.chapter_id.in_(chapters)))
+                session.execute(delete(DownloadJobDB).where(DownloadJobDB.chapter_id.in_(chapters)))
+                session.execute(delete(ChapterDB).where(ChapterDB.manga_id.in_(batch)))
+                session.execute(delete(GenreDB).where(GenreDB.manga_id.in_(batch)))
+                session.execute(delete(MangaDB).where(MangaDB.id.in_(batch)))
+            session.commit()
+        return len(ids)
+
+    def last_snapshot(self) -> Optional[CatalogSnapshotDB]:
+        """
+        Get the catalog snapshot applied last.
+
+        Returns:
+            Optional[CatalogSnapshotDB]: The detached row, or None if none was applied
+        """
+        with self.session_factory() as session:
+            return session.scalars(
+                select(CatalogSnapshotDB).order_by(CatalogSnapshotDB.applied_at.desc()).limit(1)
+            ).first()
+
+    def record_snapshot(self, snapshot_id: str, kind: str, base_id: Optional[str] = None,
+                        manga_count: int = 0, deleted_count: int = 0) -> None:
+        """
+        Record that a catalog snapshot was applied.
+
+        Args:
+            snapshot_id (str): Id of the catalog state the snapshot leads to
+            kind (str): ``full`` or ``diff``
+            base_id (str, optional): Id of the state a diff applies to
+            manga_count (int): Manga written
+            deleted_count (int): Manga deleted
+        """
+        with self.session_factory() as session:
+            session.add(CatalogSnapshotDB(snapshot_id=snapshot_id, kind=kind, base_id=base_id,
+                                          manga_count=manga_count, deleted_count=deleted_count,
+                                          applied_at=datetime.utcnow()))
+            session.commit()
+
+    def manga_ids(self, urls: Iterable[str]) -> Dict[str, str]:
+        """
+        Look up the ids of stored manga by URL.
+
+        Args:
+            urls (Iterable[str]): Manga URLs
+
+        Returns:
+            Dict[str, str]: Mapping of URL to id, for the stored manga only
+        """
+        with self.session_factory() as session:
+            return self._manga_ids(session, list(urls))
+
+    def listing_states(self, urls: Iterable[str]) -> Dict[str, Tuple[Optional[str], Optional[float]]]:
+        """
+        Look up the status and rating of stored manga by URL.
+
+        Args:
+            urls (Iterable[str]): Manga URLs
+
+        Returns:
+            Dict[str, Tuple[str | None, float | None]]: Mapping of URL to (status, rate),
+            for the stored manga only
+        """
+        urls = list(urls)
+        states: Dict[str, Tuple[Optional[str], Optional[float]]] = {}
+        with self.session_factory() as session:
+            for i in range(0, len(urls), BATCH_SIZE):
+                for url, status, rate in session.execute(
+                    select(MangaDB.url, MangaDB.status, MangaDB.rate).where(MangaDB.url.in_(urls[i:i + BATCH_SIZE]))
+                ):
+                    states[url] = (status, rate)
+        return states
+
+    def existing_chapter_urls(self, urls: Iterable[str]) -> Set[str]:
+        """
+        Return the subset of URLs already stored in the chapter table.
+
+        Args:
+            urls (Iterable[str]): Chapter URLs to check
+
+        Returns:
+            Set[str]: URLs that already exist
+        """
+        urls = list(urls)
+        found: Set[str] = set()
+        with self.session_factory() as session:
+            for i in range(0, len(urls), BATCH_SIZE):
+                found.update(session.scalars(
+                    select(ChapterDB.url).where(ChapterDB.url.in_(urls[i:i + BATCH_SIZE]))
+                ))
+        return found
+
+    def get_manga(self, manga_id: str) -> Optional[MangaDB]:
+        """
+        Load a manga row by id.
+
+        Args:
+            manga_id (str): Manga id
+
+        Returns:
+            Optional[MangaDB]: The detached manga row, or None
+        """
+        with self.session_factory() as session:
+            return session.get(MangaDB, manga_id)
+
+    def get_manga_by_url(self, url: str) -> Optional[MangaDB]:
+        """
+        Load a manga row by URL.
+
+        Args:
+            url (str): Manga URL
+
+        Returns:
+            Optional[MangaDB]: The detached manga row, or None
+        """
+        with self.session_factory() as session:
+            return session.scalars(select(MangaDB).where(MangaDB.url == url)).first()
+
+    def stored_details(self, url: str) -> Optional[MangaDetails]:
+        """
+        Rebuild the scraped details of a stored manga.
+
+        Args:
+            url (str): Manga URL
+
+        Returns:
+            Optional[MangaDetails]: Details with the chapters in reading order, or None
+        """
+        with self.session_factory() as session:
+            manga = session.scalars(select(MangaDB).where(MangaDB.url == url)).first()
+            if manga is None:
+                return None
+            genres = session.scalars(select(GenreDB.name).where(GenreDB.manga_id == manga.id)).all()
+            chapters = session.execute(
+                select(ChapterDB.url, ChapterDB.title)
+                .where(ChapterDB.manga_id == manga.id)
+                .order_by(ChapterDB.sort_key, ChapterDB.order_no)
+            ).all()
+            return MangaDetails(
+                url=manga.url, title=manga.title, poster=manga.poster or "", genres=list(genres),
+                status=manga.status or "Unknown", rate=manga.rate or 0.0,
+                description=manga.description or "",
+                chapters=[ChapterDetailed(url=chapter_url, title=title, order_no=n)
+                          for n, (chapter_url, title) in enumerate(chapters)],
+            )
+
+    def manga_stats(self, manga_id: str) -> Tuple[int, int]:
+        """
+        Count total and fully downloaded chapters of a manga.
+
+        A chapter is downloaded when it has images and none of them
+        is still pending.
+
+        Args:
+            manga_id (str): Manga id
+
+        Returns:
+            Tuple[int, int]: (total chapters, downloaded chapters)
+        """
+        has_images = exists().where(ChapterImageDB.chapter_id == ChapterDB.id)
+        has_pending = exists().where(and_(ChapterImageDB.chapter_id == ChapterDB.id,
+                                          ChapterImageDB.is_downloaded.is_(False)))
+        with self.session_factory() as session:
+            total = session.scalar(select(func.count()).where(ChapterDB.manga_id == manga_id))
+            downloaded = session.scalar(
+                select(func.count()).where(ChapterDB.manga_id == manga_id, has_images, ~has_pending)
+            )
+        return total or 0, downloaded or 0
+
+    @DB_WRITE_SECONDS.labels("set_poster").time()
+    def set_poster(self, manga_id: str, data: bytes, mime_type: str) -> None:
+        """
+        Store the poster image bytes of a manga.
+
+        Args:
+            manga_id (str): Manga id
+            data (bytes): Image content
+            mime_type (str): Image MIME type
+        """
+        with self.session_factory() as session:
+            session.execute(update(MangaDB).where(MangaDB.id == manga_id)
+                            .values(poster_image=data, poster_mime_type=mime_type))
+            session.commit()
+
+    def missing_posters(self, urls: Iterable[str]) -> Set[str]:
+        """
+        Return the subset of poster URLs without stored images.
+
+        Args:
+            urls (Iterable[str]): Poster URLs to check
+
+        Returns:
+            Set[str]: URLs whose poster is not stored yet
+        """
+        urls = list(set(urls))
+        found: Set[str] = set()
+        with self.session_factory() as session:
+            for i in range(0, len(urls), BATCH_SIZE):
+                found.update(session.scalars(
+                    select(PosterImageDB.url).where(PosterImageDB.url.in_(urls[i:i + BATCH_SIZE])).distinct()
+                ))
+        return set(urls) - found
+
+    def posters_of_stored_manga(self, limit: Optional[int] = None) -> List[str]:
+        """
+        List the poster URLs of stored manga whose poster is not stored yet.
+
+        Args:
+            limit (int, optional): Maximum number of URLs
+
+        Returns:
+            List[str]: Distinct poster URLs
+        """
+        stored = exists().where(PosterImageDB.url == MangaDB.poster)
+        with self.session_factory() as session:
+            return list(session.scalars(
+                select(MangaDB.poster).where(MangaDB.poster.is_not(None), MangaDB.poster != "", ~stored)
+                .distinct().limit(limit)
+            ))
+
+    @DB_WRITE_SECONDS.labels("store_posters").time()
+    def store_posters(self, posters: Dict[str, Dict[str, Tuple[bytes, str, int, int]]]) -> int:
+        """
+        Store resized posters in one transaction.
+
+        Args:
+            posters (Dict[str, Dict[str, Tuple[bytes, str, int, int]]]): By poster URL,
+                then size name: content, MIME type, width and height
+
+        Returns:
+            int: Number of images written
+        """
+        rows = [{"id": get_uuid(), "url": url, "size": size, "data": data, "mime_type": mime_type,
+                 "width": width, "height": height, "created_at": datetime.utcnow()}
+                for url, sizes in posters.items() for size, (data, mime_type, width, height) in sizes.items()]
+        with self.session_factory() as session:
+            if rows:
+                stmt = self._insert(session, PosterImageDB.__table__)
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=[PosterImageDB.url, PosterImageDB.size],
+                    set_={key: stmt.excluded[key] for key in ("data", "mime_type", "width", "height")}
+                )
+                session.execute(stmt, rows)
+            session.commit()
+        return len(rows)
+
+    def get_poster(self, manga_id: str, size: str) -> Optional[Tuple[bytes, str]]:
+        """
+        Load the poster of a manga in one of the standard sizes.
+
+        Posters stored before resizing existed are returned as they are.
+
+        Args:
+            manga_id (str): Manga id
+            size (str): Size name, see posters.POSTER_SIZES
+
+        Returns:
+            Optional[Tuple[bytes, str]]: Image content and MIME type, or None if not stored
+        """
+        with self.session_factory() as session:
+            row = session.execute(
+                select(PosterImageDB.data, PosterImageDB.mime_type)
+                .join(MangaDB, MangaDB.poster == PosterImageDB.url)
+                .where(MangaDB.id == manga_id, PosterImageDB.size == size)
+            ).first()
+            if row is None:
+                row = session.execute(
+                    select(MangaDB.poster_image, MangaDB.poster_mime_type)
+                    .where(MangaDB.id == manga_id, MangaDB.poster_image.is_not(None))
+                ).first()
+        return (row[0], row[1]) if row is not None else None
+
+    def has_poster(self, manga_id: str) -> bool:
+        """
+        Check whether the poster of a manga is stored.
+
+        Args:
+            manga_id (str): Manga id
+
+        Returns:
+            bool: True if a poster can be served locally
+        """
+        resized = exists().where(PosterImageDB.url == MangaDB.poster)
+        with self.session_factory() as session:
+            return bool(session.scalar(
+                select(func.count()).where(MangaDB.id == manga_id, resized | MangaDB.poster_image.is_not(None))
+            ))
+
+    @staticmethod
+    def _chapter_rows(manga_id: str, chapters: Iterable[ChapterDetailed | ChapterRecord],
+                      previous: int = -1) -> List[dict]:
+        """
+        Convert chapter models into insertable rows.
+
+        Each row gets the parsed chapter number and its sort key (see
+        chapters.sort_keys), chapters must be given in reading order.
+
+        Args:
+            manga_id (str): Owning manga id
+            chapters (Iterable[ChapterDetailed | ChapterRecord]): Chapters to convert
+            previous (int): Sort key of the chapter before the first one
+
+        Returns:
+            List[dict]: Chapter rows
+        """
+        chapters = list(chapters)
+        now = datetime.utcnow()
+        keys = sort_keys(((chapter.title, chapter.url) for chapter in chapters), previous)
+        return [{
+            "id": get_uuid(),
+            "manga_id": manga_id,
+            "order_no": chapter.order_no,
+            "number": number,
+            "sort_key": sort_key,
+            "title": chapter.title,
+            "url": chapter.url,
+            "created_at": now,
+        } for chapter, (number, sort_key) in zip(chapters, keys)]
+
+    def _upsert_chapter_rows(self, session: Session, rows: List[dict], update_keys: bool = True) -> None:
+        """
+        Insert or update chapter rows keyed on their URL.
+
+        Args:
+            session (Session): Open session
+            rows (List[dict]): Chapter rows
+            update_keys (bool): Overwrite the number and sort key of stored chapters
+        """
+        rows = list({row["url"]: row for row in rows}.values())
+        if not rows:
+            return
+        columns = ("manga_id", "order_no", "title") + (("number", "sort_key") if update_keys else ())
+        stmt = self._insert(session, ChapterDB.__table__)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[ChapterDB.url],
+            set_={col: stmt.excluded[col] for col in columns}
+        )
+        session.execute(stmt, rows)
+
+    @DB_WRITE_SECONDS.labels("upsert_chapters").time()
+    def upsert_chapters(self, manga_id: str, chapters: Iterable[ChapterDetailed]) -> Dict[str, str]:
+        """
+        Insert or update a batch of chapters of one manga.
+
+        Unlike upsert_manga, the batch may be a subset of the chapter list:
+        stored chapters keep their sort key and unnumbered new chapters are
+        placed after the last stored one.
+
+        Args:
+            manga_id (str): Owning manga id
+            chapters (Iterable[ChapterDetailed]): Chapters to store, in reading order
+
+        Returns:
+            Dict[str, str]: Mapping of chapter URL to chapter id
+        """
+        chapters = list(chapters)
+        if not chapters:
+            return {}
+        urls = [chapter.url for chapter in chapters]
+        with self.session_factory() as session:
+            previous = session.scalar(
+                select(func.max(ChapterDB.sort_key))
+                .where(ChapterDB.manga_id == manga_id, ChapterDB.url.not_in(urls))
+            )
+            rows = self._chapter_rows(manga_id, chapters, -1 if previous is None else previous)
+            self._upsert_chapter_rows(session, rows, update_keys=False)
+            session.commit()
+            return dict(session.execute(
+                select(ChapterDB.url, ChapterDB.id).where(ChapterDB.url.in_(urls))
+            ).tuples().all())
+
+    def chapter_count(self, manga_id: str) -> int:
+        """
+        Count the chapters stored for a manga.
+
+        Args:
+            manga_id (str): Manga id
+
+        Returns:
+            int: Number of chapters
+        """
+        with self.session_factory() as session:
+            return session.scalar(select(func.count()).where(ChapterDB.manga_id == manga_id)) or 0
+
+    def chapter_position(self, manga_id: str, sort_key: int) -> int:
+        """
+        Count the chapters of a manga sorted before a key.
+
+        Args:
+            manga_id (str): Manga id
+            sort_key (int): Chapter sort key
+
+        Returns:
+            int: Position of a chapter with this key in reading order
+        """
+        with self.session_factory() as session:
+            return session.scalar(select(func.count()).where(
+                ChapterDB.manga_id == manga_id, ChapterDB.sort_key < sort_key)) or 0
+
+    def adjacent_chapter(self, chapter_id: str, step: int = 1) -> Optional[ChapterDB]:
+        """
+        Find the next or previous chapter in reading order.
+
+        Args:
+            chapter_id (str): Chapter id
+            step (int): 1 for the next chapter, -1 for the previous one
+
+        Returns:
+            Optional[ChapterDB]: The adjacent chapter, or None at either end
+        """
+        with self.session_factory() as session:
+            current = session.get(ChapterDB, chapter_id)
+            if current is None:
+                return None
+            position, here = tuple_(*READING_ORDER), tuple_(*reading_position(current))
+            return session.scalars(
+                select(ChapterDB)
+                .where(ChapterDB.manga_id == current.manga_id, position > here if step > 0 else position < here)
+                .order_by(*(READING_ORDER if step > 0 else (column.desc() for column in READING_ORDER)))
+                .limit(1)
+            ).first()
+
+    def chapters_after(self, manga_id: str, sort_key: int | Tuple[int, int, str] = -1,
+                       limit: int = 100) -> List[ChapterDB]:
+        """
+        List the chapters of a manga following a position, in reading order.
+
+        Pass the reading_position() of the last chapter known to the caller
+        to page through chapters sharing a sort key without skipping any.
+
+        Args:
+            manga_id (str): Manga id
+            sort_key (int | Tuple[int, int, str]): Reading position of the last chapter
+                known to the caller, or a bare sort key (-1 for all)
+            limit (int): Maximum number of chapters
+
+        Returns:
+            List[ChapterDB]: Detached chapter rows
+        """
+        after = (tuple_(*READING_ORDER) > tuple_(*sort_key) if isinstance(sort_key, tuple)
+                 else ChapterDB.sort_key > sort_key)
+        with self.session_factory() as session:
+            return list(session.scalars(
+                select(ChapterDB)
+                .where(ChapterDB.manga_id == manga_id, after)
+                .order_by(*READING_ORDER)
+                .limit(limit)
+            ))
+
+    def get_chapter(self, chapter_id: str) -> Optional[ChapterDB]:
+        """
+        Load a chapter row by id.
+
+        Args:
+            chapter_id (str): Chapter id
+
+        Returns:
+            Optional[ChapterDB]: The detached chapter row, or None
+        """
+        with self.session_factory() as session:
+            return session.get(ChapterDB, chapter_id)
+
+    def get_chapter_by_url(self, url: str) -> Optional[ChapterDB]:
+        """
+        Load a chapter row by URL.
+
+        Args:
+            url (str): Chapter URL
+
+        Returns:
+            Optional[ChapterDB]: The detached chapter row, or None
+        """
+        with self.session_factory() as session:
+            return session.scalars(select(ChapterDB).where(ChapterDB.url == url)).first()
+
+    @DB_WRITE_SECONDS.labels("mark_chapter_downloaded").time()
+    def mark_chapter_downloaded(self, chapter_id: str, pdf_path: Optional[str] = None) -> None:
+        """
+        Record that a chapter has been downloaded.
+
+        Args:
+            chapter_id (str): Chapter id
+            pdf_path (str, optional): Path of the generated PDF
+        """
+        with self.session_factory() as session:
+            session.execute(update(ChapterDB).where(ChapterDB.id == chapter_id)
+                            .values(pdf_path=pdf_path, downloaded_at=datetime.utcnow()))
+            session.commit()
+
+    def chapter_status(self, chapter_id: str) -> Tuple[int, int]:
+        """
+        Count total and downloaded images of a chapter.
+
+        Args:
+            chapter_id (str): Chapter id
+
+        Returns:
+            Tuple[int, int]: (total images, downloaded images)
+        """
+        with self.session_factory() as session:
+            total, downloaded = session.execute(
+                select(func.count(ChapterImageDB.id),
+                       func.coalesce(func.sum(case((ChapterImageDB.is_downloaded, 1), else_=0)), 0))
+                .where(ChapterImageDB.chapter_id == chapter_id)
+            ).one()
+        return total, downloaded
+
+    @DB_WRITE_SECONDS.labels("upsert_chapter_images").time()
+    def upsert_chapter_images(self, chapter_id: str, images: Iterable[ChapterImage]) -> int:
+        """
+        Insert or update the image list of a chapter.
+
+        Existing rows keep their download state, only the URL is refreshed.
+
+        Args:
+            chapter_id (str): Owning chapter id
+            images (Iterable[ChapterImage]): Images in reading order
+
+        Returns:
+            int: Number of images written
+        """
+        rows = [{"id": get_uuid(), "chapter_id": chapter_id, "order_no": image.order_no,
+                 "url": image.url, "is_downloaded": False} for image in images]
+        with self.session_factory() as session:
+            if rows:
+                stmt = self._insert(session, ChapterImageDB.__table__)
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=[ChapterImageDB.chapter_id, ChapterImageDB.order_no],
+                    set_={"url": stmt.excluded.url}
+                )
+                session.execute(stmt, rows)
+            session.commit()
+        return len(rows)
+
+    def pending_images(self, chapter_id: str) -> List[Tuple[int, str]]:
+        """
+        List the images of a chapter that are not downloaded yet.
+
+        Args:
+            chapter_id (str): Chapter id
+
+        Returns:
+            List[Tuple[int, str]]: (order number, URL) pairs in reading order
+        """
+        with self.session_factory() as session:
+            return list(session.execute(
+                select(ChapterImageDB.order_no, ChapterImageDB.url)
+                .where(ChapterImageDB.chapter_id == chapter_id, ChapterImageDB.is_downloaded.is_(False))
+                .order_by(ChapterImageDB.order_no)
+            ).tuples().all())
+
+    @DB_WRITE_SECONDS.labels("mark_images_downloaded").time()
+    def mark_images_downloaded(self, chapter_id: str,
+                               images: Iterable[Tuple[int, Optional[bytes], Optional[str], Optional[str]]]) -> int:
+        """
+        Record downloaded images of a chapter in one transaction.
+
+        Args:
+            chapter_id (str): Chapter id
+            images: (order number, data, MIME type, local path) tuples, data
+                or path may be None when the image is only stored one way
+
+        Returns:
+            int: Number of images updated
+        """
+        params = [{"b_order_no": order_no, "image_data": data, "mime_type": mime_type,
+                   "local_path": local_path} for order_no, data, mime_type, local_path in images]
+        if not params:
+            return 0
+        stmt = (update(ChapterImageDB.__table__)
+                .where(ChapterImageDB.chapter_id == chapter_id,
+                       ChapterImageDB.order_no == bindparam("b_order_no"))
+                .values(image_data=bindparam("image_data"), mime_type=bindparam("mime_type"),
+                        local_path=bindparam("local_path"), is_downloaded=True))
+        with self.session_factory() as session:
+            session.execute(stmt, params)
+            session.commit()
+        return len(params)
+
+    def stored_chapter_images(self, chapter_url: str) -> Optional[List[ChapterImage]]:
+        """
+        Load the stored image list of a chapter.
+
+        Args:
+            chapter_url (str): Chapter URL
+
+        Returns:
+            Optional[List[ChapterImage]]: Images in reading order, or None when none is stored
+        """
+        with self.session_factory() as session:
+            rows = session.execute(
+                select(ChapterImageDB.order_no, ChapterImageDB.url)
+                .join(ChapterDB, ChapterDB.id == ChapterImageDB.chapter_id)
+                .where(ChapterDB.url == chapter_url)
+                .order_by(ChapterImageDB.order_no)
+            ).all()
+        return [ChapterImage(order_no=order_no, url=url) for order_no, url in rows] or None
+
+    def get_image(self, chapter_id: str, order_no: int) -> Optional[ChapterImageDB]:
+        """
+        Load one chapter image row.
+
+        Args:
+            chapter_id (str): Chapter id
+            order_no (int): Image number
+
+        Returns:
+            Optional[ChapterImageDB]: The detached image row, or None
+        """
+        with self.session_factory() as session:
+            return session.scalars(select(ChapterImageDB).where(
+                ChapterImageDB.chapter_id == chapter_id, ChapterImageDB.order_no == order_no
+            )).first()
+
+    def chapter_pdf(self, chapter_id: str) -> Optional[bytes]:
+        """
+        Build a PDF from the downloaded images of a chapter.
+
+        The PDF written by the downloader is served as is while it exists.
+
+        Args:
+            chapter_id (str): Chapter id
+
+        Returns:
+            Optional[bytes]: PDF content, or None when no image is downloaded
+        """
+        import img2pdf
+        with self.session_factory() as session:
+            pdf_path = session.scalar(select(ChapterDB.pdf_path).where(ChapterDB.id == chapter_id))
+            if pdf_path and os.path.isfile(pdf_path):
+                with open(pdf_path, "rb") as f:
+                    return f.read()
+            rows = session.execute(
+                select(ChapterImageDB.image_data, ChapterImageDB.local_path)
+                .where(ChapterImageDB.chapter_id == chapter_id, ChapterImageDB.is_downloaded.is_(True))
+                .order_by(ChapterImageDB.order_no)
+            ).all()
+        pages = [data if data is not None else path for data, path in rows if data is not None or path]
+        if not pages:
+            return None
+        return img2pdf.convert(pages)
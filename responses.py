@@ -0,0 +1,184 @@
+"""
+Fast JSON responses and negotiated compression.
+
+Large payloads (``/manga`` on a long webtoon lists thousands of chapters)
+used to go through ``json.dumps`` uncompressed. Responses are now encoded
+with orjson, or straight from the pydantic models by pydantic-core's
+serializer, and compressed with the best encoding the client accepts among
+zstd, brotli and gzip once they exceed a size threshold.
+
+Brotli needs the ``brotli`` package and zstd either Python 3.14's
+``compression.zstd`` or the ``zstandard`` package; encodings whose library
+is missing are simply not offered.
+"""
+
+import gzip
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+import pydantic_core
+from pydantic import BaseModel
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+def dumps(content: Any) -> bytes:
+    """
+    Encode content as JSON.
+
+    Pydantic models (and lists of them) are serialized by pydantic-core
+    without building intermediate dicts, other content by orjson when
+    installed.
+
+    Args:
+        content (Any): Models, or JSON-compatible data
+
+    Returns:
+        bytes: Compact JSON
+    """
+    if orjson is not None and not isinstance(content, BaseModel) and \
+            not (isinstance(content, list) and content and isinstance(content[0], BaseModel)):
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+    return pydantic_core.to_json(content)
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSON response encoded with dumps().
+
+    Endpoints returning large models can return ``FastJSONResponse(model)``
+    to skip FastAPI's re-validation of the response model.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+def _encoders() -> Dict[str, Callable[[bytes], bytes]]:
+    """Available encoders, by preference."""
+    encoders: Dict[str, Callable[[bytes], bytes]] = {}
+    try:
+        from compression import zstd
+        encoders["zstd"] = lambda data: zstd.compress(data, level=3)
+    except ImportError:
+        try:
+            import zstandard
+            compressor = zstandard.ZstdCompressor(level=3)
+            encoders["zstd"] = lambda data: compressor.compress(data)
+        except ImportError:
+            pass
+    try:
+        import brotli
+        encoders["br"] = lambda data: brotli.compress(data, quality=5)
+    except ImportError:
+        pass
+    encoders["gzip"] = lambda data: gzip.compress(data, compresslevel=6)
+    return encoders
+
+ENCODERS = _encoders()
+
+def negotiate(accept_encoding: str, available: Iterable[str] = ENCODERS) -> Optional[str]:
+    """
+    Pick a content encoding from an Accept-Encoding header.
+
+    The highest quality wins, ties go to the first available encoding
+    (zstd, then brotli, then gzip). ``*`` matches any available encoding.
+
+    Args:
+        accept_encoding (str): Accept-Encoding header value
+        available (Iterable[str]): Supported encodings, by preference
+
+    Returns:
+        str | None: The encoding, or None to send the body as is
+    """
+    qualities: Dict[str, float] = {}
+    for item in accept_encoding.lower().split(","):
+        name, _, params = item.strip().partition(";")
+        q = 1.0
+        if params.strip().startswith("q="):
+            try:
+                q = float(params.strip()[2:])
+            except ValueError:
+                q = 0.0
+        qualities[name.strip()] = q
+    best, best_q = None, 0.0
+    for name in available:
+        q = qualities.get(name, qualities.get("*", 0.0))
+        if q > best_q:
+            best, best_q = name, q
+    return best
+
+# Media types worth compressing, images and PDFs already are
+COMPRESSIBLE = ("application/json", "text/", "application/x-ndjson", "application/javascript")
+
+class CompressionMiddleware:
+    """
+    ASGI middleware compressing responses with the negotiated encoding.
+
+    Only complete bodies are compressed: a response sent in several chunks
+    (streams, Server-Sent Events, files) passes through untouched so it is
+    never buffered.
+
+    Attributes:
+        minimum_size (int): Bodies smaller than this are sent as is
+    """
+
+    def __init__(self, app, minimum_size: int = 1024):
+        """
+        Wrap an ASGI application.
+
+        Args:
+            app: ASGI application
+            minimum_size (int): Bodies smaller than this are sent as is
+        """
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        accept = next((value.decode("latin-1") for key, value in scope["headers"] if key == b"accept-encoding"), "")
+        encoding = negotiate(accept) if accept else None
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start: Optional[dict] = None
+
+        async def send_compressed(message: dict) -> None:
+            nonlocal start
+            if message["type"] == "http.response.start":
+                start = message
+                return
+            if message["type"] != "http.response.body" or start is None:
+                await send(message)
+                return
+            pending, start = start, None
+            body = message.get("body", b"")
+            if message.get("more_body") or not self._should_compress(pending["headers"], body):
+                await send(pending)
+                await send(message)
+                return
+            body = ENCODERS[encoding](body)
+            headers: List[tuple] = [(k, v) for k, v in pending["headers"] if k.lower() != b"content-length"]
+            headers += [(b"content-encoding", encoding.encode()), (b"content-length", str(len(body)).encode())]
+            if not any(k.lower() == b"vary" for k, _ in headers):
+                headers.append((b"vary", b"Accept-Encoding"))
+            await send({**pending, "headers": headers})
+            await send({"type": "http.response.body", "body": body})
+
+        await self.app(scope, receive, send_compressed)
+
+    def _should_compress(self, headers: List[tuple], body: bytes) -> bool:
+        """Check the size, type and existing encoding of a complete response."""
+        if len(body) < self.minimum_size:
+            return False
+        content_type = b""
+        for key, value in headers:
+            key = key.lower()
+            if key == b"content-encoding":
+                return False
+            if key == b"content-type":
+                content_type = value
+        return content_type.decode("latin-1").startswith(COMPRESSIBLE)
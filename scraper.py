@@ -15,48 +15,54 @@ Key Features:
 - Automatic resource cleanup
 - Database integration to save manga data
 - Progress tracking with terminal progress bars
-- File-based logging with Unicode support
+- Structured logging configured by the entry points (see logging_config)
 
 Dependencies:
 - requests: For HTTP requests with retry capabilities
 - selectolax: For HTML parsing
-- img2pdf: For converting images to PDF
+- img2pdf: For converting images to PDF (imported when a PDF is built)
 - SQLAlchemy: For database interaction
-- tqdm: For progress bar visualization
+- tqdm: For progress bar visualization (imported by the crawler)
+
+Heavy dependencies are imported by the functions that need them, so importing
+this module for searches and details (the API) stays cheap.
 """
 
 import logging
+import mimetypes
+import os
 from functools import cached_property
 from models import MangaSearchResult, ChapterLatest, ChapterDetailed, MangaDetails, ChapterImage
-from typing import List, Set
+from records import MangaRecord, ListingCard
+from integrity import check_image, ImageIntegrityError, IncompleteDownloadError
+import deadlines
+from deadlines import DeadlineExceeded
+from breaker import BreakerRegistry, CircuitOpenError
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, Iterator, List, Set, Tuple
 import requests
 from selectolax.lexbor import LexborHTMLParser, LexborNode
-import img2pdf
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed, wait, FIRST_COMPLETED
 from pathlib import Path
-import tempfile
-from database import get_db_session, close_db_session, init_db
-from db_models import MangaDB, GenreDB, ChapterDB, ChapterImageDB, get_uuid
-from sqlalchemy.exc import IntegrityError
-from tqdm import tqdm
-
-# Configure logging to file only with UTF-8 encoding
-def setup_logging():
-    """Configure logging to write to a file with UTF-8 encoding."""
-    log_file = Path(__file__).parent / "scraper.log"
-    logging.basicConfig(
-        level=logging.DEBUG,
-        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        handlers=[
-            logging.FileHandler(log_file, encoding='utf-8')
-        ]
-    )
+import shutil
+import threading
+import time
+from urllib.parse import urlsplit
+from metrics import observe_upstream, PARSE_SECONDS, UPSTREAM_HEDGES
+import tracing
+
+if TYPE_CHECKING:
+    from repository import MangaRepository
+    from image_cache import DiskImageCache
+    from posters import PosterPipeline
 
-setup_logging()
 logger = logging.getLogger(__name__)
 
+# Base URL of the upstream site, MANGA_UPSTREAM_URL points the scrapers at a stand-in (see fake_upstream)
+UPSTREAM_URL = os.environ.get("MANGA_UPSTREAM_URL", "https://azoramoon.com").rstrip("/")
+
 # Global session instance for connection pooling and retry handling
 _session = None
 
@@ -84,7 +90,7 @@ def get_session(retries: int = 3, backoff_factor: float = 0.3, status_forcelist=
     global _session
     if _session is None:
         s = requests.Session()
-        retry = Retry(total=retries, backoff_factor=backoff_factor,
+        retry = DeadlineRetry(total=retries, backoff_factor=backoff_factor,
                       status_forcelist=status_forcelist, allowed_methods=frozenset(['GET', 'POST']))
         adapter = HTTPAdapter(max_retries=retry)
         s.mount("https://", adapter)
@@ -93,7 +99,211 @@ def get_session(retries: int = 3, backoff_factor: float = 0.3, status_forcelist=
         _session = s
     return _session
 
-def get_content(url: str, params: dict | None = None, timeout: float = 10.0) -> bytes:
+class DeadlineRetry(Retry):
+    """Retry policy that gives up when the next attempt would end after the deadline of the thread."""
+
+    def increment(self, method=None, url=None, response=None, error=None, _pool=None, _stacktrace=None):
+        retry = super().increment(method, url, response, error, _pool, _stacktrace)
+        if not deadlines.retry_fits(retry.get_backoff_time()):
+            if response is not None:
+                response.drain_conn()
+            raise DeadlineExceeded(f"No time left to retry {url}") from error
+        return retry
+
+class RateLimiter:
+    """
+    Token bucket limiting the rate of upstream requests.
+
+    Attributes:
+        rate (float): Sustained requests per second
+        burst (float): Maximum number of requests sent back to back
+    """
+
+    def __init__(self, rate: float, burst: float | None = None):
+        """
+        Initialize the limiter.
+
+        Args:
+            rate (float): Sustained requests per second
+            burst (float, optional): Bucket size, defaults to max(1, rate)
+        """
+        self.rate = rate
+        self.burst = burst or max(1.0, rate)
+        self._tokens = self.burst
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """Block until a request may be sent."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+# Global limiter shared by all upstream requests, disabled by default
+_rate_limiter: RateLimiter | None = None
+
+def set_rate_limit(rate: float | None, burst: float | None = None) -> None:
+    """
+    Limit upstream requests of this process to a number per second.
+
+    Args:
+        rate (float, optional): Requests per second, None or 0 disables the limit
+        burst (float, optional): Maximum number of requests sent back to back
+    """
+    global _rate_limiter
+    _rate_limiter = RateLimiter(rate, burst) if rate else None
+
+def _init_crawl_process(rate: float | None, burst: float | None) -> None:
+    """
+    Prepare a crawler worker process.
+
+    The child gets its own HTTP session and rate limiter (with its share of
+    the parent's rate), and configures logging again since the queue
+    listener of the parent does not exist after the fork.
+    """
+    global _session
+    from logging_config import setup_logging
+    setup_logging()
+    _session = None
+    set_rate_limit(rate, burst)
+
+def _throttle() -> None:
+    """Wait for the global rate limiter, if any."""
+    if _rate_limiter is not None:
+        _rate_limiter.acquire()
+
+class HedgePolicy:
+    """
+    Send a duplicate request when the first one is slower than usual.
+
+    The hedge fires once the first attempt has been running longer than the
+    ``quantile`` of recent latencies to the same host, and whichever
+    response arrives first is used. This bounds the tail latency caused by
+    a single slow upstream response at the cost of a few percent of extra
+    requests. The delay is counted from the moment the first attempt starts,
+    so time spent waiting for a free worker thread never triggers a hedge.
+
+    Attributes:
+        quantile (float): Latency percentile after which the hedge is sent
+        min_delay (float): Lower bound of the hedge delay in seconds
+        initial_delay (float): Hedge delay until enough latencies are known
+    """
+
+    # Latencies kept per host, and needed before the percentile is trusted
+    WINDOW = 200
+    MIN_SAMPLES = 20
+
+    def __init__(self, quantile: float = 95.0, min_delay: float = 0.05, initial_delay: float = 1.0,
+                 max_workers: int = 16):
+        """
+        Initialize the policy.
+
+        Args:
+            quantile (float): Latency percentile after which the hedge is sent
+            min_delay (float): Lower bound of the hedge delay in seconds
+            initial_delay (float): Hedge delay until enough latencies are known
+            max_workers (int): Concurrent attempts, size it to twice the threads calling fetch()
+        """
+        self.quantile = quantile
+        self.min_delay = min_delay
+        self.initial_delay = initial_delay
+        self._latencies: Dict[str, deque] = defaultdict(lambda: deque(maxlen=self.WINDOW))
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="hedge")
+
+    def observe(self, host: str, seconds: float) -> None:
+        """Record the latency of a successful request."""
+        self._latencies[host].append(seconds)
+
+    def delay(self, host: str) -> float:
+        """Current hedge delay for a host."""
+        latencies = self._latencies[host]
+        if len(latencies) < self.MIN_SAMPLES:
+            return self.initial_delay
+        return max(self.min_delay, tracing.percentile(sorted(latencies), self.quantile))
+
+    def fetch(self, host: str, fn: Callable[[], requests.Response]) -> requests.Response:
+        """
+        Run a fetch, hedging it when it is slow.
+
+        Args:
+            host (str): Upstream host, selects the latency history
+            fn (Callable): Fetch to run, called up to twice
+
+        Returns:
+            requests.Response: The first successful response
+
+        Raises:
+            DeadlineExceeded: If the deadline passes before a response arrives
+            requests.RequestException: If both attempts fail
+        """
+        at = deadlines.deadline_at()
+        started = threading.Event()
+
+        def first() -> requests.Response:
+            started.set()
+            return fn()
+
+        primary = self._executor.submit(deadlines.run_until, at, first)
+        left = deadlines.remaining()
+        if not started.wait(None if left is None else max(left, 0)):
+            primary.cancel()
+            raise DeadlineExceeded(f"Deadline exceeded waiting for a worker to fetch from {host}")
+        left = deadlines.remaining()
+        done, _ = wait([primary], timeout=self.delay(host) if left is None else min(self.delay(host), max(left, 0)))
+        if done:
+            return primary.result()
+        deadlines.check("hedging")
+        hedge = self._executor.submit(deadlines.run_until, at, fn)
+        pending = {primary, hedge}
+        error: BaseException | None = None
+        while pending:
+            left = deadlines.remaining()
+            done, pending = wait(pending, timeout=None if left is None else max(left, 0), return_when=FIRST_COMPLETED)
+            if not done:
+                raise DeadlineExceeded(f"Deadline exceeded waiting for {host}")
+            for fut in done:
+                if fut.exception() is None:
+                    UPSTREAM_HEDGES.labels(host, "primary" if fut is primary else "hedge").inc()
+                    return fut.result()
+                error = fut.exception()
+        raise error
+
+# Hedging of page fetches, disabled by default
+_hedge_policy: HedgePolicy | None = None
+
+def set_hedging(quantile: float | None, **kwargs) -> None:
+    """
+    Hedge page fetches of this process after a latency percentile.
+
+    Args:
+        quantile (float, optional): Percentile such as 95, None or 0 disables hedging
+        **kwargs: Other HedgePolicy arguments
+    """
+    global _hedge_policy
+    _hedge_policy = HedgePolicy(quantile, **kwargs) if quantile else None
+
+# Circuit breakers of upstream hosts, disabled by default
+_breakers: BreakerRegistry | None = None
+
+def set_circuit_breakers(enabled: bool = True, **settings) -> None:
+    """
+    Reject requests to failing or slow hosts immediately (see breaker.CircuitBreaker).
+
+    Args:
+        enabled (bool): False removes the breakers
+        **settings: CircuitBreaker arguments
+    """
+    global _breakers
+    _breakers = BreakerRegistry(**settings) if enabled else None
+
+def get_content(url: str, params: dict | None = None, timeout: float = 10.0, hedge: bool = False) -> bytes:
     """
     Fetch raw content from a URL with optional parameters.
 
@@ -104,6 +314,7 @@ def get_content(url: str, params: dict | None = None, timeout: float = 10.0) ->
         url (str): The URL to fetch content from
         params (dict, optional): Query parameters to include in the request
         timeout (float): Request timeout in seconds
+        hedge (bool): Allow a duplicate request when slow (see set_hedging)
 
     Returns:
         bytes: Raw content from the URL
@@ -117,12 +328,88 @@ def get_content(url: str, params: dict | None = None, timeout: float = 10.0) ->
         >>> with open('image.jpg', 'wb') as f:
         ...     f.write(content)
     """
-    if params is None:
-        params = {}
-    session = get_session()
-    resp = session.get(url, params=params, timeout=timeout, stream=True)
+    return get_response(url, params=params, timeout=timeout, hedge=hedge).content
+
+def _retries_of(resp: requests.Response) -> int:
+    """
+    Count the retries urllib3 performed for a response.
+
+    Args:
+        resp (requests.Response): Received response
+
+    Returns:
+        int: Number of retries
+    """
+    retries = getattr(resp.raw, "retries", None)
+    return len(retries.history) if retries is not None else 0
+
+def get_response(url: str, params: dict | None = None, timeout: float = 10.0,
+                 hedge: bool = False) -> requests.Response:
+    """
+    Fetch a URL through the shared session and record upstream metrics.
+
+    The request count, latency including retries, retry count and body size
+    are recorded per host and status code before errors are raised. Inside
+    a deadline (see deadlines), attempts and retries are cut to fit the
+    remaining budget.
+
+    Args:
+        url (str): The URL to fetch
+        params (dict, optional): Query parameters to include in the request
+        timeout (float): Request timeout in seconds
+        hedge (bool): Allow a duplicate request when slow, if hedging is enabled
+
+    Returns:
+        requests.Response: Response with its body loaded
+
+    Raises:
+        requests.RequestException: If the request fails after all retries
+        DeadlineExceeded: If the deadline passes first
+        CircuitOpenError: If the circuit breaker of the host is open
+    """
+    host = urlsplit(url).netloc
+    policy = _hedge_policy
+    if hedge and policy is not None:
+        return policy.fetch(host, lambda: _fetch(host, url, params, timeout))
+    return _fetch(host, url, params, timeout)
+
+def _fetch(host: str, url: str, params: dict | None, timeout: float) -> requests.Response:
+    """Send one request, with the retries of the shared session."""
+    deadlines.check(f"fetching {url}")
+    breaker = _breakers.get(host) if _breakers is not None else None
+    if breaker is not None:
+        try:
+            breaker.before()
+        except CircuitOpenError:
+            observe_upstream(host, "circuit_open", 0.0)
+            raise
+    _throttle()
+    attempt = deadlines.attempt_timeout(timeout)
+    start = time.perf_counter()
+    try:
+        with tracing.stage("fetch"):
+            resp = get_session().get(url, params=params or {}, timeout=attempt)
+    except BaseException as e:
+        elapsed = time.perf_counter() - start
+        observe_upstream(host, "deadline" if isinstance(e, DeadlineExceeded) else "error", elapsed)
+        if breaker is not None:
+            # Only failures of the upstream count: not a timeout the caller's deadline shortened
+            if isinstance(e, requests.RequestException) and not (
+                    isinstance(e, requests.Timeout) and attempt < timeout):
+                breaker.record(False, elapsed)
+            else:
+                breaker.release()
+        raise
+    elapsed = time.perf_counter() - start
+    if breaker is not None:
+        breaker.record(resp.status_code < 500 and resp.status_code != 429, elapsed)
+    observe_upstream(host, str(resp.status_code), elapsed, _retries_of(resp), len(resp.content))
+    logger.debug("GET %s -> %d in %.3fs", url, resp.status_code, elapsed,
+                 extra={"url": url, "status": resp.status_code, "elapsed": round(elapsed, 4)})
     resp.raise_for_status()
-    return resp.content
+    if _hedge_policy is not None:
+        _hedge_policy.observe(host, elapsed)
+    return resp
 
 def get_html(url: str, params: dict | None = None, timeout: float = 10.0) -> LexborHTMLParser:
     """
@@ -147,8 +434,9 @@ def get_html(url: str, params: dict | None = None, timeout: float = 10.0) -> Lex
         >>> doc = get_html('https://example.com')
         >>> title = doc.css_first('h1').text()
     """
-    src = get_content(url, params=params, timeout=timeout)
-    return LexborHTMLParser(src)
+    src = get_content(url, params=params, timeout=timeout, hedge=True)
+    with PARSE_SECONDS.labels("html").time(), tracing.stage("parse"):
+        return LexborHTMLParser(src)
 
 class SearchResultsScraper:
     """
@@ -163,7 +451,8 @@ class SearchResultsScraper:
         search (str): Search query string
         result_no (int): Total number of results found
         pages (int): Total number of result pages
-        result_nodes (List[LexborHTMLParser]): Raw HTML nodes containing results
+        result_nodes (List[LexborHTMLParser]): Raw HTML nodes containing results, released
+            once they are parsed
         results (List[MangaSearchResult]): Parsed search results
 
     Example:
@@ -188,6 +477,31 @@ class SearchResultsScraper:
         self.result_nodes: List[LexborHTMLParser] = []
         self.results: List[MangaSearchResult] = []
         
+    def iter_result_nodes(self) -> Iterator[List[LexborNode]]:
+        """
+        Fetch search result pages one at a time.
+
+        The first page determines the total number of results and pages,
+        the remaining pages are fetched lazily as the caller iterates.
+
+        Yields:
+            List[LexborNode]: Raw HTML nodes of the results of one page
+        """
+        html = get_html(f"{UPSTREAM_URL}/", {"s": self.search, "post_type": "wp-manga"})
+        try :
+            self.result_no = int(html.css_first("h1").text(strip=True).split(" ")[0])
+            self.pages = self.result_no // SearchResultsScraper.MAX_RESULTS_PER_PAGE + 1
+        except AttributeError :
+            self.result_no = 0
+            self.pages = 0
+            logger.debug("No results found for search: %s", self.search)
+            return
+        yield html.css("div.row.c-tabs-item__content")
+        for i in range(2, self.pages + 1):
+            html = get_html(f"{UPSTREAM_URL}/page{i}/", {"s": self.search, "post_type": "wp-manga"})
+            yield html.css("div.row.c-tabs-item__content")
+        logger.debug("Found %d results across %d pages for search: %s", self.result_no, self.pages, self.search)
+
     def post_result_nodes(self) :
         """
         Fetch and store raw HTML nodes containing search results.
@@ -196,16 +510,10 @@ class SearchResultsScraper:
         of pages. If there are multiple pages, it fetches all remaining pages.
         The raw HTML nodes are stored for later parsing.
         """
-        html = get_html("https://azoramoon.com/", {"s": self.search, "post_type": "wp-manga"})
+        self.result_nodes = []
         try :
-            self.result_no = int(html.css_first("h1").text(strip=True).split(" ")[0])
-            self.pages = self.result_no // SearchResultsScraper.MAX_RESULTS_PER_PAGE + 1
-            self.result_nodes += html.css("div.row.c-tabs-item__content")
-            if self.pages > 1:
-                for i in range(2, self.pages + 1):
-                    html = get_html(f"https://azoramoon.com/page{i}/", {"s": self.search, "post_type": "wp-manga"})
-                    self.result_nodes += html.css("div.row.c-tabs-item__content")
-            logger.debug("Found %d results across %d pages for search: %s", self.result_no, self.pages, self.search)
+            for nodes in self.iter_result_nodes():
+                self.result_nodes += nodes
         except AttributeError :
             self.result_no = 0
             self.pages = 0
@@ -219,6 +527,20 @@ class SearchResultsScraper:
         This method extracts all relevant information from the HTML node including
         title, URL, cover image, genres, status, rating, and latest chapter.
 
+        Args:
+            result_node (LexborNode): HTML node containing the manga information
+
+        Returns:
+            MangaSearchResult: Parsed manga search result
+        """
+        with PARSE_SECONDS.labels("SearchResultsScraper").time():
+            return self._parse_result(result_node)
+    
+    @staticmethod
+    def _parse_result(result_node: LexborNode) -> MangaSearchResult:
+        """
+        Extract a MangaSearchResult from a search result node.
+
         Args:
             result_node (LexborNode): HTML node containing the manga information
 
@@ -256,8 +578,27 @@ class SearchResultsScraper:
 
         This method processes all the raw HTML nodes collected by post_result_nodes()
         and converts them into MangaSearchResult objects for easy access to the data.
+        The nodes are released afterwards so the parsed pages can be freed.
         """
         self.results += [self.get_result(node) for node in self.result_nodes]
+        self.result_nodes = []
+    
+    def iter_results(self) -> Iterator[MangaSearchResult]:
+        """
+        Fetch and parse search results, yielding each one as soon as it is parsed.
+
+        The time to the first result is a single page fetch, the following
+        pages are only requested as the caller keeps iterating. Parsed results
+        are also appended to ``results``.
+
+        Yields:
+            MangaSearchResult: Parsed search results in page order
+        """
+        for nodes in self.iter_result_nodes():
+            for node in nodes:
+                result = self.get_result(node)
+                self.results.append(result)
+                yield result
     
     def prepare_results(self):
         """
@@ -268,10 +609,14 @@ class SearchResultsScraper:
         2. Parsing the HTML nodes
         3. Converting them into MangaSearchResult objects
 
-        Use this method to perform the search and access results.
+        Pages are parsed as they arrive, so only one HTML tree is held in
+        memory at a time. Use this method to perform the search and access results.
+
+        Raises:
+            AttributeError: If a result card does not have the expected markup
         """
-        self.post_result_nodes()
-        self.post_results()
+        for _ in self.iter_results():
+            pass
 
 class MangaDetailsScarper:
     """
@@ -292,15 +637,16 @@ class MangaDetailsScarper:
         >>> print(f"Genres: {', '.join(details.genres)}")
     """
 
-    def __init__(self, manga_url: str) -> None:
+    def __init__(self, manga_url: str, page: LexborHTMLParser | None = None) -> None:
         """
         Initialize the manga details scraper.
 
         Args:
             manga_url (str): URL of the manga to scrape
+            page (LexborHTMLParser, optional): Already parsed manga page, fetched when omitted
         """
         self.manga_url = manga_url
-        self.page = get_html(manga_url)
+        self.page = page if page is not None else get_html(manga_url)
     
     @property
     def title(self) -> str:
@@ -394,20 +740,26 @@ class MangaDetailsScarper:
         Returns:
             List[ChapterDetailed]: List of chapter objects
         """
+        return [
+            ChapterDetailed(order_no=n, url=url, title=title)
+            for n, (url, title) in enumerate(self._chapter_links())
+        ]
+
+    def _chapter_links(self) -> List[Tuple[str, str]]:
+        """
+        Extract the URL and title of every chapter, oldest first.
+
+        Returns:
+            List[Tuple[str, str]]: (url, title) pairs, empty if the page has none
+        """
         try :
-            chapter_nodes = self.page.css("li.wp-manga-chapter")[::-1]
-            if not chapter_nodes :
-                chapters = [
-                    ChapterDetailed(
-                        order_no=n,
-                        url=chapter_node.css_first("a").attrs["href"],
-                        title=chapter_node.css_first("a").text(strip=True)
-                    ) for n, chapter_node in enumerate(chapter_nodes)
-                ]
-                return chapters
+            links = []
+            for chapter_node in reversed(self.page.css("li.wp-manga-chapter")):
+                link_node = chapter_node.css_first("a")
+                links.append((link_node.attrs["href"], link_node.text(strip=True)))
+            return links
         except AttributeError :
-            pass
-        return []
+            return []
 
     @property
     def details(self) -> MangaDetails:
@@ -420,16 +772,103 @@ class MangaDetailsScarper:
         Returns:
             MangaDetails: Complete manga information
         """
-        return MangaDetails(
-            url=self.manga_url,
-            title=self.title,
-            poster=self.poster,
-            genres=self.genres,
-            description=self.description,
-            status=self.status,
-            rate=self.rate,
-            chapters=self.chapters
-        )
+        with PARSE_SECONDS.labels("MangaDetailsScarper").time(), tracing.stage("parse"):
+            return MangaDetails(
+                url=self.manga_url,
+                title=self.title,
+                poster=self.poster,
+                genres=self.genres,
+                description=self.description,
+                status=self.status,
+                rate=self.rate,
+                chapters=self.chapters
+            )
+
+    @property
+    def record(self) -> MangaRecord:
+        """
+        Get complete manga details as a compact record for the crawl pipeline.
+
+        Returns:
+            MangaRecord: Complete manga information
+        """
+        with PARSE_SECONDS.labels("MangaDetailsScarper").time(), tracing.stage("parse"):
+            return MangaRecord.build(
+                self.manga_url, self.title, self.poster, self.genres, self.status, self.rate,
+                self.description, self._chapter_links()
+            )
+
+    # Fields of MangaDetails, in model order
+    DETAIL_FIELDS = tuple(MangaDetails.model_fields)
+
+    def _chapter_slice(self, start: int | None = None, stop: int | None = None,
+                       limit: int | None = None) -> Tuple[List[dict], int]:
+        """
+        Extract a range of chapters, leaving the others unparsed.
+
+        Args:
+            start (int, optional): First position, oldest chapter is 0, negative counts from the newest
+            stop (int, optional): Position after the last one, same convention
+            limit (int, optional): Maximum number of chapters
+
+        Returns:
+            Tuple[List[dict], int]: url, title and order_no of the chapters, oldest first,
+            and the number of chapters of the manga
+        """
+        nodes = self.page.css("li.wp-manga-chapter")
+        positions = range(len(nodes))[start:stop][:limit]
+        chapters = []
+        for n in positions:
+            link_node = nodes[len(nodes) - 1 - n].css_first("a")
+            if link_node is not None:
+                chapters.append({"url": link_node.attrs["href"], "title": link_node.text(strip=True), "order_no": n})
+        return chapters, len(nodes)
+
+    def project(self, fields: Iterable[str] | None = None, chapters_from: int | None = None,
+                chapters_to: int | None = None, limit: int | None = None) -> dict:
+        """
+        Get selected manga details, extracting only what is requested.
+
+        List views asking for a title and a poster never parse the chapter
+        list, and a "latest chapter" widget (``chapters_from=-1``) only
+        parses one entry.
+
+        Args:
+            fields (Iterable[str], optional): Fields of MangaDetails to include, all by default
+            chapters_from (int, optional): First chapter position, oldest is 0, negative counts from the newest
+            chapters_to (int, optional): Position after the last chapter, same convention
+            limit (int, optional): Maximum number of chapters
+
+        Returns:
+            dict: The requested fields, in model order. When chapters are paginated,
+            ``chapters_total`` holds the number of chapters of the manga
+
+        Raises:
+            ValueError: If a field is not a field of MangaDetails
+
+        Example:
+            >>> MangaDetailsScarper(url).project(["title", "chapters"], chapters_from=-1)
+        """
+        fields = set(self.DETAIL_FIELDS if fields is None else fields)
+        unknown = fields.difference(self.DETAIL_FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+        projected = {}
+        with PARSE_SECONDS.labels("MangaDetailsScarper").time(), tracing.stage("parse"):
+            for name in self.DETAIL_FIELDS:
+                if name not in fields:
+                    continue
+                if name == "url":
+                    projected["url"] = self.manga_url
+                elif name == "chapters":
+                    projected["chapters"], total = self._chapter_slice(chapters_from, chapters_to, limit)
+                    if chapters_from is not None or chapters_to is not None or limit is not None:
+                        projected["chapters_total"] = total
+                elif name == "rate":
+                    projected["rate"] = float(self.rate or 0.0)
+                else:
+                    projected[name] = getattr(self, name)
+        return projected
 
 class ChapterImagesScraper:
     """
@@ -468,71 +907,228 @@ class ChapterImagesScraper:
         Returns:
             List[ChapterImage]: List of chapter images with order and URL
         """
+        return list(self.iter_images())
+    
+    def iter_images(self) -> Iterator[ChapterImage]:
+        """
+        Fetch the chapter page and yield its images in reading order.
+
+        Yields:
+            ChapterImage: Chapter images with order and URL
+        """
         tree = get_html(self.url)
-        return [ChapterImage(order_no=i, url=node.attrs["src"].strip())
-                for i, node in enumerate(tree.css("img.wp-manga-chapter-img"))]
+        with PARSE_SECONDS.labels("ChapterImagesScraper").time():
+            nodes = tree.css("img.wp-manga-chapter-img")
+        for i, node in enumerate(nodes):
+            yield ChapterImage(order_no=i, url=node.attrs["src"].strip())
     
+    # Attempts per page and base delay between them, in seconds
+    PAGE_RETRIES = 3
+    RETRY_BACKOFF = 1.0
+
     @staticmethod
-    def _download_to_temp(url: str, timeout: float = 15.0) -> str:
+    def _download_to_file(url: str, path: Path, timeout: float = 15.0) -> int:
         """
-        Download an image to a temporary file.
+        Download an image to a file, resuming a previous partial transfer.
+
+        Bytes are streamed to ``<path>.part``. When that file already exists,
+        only the missing range is requested; servers ignoring the Range header
+        get the file rewritten from the start. The part file is renamed to
+        ``path`` once the announced length has been received.
 
         Args:
             url (str): URL of the image to download
+            path (Path): Destination file
             timeout (float): Request timeout in seconds
 
         Returns:
-            str: Path to the temporary file containing the image
+            int: Size of the downloaded file in bytes
 
         Raises:
-            requests.RequestException: If the download fails
+            IncompleteDownloadError: If the transfer stopped early, the part file is kept
+            requests.RequestException: If the request fails
         """
-        session = get_session()
-        resp = session.get(url, timeout=timeout, stream=True)
-        resp.raise_for_status()
-        suffix = Path(url).suffix or ".img"
-        tmp = tempfile.NamedTemporaryFile(delete=False, suffix=suffix)
-        with tmp as f:
-            for chunk in resp.iter_content(chunk_size=8192):
-                if chunk:
-                    f.write(chunk)
-        return tmp.name
+        part = path.with_name(path.name + ".part")
+        offset = part.stat().st_size if part.exists() else 0
+        host = urlsplit(url).netloc
+        _throttle()
+        start = time.perf_counter()
+        try:
+            resp = get_session().get(url, timeout=timeout, stream=True,
+                                     headers={"Range": f"bytes={offset}-"} if offset else None)
+        except requests.RequestException:
+            observe_upstream(host, "error", time.perf_counter() - start)
+            raise
+        with resp:
+            if resp.status_code == 416:
+                # The part file does not fit the resource anymore, start over
+                observe_upstream(host, "416", time.perf_counter() - start, _retries_of(resp))
+                part.unlink(missing_ok=True)
+                raise IncompleteDownloadError(f"Range {offset}- not satisfiable for {url}")
+            if not resp.ok:
+                observe_upstream(host, str(resp.status_code), time.perf_counter() - start, _retries_of(resp))
+            resp.raise_for_status()
+
+            content_range = resp.headers.get("content-range", "")
+            if resp.status_code == 206 and content_range.startswith(f"bytes {offset}-"):
+                mode = "ab"
+                total = content_range.rpartition("/")[2]
+            else:
+                mode, offset = "wb", 0
+                total = resp.headers.get("content-length")
+            # Lengths are only comparable when the body is not re-encoded in transit
+            expected = int(total) if total and total.isdigit() and not resp.headers.get("content-encoding") else None
+
+            received = 0
+            try:
+                with open(part, mode) as f:
+                    for chunk in resp.iter_content(chunk_size=8192):
+                        if chunk:
+                            f.write(chunk)
+                            received += len(chunk)
+            except requests.RequestException as e:
+                raise IncompleteDownloadError(f"Transfer of {url} interrupted after {offset + received} bytes") from e
+            finally:
+                observe_upstream(host, str(resp.status_code), time.perf_counter() - start,
+                                 _retries_of(resp), received)
+        size = offset + received
+        if expected is not None and size != expected:
+            if size > expected:
+                part.unlink(missing_ok=True)
+            raise IncompleteDownloadError(f"Received {size} of {expected} bytes for {url}")
+        part.replace(path)
+        return size
 
-    def download_images_as_pdf(self, out_path: str = "output.pdf") -> None:
+    @staticmethod
+    def _download_page(url: str, path: Path, sha256: str | None = None, retries: int | None = None,
+                       timeout: float = 15.0) -> Path:
+        """
+        Download and verify one page, retrying and resuming on failure.
+
+        A page already present at ``path`` is reused when it verifies.
+        Interrupted transfers resume from the bytes already received, while
+        corrupt images are discarded and downloaded again.
+
+        Args:
+            url (str): URL of the image to download
+            path (Path): Destination file
+            sha256 (str, optional): Expected SHA-256 digest of the image
+            retries (int, optional): Attempts, defaults to PAGE_RETRIES
+            timeout (float): Request timeout in seconds
+
+        Returns:
+            Path: The verified image file
+
+        Raises:
+            ImageIntegrityError: If the page is still corrupt after the last attempt
+            requests.RequestException: If the last attempt failed to connect
+        """
+        if path.exists():
+            try:
+                check_image(path, sha256=sha256)
+                return path
+            except ImageIntegrityError:
+                path.unlink()
+        retries = retries or ChapterImagesScraper.PAGE_RETRIES
+        error: Exception | None = None
+        for attempt in range(1, retries + 1):
+            if attempt > 1:
+                time.sleep(ChapterImagesScraper.RETRY_BACKOFF * 2 ** (attempt - 2))
+            try:
+                ChapterImagesScraper._download_to_file(url, path, timeout)
+                check_image(path, sha256=sha256)
+                return path
+            except IncompleteDownloadError as e:
+                # Keep the part file, the next attempt resumes it
+                error = e
+            except ImageIntegrityError as e:
+                path.unlink(missing_ok=True)
+                error = e
+            except requests.RequestException as e:
+                error = e
+            logger.warning("Attempt %d/%d to download %s failed: %s", attempt, retries, url, error)
+        raise error
+
+    @staticmethod
+    def _cached_page(url: str, path: Path, sha256: str | None = None, cache: "DiskImageCache | None" = None,
+                     series: str | None = None) -> Path:
+        """
+        Get one page from the image cache, or download it and add it to the cache.
+
+        Args:
+            url (str): URL of the image
+            path (Path): Destination file
+            sha256 (str, optional): Expected SHA-256 digest of the image
+            cache (DiskImageCache, optional): Cache of downloaded pages
+            series (str, optional): Manga id recorded with the cached page
+
+        Returns:
+            Path: The verified image file
+        """
+        if cache is None:
+            return ChapterImagesScraper._download_page(url, path, sha256)
+        cached = None if path.exists() else cache.read(url)
+        if cached is not None:
+            path.write_bytes(cached[0])
+        path = ChapterImagesScraper._download_page(url, path, sha256)
+        if cached is None:
+            cache.put(url, path.read_bytes(), mimetypes.guess_type(path.name)[0] or "image/jpeg", series)
+        return path
+
+    def download_images_as_pdf(self, out_path: str = "output.pdf", max_workers: int = 6,
+                               work_dir: str | None = None, checksums: Dict[str, str] | None = None,
+                               cache: "DiskImageCache | None" = None, series: str | None = None) -> None:
         """
         Download all chapter images and combine them into a PDF file.
 
-        This method downloads all images concurrently using a thread pool,
-        then combines them into a single PDF file. The images are automatically
-        cleaned up after the PDF is created.
+        Pages are downloaded concurrently into ``work_dir`` and verified as
+        they arrive. A failing page is retried on its own (see _download_page)
+        without cancelling the others; if some pages still fail, the verified
+        pages are kept so the next call only fetches what is missing. The work
+        directory is removed once the PDF is written, with the pages in
+        chapter order. With an image cache, cached pages are not downloaded
+        again and downloaded ones outlive the work directory.
 
         Args:
             out_path (str): Path where to save the PDF file
+            max_workers (int): Maximum number of concurrent image downloads
+            work_dir (str, optional): Directory for the pages, defaults to ``<out_path>.parts``
+            checksums (Dict[str, str], optional): Expected SHA-256 digests by image URL
+            cache (DiskImageCache, optional): Reuse cached pages and keep the downloaded ones
+            series (str, optional): Manga id recorded with the cached pages
 
         Raises:
-            Exception: If any image download fails or PDF creation fails
+            RuntimeError: If some pages could not be downloaded
+            Exception: If PDF creation fails
         """
-        images_urls = [img.url for img in self.images]
-        tmp_files = []
-        try:
-            with ThreadPoolExecutor(max_workers=6) as ex:
-                futures = {ex.submit(ChapterImagesScraper._download_to_temp, url): url for url in images_urls}
-                for fut in as_completed(futures):
-                    url = futures[fut]
-                    try:
-                        tmp_files.append(fut.result())
-                    except Exception:
-                        logger.exception("Failed to download %s", url)
-                        raise
-
-            with open(out_path, "wb") as f_out:
-                f_out.write(img2pdf.convert(tmp_files))
-        finally:
-            for p in tmp_files:
+        pages = self.images
+        work = Path(work_dir) if work_dir else Path(f"{out_path}.parts")
+        work.mkdir(parents=True, exist_ok=True)
+        checksums = checksums or {}
+        files: List[Path | None] = [None] * len(pages)
+        failed = []
+        with ThreadPoolExecutor(max_workers=max_workers) as ex:
+            futures = {
+                ex.submit(ChapterImagesScraper._cached_page, image.url,
+                          work / f"{image.order_no:04d}{Path(urlsplit(image.url).path).suffix or '.img'}",
+                          checksums.get(image.url), cache, series): n
+                for n, image in enumerate(pages)
+            }
+            for fut in as_completed(futures):
+                n = futures[fut]
                 try:
-                    Path(p).unlink()
+                    files[n] = fut.result()
                 except Exception:
-                    logger.debug("Failed to remove temp file %s", p)
+                    failed.append(pages[n].url)
+                    logger.exception("Failed to download %s", pages[n].url)
+        if failed:
+            raise RuntimeError(f"{len(failed)} of {len(pages)} pages failed, "
+                               f"{len(pages) - len(failed)} kept in {work} for the next attempt")
+
+        import img2pdf
+        with open(out_path, "wb") as f_out:
+            f_out.write(img2pdf.convert([str(p) for p in files]))
+        shutil.rmtree(work, ignore_errors=True)
 
 class SerieScraper:
     """
@@ -570,8 +1166,78 @@ class SerieScraper:
         Returns:
             str: URL for the specified page
         """
-        return f"https://azoramoon.com/series/page/{number}/"
+        return f"{UPSTREAM_URL}/series/page/{number}/"
     
+    @staticmethod
+    def generate_latest_url(number: int = 1) -> str:
+        """
+        Generate URL for a page of the series listing sorted by latest update.
+
+        Args:
+            number (int): Page number
+
+        Returns:
+            str: URL for the specified page
+        """
+        return f"{UPSTREAM_URL}/series/page/{number}/?m_orderby=latest"
+
+    @staticmethod
+    def _parse_card(card_node: LexborNode) -> ListingCard | None:
+        """
+        Extract a series card of a listing page.
+
+        Args:
+            card_node (LexborNode): Card node
+
+        Returns:
+            ListingCard | None: The card, or None if it has no series link.
+            Status and rate are None when the card does not show them
+        """
+        link_node = card_node.css_first("h3 a")
+        if link_node is None:
+            return None
+        chapters = tuple(
+            (node.attrs["href"], node.text(strip=True))
+            for node in card_node.css("span.chapter a") if node.attrs.get("href")
+        )
+        status_node = card_node.css_first("div.mg_status div.summary-content")
+        score_node = card_node.css_first("span.score")
+        try:
+            rate = float(score_node.text(strip=True)) if score_node is not None else None
+        except ValueError:
+            rate = None
+        return ListingCard(link_node.attrs["href"], link_node.text(strip=True), chapters,
+                           status_node.text(strip=True) if status_node is not None else None, rate)
+
+    @staticmethod
+    def get_cards(page_num: int = 1, latest: bool = False) -> List[ListingCard]:
+        """
+        Get the series cards of a listing page with their latest chapters.
+
+        Series links outside a card wrapper are kept as cards without
+        chapters, status or rate, so they are always treated as changed.
+
+        Args:
+            page_num (int): Page number to fetch
+            latest (bool): List series by latest update instead of the default order
+
+        Returns:
+            List[ListingCard]: Cards in page order, chapters newest first
+        """
+        url = SerieScraper.generate_latest_url(page_num) if latest else SerieScraper.generate_url(page_num)
+        with tracing.bind(url, "listing"):
+            html: LexborHTMLParser = get_html(url)
+            with PARSE_SECONDS.labels("SerieScraper").time(), tracing.stage("parse"):
+                cards = [card for card in map(SerieScraper._parse_card, html.css("div.page-item-detail"))
+                         if card is not None]
+                seen = {card.url for card in cards}
+                for link_node in html.css("h3 a"):
+                    href = link_node.attrs.get("href")
+                    if href and href not in seen:
+                        seen.add(href)
+                        cards.append(ListingCard(href, link_node.text(strip=True), ()))
+        return cards
+
     @staticmethod
     def get_total_pages() -> int:
         """
@@ -601,8 +1267,10 @@ class SerieScraper:
             List[str]: List of manga URLs from the page
         """
         url: str = SerieScraper.generate_url(number=page_num)
-        html: LexborHTMLParser = get_html(url)
-        links: Set[str] = {link_node.attrs["href"] for link_node in html.css("h3 a")}
+        with tracing.bind(url, "listing"):
+            html: LexborHTMLParser = get_html(url)
+            with PARSE_SECONDS.labels("SerieScraper").time(), tracing.stage("parse"):
+                links: Set[str] = {link_node.attrs["href"] for link_node in html.css("h3 a")}
         return links
     
     @staticmethod
@@ -616,6 +1284,7 @@ class SerieScraper:
         Returns:
             Set[str]: Set of all unique manga URLs found
         """
+        from tqdm import tqdm
         total_pages = SerieScraper.get_total_pages()
         links: Set[str] = set()
         with ThreadPoolExecutor(max_workers=SerieScraper.MAX_THREADS) as ex:
@@ -630,102 +1299,262 @@ class SerieScraper:
                     finally:
                         pbar.update(1)
         return links
+
+    @staticmethod
+    def start_cards() -> Dict[str, ListingCard]:
+        """
+        Fetch the series cards of every listing page in parallel.
+
+        Returns:
+            Dict[str, ListingCard]: Cards by manga URL
+        """
+        from tqdm import tqdm
+        total_pages = SerieScraper.get_total_pages()
+        cards: Dict[str, ListingCard] = {}
+        with ThreadPoolExecutor(max_workers=SerieScraper.MAX_THREADS) as ex:
+            futures = [ex.submit(SerieScraper.get_cards, page) for page in range(1, total_pages + 1)]
+            with tqdm(total=len(futures), desc="Fetching manga links", unit="page") as pbar:
+                for fut in as_completed(futures):
+                    try:
+                        cards.update((card.url, card) for card in fut.result())
+                    except Exception:
+                        logger.exception("Error fetching page")
+                    finally:
+                        pbar.update(1)
+        return cards
+
+    @staticmethod
+    def changed_links(cards: Iterable[ListingCard], repository: "MangaRepository") -> Set[str]:
+        """
+        Select the series whose listing card differs from the stored manga.
+
+        A card is unchanged when the manga is stored, every chapter it shows
+        is stored, and the status and rating it shows (if any) match. Cards
+        showing none of these signals are always treated as changed.
+
+        Args:
+            cards (Iterable[ListingCard]): Listing cards
+            repository (MangaRepository): Repository holding the stored manga
+
+        Returns:
+            Set[str]: URLs of the manga whose details need to be fetched again
+        """
+        cards = list(cards)
+        with tracing.bind([card.url for card in cards], "manga"), tracing.stage("exists"):
+            states = repository.listing_states(card.url for card in cards)
+            known = repository.existing_chapter_urls(
+                url for card in cards if card.url in states for url, _ in card.chapters)
+        changed = set()
+        for card in cards:
+            state = states.get(card.url)
+            if state is None or (not card.chapters and card.status is None and card.rate is None):
+                changed.add(card.url)
+                continue
+            status, rate = state
+            if (any(url not in known for url, _ in card.chapters)
+                    or (card.status is not None and card.status.casefold() != (status or "").casefold())
+                    or (card.rate is not None and abs(card.rate - (rate or 0.0)) >= 0.005)):
+                changed.add(card.url)
+        return changed
     
     @staticmethod
-    def _save_manga_to_db(manga_url: str) -> bool:
+    def _fetch_details(manga_url: str) -> MangaRecord | None:
         """
-        Scrape and save a single manga to the database.
+        Scrape the details of a single manga.
+
+        Only the compact record is kept, the HTML tree is released on return.
 
         Args:
-            manga_url (str): URL of the manga to scrape and save
+            manga_url (str): URL of the manga to scrape
 
         Returns:
-            bool: True if saved successfully, False otherwise
+            MangaRecord | None: Scraped details, or None if scraping failed
         """
-        session = get_db_session()
         try:
-            # Check if manga URL already exists
-            existing = session.query(MangaDB).filter(MangaDB.url == manga_url).first()
-            if existing:
-                logger.debug("Manga already exists in database: %s", manga_url)
-                return False
-            
-            scraper = MangaDetailsScarper(manga_url)
-            details = scraper.details
-            
-            manga_id = get_uuid()
-            manga_db = MangaDB(
-                id=manga_id,
-                title=details.title,
-                url=details.url,
-                poster=details.poster,
-                description=details.description,
-                status=details.status,
-                rate=float(details.rate) if details.rate else 0.0
-            )
-            session.add(manga_db)
-            session.flush()
-            
-            for genre_name in details.genres:
-                genre_db = GenreDB(id=get_uuid(), manga_id=manga_id, name=genre_name)
-                session.add(genre_db)
-            
-            for chapter in details.chapters:
-                chapter_db = ChapterDB(
-                    id=get_uuid(),
-                    manga_id=manga_id,
-                    order_no=chapter.order_no,
-                    title=chapter.title,
-                    url=chapter.url
-                )
-                session.add(chapter_db)
-            
-            session.commit()
-            logger.info("Saved manga to database: %s", details.title)
-            return True
-            
-        except IntegrityError as e:
-            session.rollback()
-            logger.warning("Integrity error while saving manga: %s", manga_url)
-            return False
-        except Exception as e:
-            session.rollback()
-            logger.exception("Error saving manga to database: %s", manga_url)
-            return False
+            with tracing.bind(manga_url, "manga"):
+                return MangaDetailsScarper(manga_url).record
+        except Exception:
+            logger.exception("Error scraping manga: %s", manga_url)
+            return None
+    
+    @staticmethod
+    def _fetch_shard(manga_urls: List[str], max_workers: int,
+                     fetch: Callable[[str], MangaRecord | None] | None = None) -> List[MangaRecord]:
+        """
+        Scrape the details of a shard of manga inside a worker process.
+
+        Args:
+            manga_urls (List[str]): URLs of the shard
+            max_workers (int): Concurrent fetches within the process
+            fetch (Callable, optional): Scraping function, defaults to _fetch_details
+
+        Returns:
+            List[MangaRecord]: Details of the manga scraped successfully
+        """
+        fetch = fetch or SerieScraper._fetch_details
+        with ThreadPoolExecutor(max_workers=max_workers) as ex:
+            return [details for details in ex.map(fetch, manga_urls) if details is not None]
+
+    @staticmethod
+    def iter_details(manga_urls: Set[str] | List[str], max_workers: int = 3, processes: int = 1,
+                     shard_size: int = 50, fetch: Callable[[str], MangaRecord | None] | None = None
+                     ) -> Iterator[Tuple[int, List[MangaRecord]]]:
+        """
+        Scrape manga details with threads, or sharded across worker processes.
+
+        With ``processes > 1`` the URLs are split into shards of ``shard_size``
+        that are scraped by a process pool, each process running
+        ``max_workers`` threads with its own HTTP session, so HTML parsing is
+        no longer bound to a single core. Results come back to the calling
+        process, which stays the only database writer. The rate limit of the
+        calling process, if any, is split evenly between the workers.
+
+        Args:
+            manga_urls (Set[str] | List[str]): URLs of the manga to scrape
+            max_workers (int): Concurrent fetches per process
+            processes (int): Number of worker processes, 1 scrapes in this process
+            shard_size (int): Number of URLs sent to a worker at once
+            fetch (Callable, optional): Module-level scraping function, defaults to _fetch_details
+
+        Yields:
+            Tuple[int, List[MangaRecord]]: Number of URLs processed and the details
+            scraped successfully, in completion order
+
+        Example:
+            >>> for done, batch in SerieScraper.iter_details(urls, max_workers=4, processes=4):
+            ...     repository.upsert_manga(batch)
+        """
+        fetch = fetch or SerieScraper._fetch_details
+        manga_urls = list(manga_urls)
+        if processes <= 1:
+            with ThreadPoolExecutor(max_workers=max_workers) as ex:
+                futures = [ex.submit(fetch, url) for url in manga_urls]
+                for fut in as_completed(futures):
+                    try:
+                        details = fut.result()
+                    except Exception:
+                        logger.exception("Error processing manga")
+                        details = None
+                    yield 1, [details] if details is not None else []
+            return
+
+        limiter = _rate_limiter
+        initargs = (limiter.rate / processes, limiter.burst / processes) if limiter else (None, None)
+        shards = [manga_urls[n:n + shard_size] for n in range(0, len(manga_urls), shard_size)]
+        with ProcessPoolExecutor(max_workers=processes, initializer=_init_crawl_process, initargs=initargs) as ex:
+            futures = {ex.submit(SerieScraper._fetch_shard, shard, max_workers, fetch): shard for shard in shards}
+            for fut in as_completed(futures):
+                shard = futures[fut]
+                try:
+                    yield len(shard), fut.result()
+                except Exception:
+                    logger.exception("Error processing shard of %d manga starting at %s", len(shard), shard[0])
+                    yield len(shard), []
+
+    @staticmethod
+    def _flush(repository: "MangaRepository", batch: List[MangaRecord]) -> int:
+        """
+        Write a batch of scraped manga to the database.
+
+        Args:
+            repository (MangaRepository): Repository to write to
+            batch (List[MangaRecord]): Scraped manga details
+
+        Returns:
+            int: Number of manga written
+        """
+        if not batch:
+            return 0
+        try:
+            with tracing.bind([details.url for details in batch], "manga"):
+                saved = len(repository.upsert_manga(batch))
+            logger.info("Saved %d manga to database", saved)
+            return saved
+        except Exception:
+            logger.exception("Error saving manga batch to database")
+            return 0
         finally:
-            close_db_session(session)
+            batch.clear()
     
     @staticmethod
-    def save_all_manga(max_workers: int = 3) -> None:
+    def save_all_manga(max_workers: int = 3, batch_size: int = 50, repository: "MangaRepository | None" = None,
+                       trace_path: str | None = None, update_existing: bool = False, processes: int = 1,
+                       skip_unchanged: bool = True, posters: "PosterPipeline | None" = None) -> None:
         """
         Fetch all manga links and save them to the database.
 
         This method scrapes all manga series from the website and saves them
-        to the database with their details, genres, and chapters. Displays
-        progress bars for both fetching and saving operations.
+        to the database with their details, genres, and chapters. Manga already
+        stored are filtered out with a single batched lookup, and the scraped
+        details are written in batches of ``batch_size``. Displays progress
+        bars for both fetching and saving operations.
 
         Args:
             max_workers (int): Maximum number of concurrent worker threads
+            batch_size (int): Number of manga written per database transaction
+            repository (MangaRepository, optional): Repository to write to
+            trace_path (str, optional): When set, record per-stage timings of every
+                URL and write a report (percentiles, slowest URLs, stage
+                breakdown) to this JSON file
+            update_existing (bool): Re-scrape manga already stored to refresh their
+                details and chapters instead of skipping them
+            skip_unchanged (bool): With update_existing, only re-scrape manga whose
+                listing card shows a new chapter, status or rating (see changed_links)
+            processes (int): Shard the detail pages across this many worker
+                processes, each running ``max_workers`` threads (see iter_details).
+                Traces then only cover listing pages and database writes
+            posters (PosterPipeline, optional): Fetches the posters of the scraped
+                manga in the background, and of stored manga still missing one;
+                drained before returning
 
         Example:
             >>> SerieScraper.save_all_manga(max_workers=5)
+            >>> SerieScraper.save_all_manga(trace_path="crawl-trace.json")
         """
-        init_db()
+        if trace_path is not None:
+            trace = tracing.CrawlTrace()
+            try:
+                with trace.active():
+                    SerieScraper.save_all_manga(max_workers, batch_size, repository,
+                                                update_existing=update_existing, processes=processes,
+                                                skip_unchanged=skip_unchanged, posters=posters)
+            finally:
+                trace.write(trace_path)
+            return
+        if repository is None:
+            from database import init_db
+            from repository import MangaRepository
+            init_db()
+            repository = MangaRepository()
         logger.info("Starting manga scraping process")
         
-        manga_links = SerieScraper.start()
+        if update_existing and skip_unchanged:
+            cards = SerieScraper.start_cards()
+            manga_links = SerieScraper.changed_links(cards.values(), repository)
+            logger.info("Skipping %d manga with unchanged listing cards", len(cards) - len(manga_links))
+        else:
+            manga_links = SerieScraper.start()
+        if not update_existing:
+            with tracing.bind(manga_links, "manga"):
+                existing = repository.existing_manga_urls(manga_links)
+            manga_links = manga_links - existing
+            logger.debug("Skipping %d manga already in database", len(existing))
         
         saved_count = 0
-        with ThreadPoolExecutor(max_workers=max_workers) as ex:
-            futures = {ex.submit(SerieScraper._save_manga_to_db, url): url for url in manga_links}
-            with tqdm(total=len(futures), desc="Saving manga to database", unit="manga") as pbar:
-                for fut in as_completed(futures):
-                    try:
-                        if fut.result():
-                            saved_count += 1
-                    except Exception:
-                        logger.exception("Error processing manga")
-                    finally:
-                        pbar.update(1)
+        batch: List[MangaRecord] = []
+        from tqdm import tqdm
+        with tqdm(total=len(manga_links), desc="Saving manga to database", unit="manga") as pbar:
+            for done, details in SerieScraper.iter_details(manga_links, max_workers, processes, batch_size):
+                batch.extend(details)
+                if posters is not None:
+                    posters.submit(record.poster for record in details)
+                if len(batch) >= batch_size:
+                    saved_count += SerieScraper._flush(repository, batch)
+                pbar.update(done)
+        saved_count += SerieScraper._flush(repository, batch)
         
-        logger.info("Completed: Saved %d new manga to database", saved_count)
\ No newline at end of file
+        logger.info("Completed: Saved %d new manga to database", saved_count)
+        if posters is not None:
+            posters.submit(repository.posters_of_stored_manga())
+            posters.stop()
+            logger.info("Stored %d posters, %d failed", posters.stored, posters.failures)
@@ -0,0 +1,315 @@
+"""
+Catalog snapshots for bootstrapping API nodes.
+
+A new node used to either run a full crawl (tens of minutes and thousands of
+upstream requests) or copy a live SQLite file. A snapshot is a gzip
+compressed JSON Lines file exported from any database holding the catalog:
+a header line, one line per manga with its genres, chapters (numbers and
+sort keys included) and the image manifest of every chapter, and a footer
+line. Loading it into a fresh database takes seconds and sends no upstream
+request.
+
+Diff snapshots only carry the manga that changed since a base snapshot, and
+the URLs of the deleted ones. Every snapshot names the catalog state it
+leads to (a hash of the URL and content digest of every manga), and a diff
+the state it applies to, so a chain of diffs is only applied on top of the
+right base.
+
+    manga snapshot export catalog.jsonl.gz
+    manga snapshot export changes.jsonl.gz --base catalog.jsonl.gz
+    manga snapshot import catalog.jsonl.gz changes.jsonl.gz
+"""
+
+import gzip
+import hashlib
+import json
+import logging
+import os
+from datetime import datetime, timezone
+from typing import Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+FORMAT = "manga-catalog-snapshot"
+VERSION = 1
+FULL = "full"
+DIFF = "diff"
+
+# Manga written per transaction when importing
+IMPORT_BATCH = 200
+
+class SnapshotError(Exception):
+    """Raised when a snapshot is malformed, truncated or applied to the wrong base."""
+
+class SnapshotInfo(NamedTuple):
+    """Summary of a written or applied snapshot."""
+    id: str
+    kind: str
+    base: Optional[str]
+    manga: int
+    deleted: int
+
+def digest(item: dict) -> str:
+    """
+    Content digest of a manga, stable across exports.
+
+    Args:
+        item (dict): Manga in the MangaRepository.iter_catalog() format
+
+    Returns:
+        str: Hex digest
+    """
+    encoded = json.dumps(item, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(encoded.encode()).hexdigest()[:32]
+
+def state_id(digests: Dict[str, str]) -> str:
+    """
+    Id of a catalog state.
+
+    Args:
+        digests (Dict[str, str]): Content digest of every manga, by URL
+
+    Returns:
+        str: Hex id
+    """
+    h = hashlib.sha256()
+    for url in sorted(digests):
+        h.update(f"{url}\t{digests[url]}\n".encode())
+    return h.hexdigest()
+
+class _Writer:
+    """
+    JSON Lines writer of one snapshot file.
+
+    Lines go to ``path + ".tmp"``, renamed to ``path`` by close() once the
+    footer is written, so a failed export never leaves a complete-looking file.
+    """
+
+    def __init__(self, path: str, kind: str, base: Optional[str]):
+        self.kind = kind
+        self.base = base
+        self.manga = 0
+        self.deleted = 0
+        self._path = path
+        self._tmp = f"{path}.tmp"
+        self._file = gzip.open(self._tmp, "wt", encoding="utf-8", compresslevel=6)
+        self._write({"type": "header", "format": FORMAT, "version": VERSION, "kind": kind, "base": base,
+                     "created_at": datetime.now(timezone.utc).isoformat()})
+
+    def _write(self, line: dict) -> None:
+        self._file.write(json.dumps(line, separators=(",", ":"), ensure_ascii=False))
+        self._file.write("\n")
+
+    def manga_line(self, item: dict, item_digest: str) -> None:
+        self._write({"type": "manga", "digest": item_digest, **item})
+        self.manga += 1
+
+    def delete_line(self, url: str) -> None:
+        self._write({"type": "delete", "url": url})
+        self.deleted += 1
+
+    def close(self, snapshot_id: str) -> SnapshotInfo:
+        self._write({"type": "footer", "id": snapshot_id, "manga": self.manga, "deleted": self.deleted})
+        self._file.close()
+        os.replace(self._tmp, self._path)
+        return SnapshotInfo(snapshot_id, self.kind, self.base, self.manga, self.deleted)
+
+    def abort(self) -> None:
+        """Drop the partial file of a failed export."""
+        self._file.close()
+        os.remove(self._tmp)
+
+def read(path: str) -> Tuple[dict, Iterator[dict]]:
+    """
+    Open a snapshot.
+
+    Args:
+        path (str): Snapshot file
+
+    Returns:
+        Tuple[dict, Iterator[dict]]: The header, and an iterator over the manga and
+        delete lines that ends with the footer line
+
+    Raises:
+        SnapshotError: If the file is not a snapshot of a supported version
+    """
+    file = gzip.open(path, "rt", encoding="utf-8")
+    try:
+        header = json.loads(file.readline() or "{}")
+    except (OSError, ValueError) as e:
+        file.close()
+        raise SnapshotError(f"{path} is not a catalog snapshot: {e}") from e
+    if header.get("format") != FORMAT:
+        file.close()
+        raise SnapshotError(f"{path} is not a catalog snapshot")
+    if header.get("version") != VERSION:
+        file.close()
+        raise SnapshotError(f"{path} has snapshot version {header.get('version')}, expected {VERSION}")
+
+    def lines() -> Iterator[dict]:
+        with file:
+            for line in file:
+                yield json.loads(line)
+
+    return header, lines()
+
+def _records(path: str) -> Tuple[dict, Iterator[dict], dict]:
+    """Open a snapshot, the footer dict is filled in once the records are consumed."""
+    header, lines = read(path)
+    footer: dict = {}
+
+    def records() -> Iterator[dict]:
+        try:
+            for line in lines:
+                if line.get("type") == "footer":
+                    footer.update(line)
+                    return
+                yield line
+        except (OSError, EOFError, ValueError) as e:
+            raise SnapshotError(f"{path} is truncated or corrupt: {e}") from e
+        raise SnapshotError(f"{path} is truncated, its footer is missing")
+
+    return header, records(), footer
+
+def digests_of(path: str) -> Dict[str, str]:
+    """
+    Read the content digest of every manga of a full snapshot.
+
+    Args:
+        path (str): Full snapshot file
+
+    Returns:
+        Dict[str, str]: Digests by manga URL
+
+    Raises:
+        SnapshotError: If the snapshot is not a complete full snapshot
+    """
+    header, records, _ = _records(path)
+    if header["kind"] != FULL:
+        raise SnapshotError(f"{path} is a diff, a full snapshot is needed as base")
+    return {record["url"]: record["digest"] for record in records if record["type"] == "manga"}
+
+def export_snapshot(repository, path: str, base: Optional[str] = None) -> SnapshotInfo:
+    """
+    Export the catalog of a database.
+
+    Args:
+        repository (MangaRepository): Repository to read
+        path (str): Output file, conventionally ``*.jsonl.gz``
+        base (str, optional): Full snapshot to diff against, only changed and
+            deleted manga are written
+
+    Returns:
+        SnapshotInfo: Id and counts of the snapshot
+
+    Example:
+        >>> export_snapshot(MangaRepository(), "catalog.jsonl.gz")
+    """
+    base_digests = digests_of(base) if base else None
+    writer = _Writer(path, DIFF if base else FULL, state_id(base_digests) if base_digests is not None else None)
+    digests: Dict[str, str] = {}
+    try:
+        for item in repository.iter_catalog():
+            item_digest = digests[item["url"]] = digest(item)
+            if base_digests is None or base_digests.get(item["url"]) != item_digest:
+                writer.manga_line(item, item_digest)
+        for url in sorted(set(base_digests or ()) - set(digests)):
+            writer.delete_line(url)
+    except BaseException:
+        writer.abort()
+        raise
+    info = writer.close(state_id(digests))
+    logger.info("Exported %s snapshot %s: %d manga, %d deleted", info.kind, info.id[:12], info.manga, info.deleted)
+    return info
+
+def diff_snapshots(old: str, new: str, path: str) -> SnapshotInfo:
+    """
+    Write the diff between two full snapshots.
+
+    Args:
+        old (str): Full snapshot of the base state
+        new (str): Full snapshot of the target state
+        path (str): Output file
+
+    Returns:
+        SnapshotInfo: Id and counts of the diff
+    """
+    base_digests = digests_of(old)
+    header, records, footer = _records(new)
+    if header["kind"] != FULL:
+        raise SnapshotError(f"{new} is a diff, a full snapshot is needed")
+    writer = _Writer(path, DIFF, state_id(base_digests))
+    seen = set()
+    try:
+        for record in records:
+            if record["type"] != "manga":
+                continue
+            seen.add(record["url"])
+            if base_digests.get(record["url"]) != record["digest"]:
+                writer.manga_line({k: v for k, v in record.items() if k not in ("type", "digest")}, record["digest"])
+        for url in sorted(set(base_digests) - seen):
+            writer.delete_line(url)
+    except BaseException:
+        writer.abort()
+        raise
+    return writer.close(footer["id"])
+
+def import_snapshot(repository, paths: Sequence[str], force: bool = False,
+                    batch_size: int = IMPORT_BATCH) -> List[SnapshotInfo]:
+    """
+    Load snapshots into a database, in order.
+
+    Every file is read once to check that it is complete and that each diff
+    applies on top of its base, the previous snapshot of ``paths`` or for the
+    first one the snapshot applied last to the database, before anything is
+    written. Manga are then written in batches of ``batch_size``, each in one
+    transaction.
+
+    Args:
+        repository (MangaRepository): Repository to write to
+        paths (Sequence[str]): A full snapshot and/or diffs
+        force (bool): Apply a first diff even if the database is not at its base
+        batch_size (int): Manga written per transaction
+
+    Returns:
+        List[SnapshotInfo]: The applied snapshots
+
+    Raises:
+        SnapshotError: If a snapshot is malformed or does not apply to the current state
+
+    Example:
+        >>> import_snapshot(MangaRepository(), ["catalog.jsonl.gz", "changes.jsonl.gz"])
+    """
+    last = repository.last_snapshot()
+    current = last.snapshot_id if last is not None else None
+    for n, path in enumerate(paths):
+        header, records, footer = _records(path)
+        for _ in records:
+            pass
+        if header["kind"] == DIFF and header["base"] != current and not (n == 0 and force):
+            raise SnapshotError(f"{path} applies to state {header['base'][:12]}, "
+                                f"the database is at {current[:12] if current else 'an unknown state'}")
+        current = footer["id"]
+
+    applied = []
+    for path in paths:
+        header, records, footer = _records(path)
+        batch: List[dict] = []
+        deleted: List[str] = []
+        written = 0
+        for record in records:
+            if record["type"] == "delete":
+                deleted.append(record["url"])
+                continue
+            batch.append({k: v for k, v in record.items() if k not in ("type", "digest")})
+            if len(batch) >= batch_size:
+                written += len(repository.load_catalog(batch))
+                batch.clear()
+        if batch:
+            written += len(repository.load_catalog(batch))
+        removed = repository.delete_manga(deleted) if deleted else 0
+        repository.record_snapshot(footer["id"], header["kind"], header["base"], written, removed)
+        info = SnapshotInfo(footer["id"], header["kind"], header["base"], written, removed)
+        logger.info("Applied %s snapshot %s: %d manga, %d deleted", info.kind, info.id[:12], written, removed)
+        applied.append(info)
+    return applied
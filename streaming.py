@@ -0,0 +1,99 @@
+"""
+Streaming responses for incrementally produced results.
+
+Scrapers yield pydantic models as soon as they are parsed. This module
+serializes such iterators as NDJSON (one JSON document per line) or as
+Server-Sent Events so clients see the first result after a single
+upstream round-trip.
+"""
+
+import json
+import logging
+from typing import Iterable, Iterator, Optional
+
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+
+logger = logging.getLogger(__name__)
+
+NDJSON = "ndjson"
+SSE = "sse"
+MEDIA_TYPES = {NDJSON: "application/x-ndjson", SSE: "text/event-stream"}
+
+def ndjson_lines(items: Iterable[BaseModel]) -> Iterator[str]:
+    """
+    Serialize models as newline-delimited JSON.
+
+    An upstream failure ends the stream with an ``{"error": ...}`` line.
+
+    Args:
+        items (Iterable[BaseModel]): Models to serialize
+
+    Yields:
+        str: One JSON document per line
+    """
+    try:
+        for item in items:
+            yield item.model_dump_json() + "\n"
+    except Exception as e:
+        logger.exception("Error while streaming results")
+        yield json.dumps({"error": str(e)}) + "\n"
+
+def sse_events(items: Iterable[BaseModel]) -> Iterator[str]:
+    """
+    Serialize models as Server-Sent Events.
+
+    Each model is sent as a ``data`` event, followed by an ``end`` event
+    carrying the number of items, or an ``error`` event on failure.
+
+    Args:
+        items (Iterable[BaseModel]): Models to serialize
+
+    Yields:
+        str: Server-Sent Event frames
+    """
+    count = 0
+    try:
+        for item in items:
+            count += 1
+            yield f"data: {item.model_dump_json()}\n\n"
+    except Exception as e:
+        logger.exception("Error while streaming results")
+        yield f"event: error\ndata: {json.dumps({'error': str(e)})}\n\n"
+        return
+    yield f"event: end\ndata: {json.dumps({'count': count})}\n\n"
+
+def stream_format(requested: Optional[str], accept: Optional[str]) -> str:
+    """
+    Pick the stream format for a request.
+
+    Args:
+        requested (str, optional): Format from the query string, "ndjson" or "sse"
+        accept (str, optional): Accept header of the request
+
+    Returns:
+        str: NDJSON or SSE
+
+    Raises:
+        KeyError: If the requested format is unknown
+    """
+    if requested:
+        if requested not in MEDIA_TYPES:
+            raise KeyError(requested)
+        return requested
+    return SSE if accept and MEDIA_TYPES[SSE] in accept else NDJSON
+
+def stream_response(items: Iterable[BaseModel], fmt: str) -> StreamingResponse:
+    """
+    Build a streaming response over an iterator of models.
+
+    Args:
+        items (Iterable[BaseModel]): Models to stream, consumed lazily
+        fmt (str): NDJSON or SSE
+
+    Returns:
+        StreamingResponse: Response flushing each model as it is produced
+    """
+    body = sse_events(items) if fmt == SSE else ndjson_lines(items)
+    return StreamingResponse(body, media_type=MEDIA_TYPES[fmt],
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
@@ -0,0 +1,33 @@
+from fastapi.testclient import TestClient
+from selectolax.lexbor import LexborHTMLParser
+
+import api
+import benchmarks
+from scraper import MangaDetailsScarper
+
+class SyntheticDetails(MangaDetailsScarper):
+    def __init__(self, manga_url):
+        super().__init__(manga_url, LexborHTMLParser(benchmarks.details_page_html(chapters=30)))
+
+def test_manga_projection(monkeypatch):
+    monkeypatch.setattr(api, "MangaDetailsScarper", SyntheticDetails)
+    client = TestClient(api.app)
+    full = client.get("/manga", params={"url": "u"}).json()
+    assert len(full["chapters"]) == 30 and full["rate"] == 4.5
+    assert client.get("/manga", params={"url": "u", "fields": "title,poster"}).json() == {
+        "title": "Title", "poster": "https://example.com/p.jpg"}
+    latest = client.get("/manga", params={"url": "u", "fields": "chapters", "chapters_from": -1}).json()
+    assert latest == {"chapters": [full["chapters"][-1]], "chapters_total": 30}
+    page = client.get("/manga", params={"url": "u", "chapters_from": 10, "limit": 5}).json()
+    assert page["chapters"] == full["chapters"][10:15] and page["title"] == "Title"
+    assert client.get("/manga", params={"url": "u", "fields": "title,nope"}).status_code == 400
+    batch = client.post("/manga/batch", params={"fields": "url,status"}, json={"urls": ["a", "b"]}).json()
+    assert [item["details"] for item in batch] == [{"url": "a", "status": "Ongoing"}, {"url": "b", "status": "Ongoing"}]
+    full_batch = client.post("/manga/batch", json={"urls": ["u"]}).json()
+    assert full_batch == [{"url": "u", "details": full, "error": None}]
+    assert batch[0].keys() == full_batch[0].keys()
+
+def test_shutdown_stops_image_derivations():
+    with TestClient(api.app):
+        api.image_pipeline.executor
+    assert api.image_pipeline._executor is None
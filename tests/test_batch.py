@@ -0,0 +1,32 @@
+import threading
+import time
+import pytest
+from batch import BatchRunner
+
+def test_map_keeps_order_and_reports_errors():
+    calls = []
+    def fetch(url):
+        calls.append(url)
+        if url == "bad":
+            raise ValueError("not found")
+        return url.upper()
+    items = BatchRunner(max_workers=4).map(fetch, ["a", "bad", "b", "a"])
+    assert [(item.url, item.result, item.error) for item in items] == [
+        ("a", "A", None), ("bad", None, "not found"), ("b", "B", None), ("a", "A", None)]
+    assert sorted(calls) == ["a", "b", "bad"]
+
+def test_concurrency_cap_and_size_limit():
+    running, peak, lock = 0, 0, threading.Lock()
+    def fetch(url):
+        nonlocal running, peak
+        with lock:
+            running += 1
+            peak = max(peak, running)
+        time.sleep(0.02)
+        with lock:
+            running -= 1
+    runner = BatchRunner(max_workers=2)
+    runner.map(fetch, [str(n) for n in range(8)])
+    assert peak == 2
+    with pytest.raises(ValueError):
+        runner.map(fetch, [str(n) for n in range(BatchRunner.MAX_ITEMS + 1)])
@@ -0,0 +1,87 @@
+import threading
+import time
+
+import pytest
+import requests
+from fastapi.testclient import TestClient
+
+import api
+import scraper
+from breaker import CircuitBreaker, CircuitOpenError, StaleWhileRevalidate, CLOSED, OPEN, HALF_OPEN
+from cache import TTLCache
+from deadlines import DeadlineExceeded, deadline
+from fake_upstream import FakeUpstream
+
+def test_breaker_trips_probes_and_closes():
+    breaker = CircuitBreaker("host", window=4, min_calls=4, failure_rate=0.5, cooldown=0.1)
+    for ok in (True, False, True, False):
+        breaker.before()
+        breaker.record(ok, 0.01)
+    assert breaker.state == OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before()
+    time.sleep(0.15)
+    breaker.before()
+    assert breaker.state == HALF_OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before()
+    breaker.record(True, 0.01)
+    assert breaker.state == CLOSED
+
+def test_breaker_trips_on_slow_calls():
+    breaker = CircuitBreaker("host", min_calls=3, slow_call_seconds=1.0, slow_call_rate=0.6)
+    for _ in range(3):
+        breaker.record(True, 2.0)
+    assert breaker.state == OPEN
+
+def test_short_deadlines_do_not_trip_the_breaker():
+    with FakeUpstream(chapters=5, latency=0.3) as upstream:
+        scraper.set_circuit_breakers(min_calls=3, cooldown=60)
+        try:
+            for _ in range(5):
+                with pytest.raises((DeadlineExceeded, requests.Timeout)):
+                    with deadline(0.1):
+                        scraper.get_content(f"{upstream.url}/series/title-1/")
+            assert scraper._breakers.get(upstream.url.split("//")[1]).state == CLOSED
+        finally:
+            scraper.set_circuit_breakers(False)
+
+def test_stale_value_served_and_revalidated():
+    swr = StaleWhileRevalidate(TTLCache(maxsize=8, ttl=60), (CircuitOpenError,))
+    assert swr.get("key", lambda: 1) == (1, False)
+    refreshed = threading.Event()
+    def failing():
+        if refreshed.is_set():
+            return 2
+        refreshed.set()
+        raise CircuitOpenError("open")
+    assert swr.get("key", failing) == (1, True)
+    for _ in range(50):
+        if swr.cache.get("key") == 2:
+            break
+        time.sleep(0.01)
+    assert swr.cache.get("key") == 2
+    def down():
+        raise CircuitOpenError("open")
+    with pytest.raises(CircuitOpenError):
+        swr.get("other", down)
+    assert swr.get("other", down, lambda: 3) == (3, True)
+
+def test_api_serves_stale_details_while_circuit_is_open():
+    with FakeUpstream(chapters=5) as upstream:
+        url = f"{upstream.url}/series/title-7/"
+        client = TestClient(api.app)
+        scraper.set_circuit_breakers(cooldown=60)
+        try:
+            fresh = client.get("/manga", params={"url": url})
+            assert fresh.status_code == 200 and "Warning" not in fresh.headers
+            scraper._breakers.get(upstream.url.split("//")[1])._open()
+            stale = client.get("/manga", params={"url": url, "chapters_from": -2})
+            assert stale.status_code == 200
+            assert stale.headers["X-Cache-Status"] == "STALE"
+            assert stale.json()["chapters_total"] == 5
+            assert [c["title"] for c in stale.json()["chapters"]] == ["Chapter 4", "Chapter 5"]
+            missing = client.get("/manga", params={"url": f"{upstream.url}/series/title-8/"})
+            assert missing.status_code == 503
+        finally:
+            scraper.set_circuit_breakers(False)
@@ -0,0 +1,58 @@
+import pytest
+
+from chapters import parse_chapter_number, sort_keys, ChapterNumber
+from models import MangaDetails, ChapterDetailed
+from repository import MangaRepository, reading_position
+
+URL = "https://example.com/series/title/"
+
+@pytest.mark.parametrize("title, url, expected", [
+    ("Chapter 12.5", "", ChapterNumber(0, 12.5)),
+    ("Ch. 7 - The Return", "", ChapterNumber(0, 7.0)),
+    ("Season 2 Chapter 3", "", ChapterNumber(2, 3.0)),
+    ("S2 Ep.4", "", ChapterNumber(2, 4.0)),
+    ("", URL + "chapter-12-5/", ChapterNumber(0, 12.5)),
+    ("The End", URL + "chapter-40/", ChapterNumber(0, 40.0)),
+    ("Side Story", URL + "side-story-1/", None),
+    ("Prologue", URL + "prologue/", None),
+])
+def test_parse_chapter_number(title, url, expected):
+    assert parse_chapter_number(title, url) == expected
+
+def test_sort_keys_keep_page_order_for_unnumbered_chapters():
+    titles = ["Prologue", "Chapter 1", "Extra", "Chapter 2", "Chapter 2 Extra", "Chapter 2.5", "S2 Chapter 1"]
+    keys = [key for _, key in sort_keys((title, "") for title in titles)]
+    assert keys == sorted(keys) and len(set(keys)) == len(keys)
+    assert keys[:4] == [0, 1000, 1001, 2000]
+
+def test_tied_sort_keys_keep_page_order(tmp_path):
+    repo = MangaRepository(f"sqlite:///{tmp_path / 'manga.db'}")
+    titles = ["Prologue", "Chapter 0", "Chapter 1", "Chapter 1 Extra", "Chapter 1.001"]
+    details = MangaDetails(url=URL, title="T", poster="p", genres=[], status="Ongoing", rate=1.0, description="d",
+                           chapters=[ChapterDetailed(url=f"{URL}part-{chr(97 + n)}/", title=t, order_no=n) for n, t in enumerate(titles)])
+    manga_id = repo.save_manga(details)
+    chapters = [repo.get_chapter_by_url(f"{URL}part-{chr(97 + n)}/") for n in range(len(titles))]
+    assert [c.sort_key for c in chapters] == [0, 0, 1000, 1001, 1001]
+    assert [repo.adjacent_chapter(c.id).title for c in chapters[:-1]] == titles[1:]
+    assert [repo.adjacent_chapter(c.id, -1).title for c in chapters[1:]] == titles[:-1]
+    paged, position = [], -1
+    while page := repo.chapters_after(manga_id, position, limit=1):
+        paged.append(page[0].title)
+        position = reading_position(page[0])
+    assert paged == titles
+
+def test_adjacent_and_new_chapters(tmp_path):
+    repo = MangaRepository(f"sqlite:///{tmp_path / 'manga.db'}")
+    titles = ["Chapter 1", "Chapter 2", "Chapter 3"]
+    details = MangaDetails(url=URL, title="T", poster="p", genres=[], status="Ongoing", rate=1.0, description="d",
+                           chapters=[ChapterDetailed(url=f"{URL}{n}/", title=t, order_no=n) for n, t in enumerate(titles)])
+    manga_id = repo.save_manga(details)
+    ids = repo.upsert_chapters(manga_id, [ChapterDetailed(url=URL + "chapter-1-5/", title="chapter-1-5", order_no=9)])
+    repo.upsert_chapters(manga_id, [ChapterDetailed(url=URL + "notice/", title="notice", order_no=9)])
+    first = repo.get_chapter_by_url(f"{URL}0/")
+    assert repo.adjacent_chapter(first.id).url == URL + "chapter-1-5/"
+    assert repo.adjacent_chapter(ids[URL + "chapter-1-5/"], -1).id == first.id
+    assert repo.adjacent_chapter(first.id, -1) is None
+    assert [c.title for c in repo.chapters_after(manga_id, first.sort_key)] == \
+        ["chapter-1-5", "Chapter 2", "Chapter 3", "notice"]
+    assert repo.chapter_position(manga_id, 2000) == 2
@@ -0,0 +1,49 @@
+import pytest
+
+import cli
+
+def test_parser_accepts_common_flags_after_subcommand():
+    args = cli.build_parser().parse_args(["crawl", "--workers", "2", "--rate-limit", "1.5", "--db-url", "sqlite://"])
+    assert args.func is cli.cmd_crawl
+    assert args.workers == 2
+    assert args.rate_limit == 1.5
+    assert args.db_url == "sqlite://"
+
+def test_parser_requires_subcommand():
+    with pytest.raises(SystemExit):
+        cli.build_parser().parse_args([])
+
+def test_bench_runs_named_benchmark(capsys):
+    assert cli.main(["bench", "parse_search", "--rounds", "1"]) == 0
+    assert "parse_search" in capsys.readouterr().out
+
+def test_bench_rejects_unknown_name(capsys):
+    assert cli.main(["bench", "nope", "--rounds", "1"]) == 2
+    assert "Unknown benchmark" in capsys.readouterr().err
+
+def test_download_initializes_empty_default_database(tmp_path, monkeypatch):
+    import database
+    import manga_downloader
+    from sqlalchemy.orm import sessionmaker
+    from models import MangaDetails, ChapterDetailed
+
+    url = f"sqlite:///{tmp_path / 'manga.db'}"
+    engine = database.create_db_engine(url)
+    monkeypatch.setattr(database, "DATABASE_URL", url)
+    monkeypatch.setattr(database, "engine", engine)
+    monkeypatch.setattr(database, "SessionLocal", sessionmaker(autocommit=False, autoflush=False, bind=engine))
+
+    class FakeDetails:
+        def __init__(self, manga_url):
+            self.details = MangaDetails(
+                url=manga_url, title="A", poster="p", genres=[], status="Ongoing", rate=4.5, description="d",
+                chapters=[ChapterDetailed(url=f"{manga_url}chapter-1/", title="Chapter 1", order_no=0)])
+
+    monkeypatch.setattr(manga_downloader, "MangaDetailsScarper", FakeDetails)
+    monkeypatch.setattr(manga_downloader.PosterPipeline, "ingest", lambda self, urls: 0)
+    args = cli.build_parser().parse_args(["download", "https://example.com/series/a/", "--no-chapters",
+                                          "--download-dir", str(tmp_path / "downloads")])
+    assert args.func(args) == 0
+    from repository import MangaRepository
+    assert MangaRepository(url).existing_manga_urls(["https://example.com/series/a/"]) == {
+        "https://example.com/series/a/"}
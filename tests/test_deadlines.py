@@ -0,0 +1,60 @@
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+import api
+import deadlines
+import scraper
+from deadlines import deadline, DeadlineExceeded
+from fake_upstream import FakeUpstream
+from scraper import HedgePolicy
+
+def test_nested_deadlines_only_shorten():
+    assert deadlines.remaining() is None
+    with deadline(10):
+        with deadline(0.5):
+            assert deadlines.remaining() <= 0.5
+            with deadline(None):
+                assert deadlines.remaining() <= 0.5
+        assert 9 < deadlines.remaining() <= 10
+        assert deadlines.attempt_timeout(30) <= 5
+    assert deadlines.remaining() is None
+
+def test_deadline_bounds_slow_fetch():
+    with FakeUpstream(latency=2.0) as upstream:
+        start = time.monotonic()
+        with pytest.raises(DeadlineExceeded), deadline(0.4):
+            scraper.get_html(f"{upstream.url}/series/title-1/")
+        assert time.monotonic() - start < 1.0
+        client = TestClient(api.app)
+        resp = client.get("/manga", params={"url": f"{upstream.url}/series/title-1/"},
+                          headers={"X-Request-Deadline": "0.3"})
+        assert resp.status_code == 504
+
+def test_hedge_answers_when_first_attempt_is_slow():
+    calls = []
+    lock = threading.Lock()
+    def fetch():
+        with lock:
+            calls.append(threading.current_thread().name)
+            first = len(calls) == 1
+        time.sleep(1.0 if first else 0.01)
+        return "slow" if first else "fast"
+    policy = HedgePolicy(initial_delay=0.05)
+    start = time.monotonic()
+    assert policy.fetch("host", fetch) == "fast"
+    assert time.monotonic() - start < 0.5 and len(calls) == 2
+    for n in range(HedgePolicy.MIN_SAMPLES):
+        policy.observe("host", 0.1 + n / 100)
+    assert 0.25 < policy.delay("host") < 0.3
+    assert policy.fetch("host", lambda: "quick") == "quick"
+
+def test_waiting_for_a_hedge_thread_does_not_hedge():
+    calls = []
+    policy = HedgePolicy(initial_delay=0.05, max_workers=1)
+    policy._executor.submit(time.sleep, 0.3)
+    assert policy.fetch("host", lambda: calls.append(1) or "ok") == "ok"
+    policy._executor.shutdown(wait=True)
+    assert calls == [1]
@@ -0,0 +1,43 @@
+import pytest
+import requests
+
+import loadtest
+import scraper
+from fake_upstream import FakeUpstream
+from integrity import check_image
+from scraper import SearchResultsScraper, MangaDetailsScarper, ChapterImagesScraper, SerieScraper
+
+@pytest.fixture
+def upstream(monkeypatch):
+    with FakeUpstream(series=30, chapters=5, images=3, seed=1) as upstream:
+        monkeypatch.setattr(scraper, "UPSTREAM_URL", upstream.url)
+        yield upstream
+
+def test_scrapers_against_fake_upstream(upstream):
+    search = SearchResultsScraper("title 1")
+    search.prepare_results()
+    results = search.results
+    assert len(results) == 11 and results[0].rate == 4.1
+    assert SerieScraper.get_total_pages() == 3
+    cards = SerieScraper.get_cards(1, latest=True)
+    assert cards[0].url == f"{upstream.url}/series/title-29/" and cards[0].chapters[0][1] == "Chapter 5"
+    details = MangaDetailsScarper(results[0].url).details
+    assert [c.title for c in details.chapters] == [f"Chapter {n}" for n in range(1, 6)]
+    images = ChapterImagesScraper(details.chapters[0].url).images
+    assert len(images) == 3
+    check_image(requests.get(images[0].url, timeout=5).content)
+    assert requests.get(f"{upstream.url}/series/title-99/", timeout=5).status_code == 404
+
+def test_fault_injection():
+    with FakeUpstream(throttle_rate=0.5, error_rate=0.5, seed=2) as upstream:
+        codes = {requests.get(f"{upstream.url}/series/title-1/", timeout=5).status_code for _ in range(20)}
+    assert codes == {429, 503}
+    assert sum(upstream.stats.values()) == 20
+
+def test_load_report(upstream):
+    paths = [f"/series/title-{n}/" for n in range(10)] + ["/missing/"]
+    report = loadtest.run(upstream.url, paths, concurrency=4, requests_count=22)
+    assert report.requests == 22 and report.errors == 2
+    assert report.statuses == {"200": 20, "404": 2}
+    assert 0 < report.p50 <= report.p95 <= report.p99
+    assert "throughput=" in report.format()
@@ -0,0 +1,58 @@
+import time
+
+from fake_upstream import FakeUpstream
+from image_cache import DiskImageCache
+import scraper
+from scraper import ChapterImagesScraper
+
+def test_lru_eviction_keeps_recent_and_pinned(tmp_path):
+    cache = DiskImageCache(tmp_path, max_bytes=350)
+    cache.put("http://x/a.jpg", b"a" * 100, "image/jpeg", series="pinned")
+    cache.pin("pinned")
+    cache.put("http://x/b.jpg", b"b" * 100, "image/jpeg")
+    time.sleep(0.01)
+    cache.put("http://x/c.jpg", b"c" * 100, "image/jpeg")
+    time.sleep(0.01)
+    assert cache.get("http://x/b.jpg") is not None
+    cache.put("http://x/d.jpg", b"d" * 100, "image/jpeg")
+    assert "http://x/a.jpg" in cache and "http://x/b.jpg" in cache
+    assert "http://x/c.jpg" not in cache and not cache.path("http://x/c.jpg").exists()
+    stats = cache.stats()
+    assert (stats.entries, stats.size, stats.pinned_size) == (3, 300, 100)
+    assert (stats.hits, stats.evictions) == (1, 1)
+    assert cache.read("http://x/d.jpg") == (b"d" * 100, "image/jpeg")
+    cache.unpin("pinned")
+    cache.clear()
+    assert cache.stats().entries == 0
+
+def test_lfu_evicts_least_used(tmp_path):
+    cache = DiskImageCache(tmp_path, max_bytes=250, policy="lfu")
+    cache.put("http://x/a.jpg", b"a" * 100, "image/jpeg")
+    cache.put("http://x/b.jpg", b"b" * 100, "image/jpeg")
+    for _ in range(3):
+        cache.get("http://x/a.jpg")
+    cache.put("http://x/c.jpg", b"c" * 100, "image/jpeg")
+    assert "http://x/a.jpg" in cache and "http://x/b.jpg" not in cache
+
+def test_writes_track_size_without_recounting(tmp_path, monkeypatch):
+    cache = DiskImageCache(tmp_path, max_bytes=10_000)
+    recounts = []
+    used = cache._used
+    monkeypatch.setattr(cache, "_used", lambda: recounts.append(1) or used())
+    for n in range(20):
+        cache.put(f"http://x/{n}.jpg", b"x" * 100, "image/jpeg")
+    cache.put("http://x/0.jpg", b"x" * 40, "image/jpeg")
+    assert len(recounts) == 1 and cache._used_bytes == used() == 1940
+
+def test_pdf_export_reuses_cached_pages(tmp_path):
+    cache = DiskImageCache(tmp_path / "cache")
+    with FakeUpstream(images=3) as upstream:
+        url = f"{upstream.url}/series/title-1/chapter-2/"
+        ChapterImagesScraper(url).download_images_as_pdf(str(tmp_path / "a.pdf"), cache=cache, series="m1")
+        fetched = sum(upstream.stats.values())
+        ChapterImagesScraper(url).download_images_as_pdf(str(tmp_path / "b.pdf"), cache=cache)
+        assert sum(upstream.stats.values()) == fetched + 1
+    assert (tmp_path / "b.pdf").read_bytes().startswith(b"%PDF")
+    assert cache.stats().entries == 3 and cache.hits == 3
+    cache.pin("m1")
+    assert cache.stats().pinned_size == cache.stats().size
@@ -0,0 +1,31 @@
+from io import BytesIO
+import pytest
+from PIL import Image
+from images import derive, choose_variant, DerivativeStore, VARIANTS, WEBP_MAX_DIMENSION
+
+def png(width, height, mode="RGB"):
+    out = BytesIO()
+    Image.new(mode, (width, height), "white").save(out, format="PNG")
+    return out.getvalue()
+
+def test_derive_bounds_width_and_strip_height():
+    with Image.open(BytesIO(derive(png(2000, 500), "thumb"))) as image:
+        assert image.format == "WEBP" and image.size == (240, 60)
+    with Image.open(BytesIO(derive(png(800, 40000, "P"), "webp"))) as image:
+        assert image.size[1] <= WEBP_MAX_DIMENSION
+    with Image.open(BytesIO(derive(png(100, 100), "webp"))) as image:
+        assert image.size == (100, 100)
+
+def test_choose_variant():
+    assert choose_variant("thumb", "image/avif") == "thumb"
+    assert choose_variant("original", "image/webp") is None
+    assert choose_variant(None, "image/webp,*/*") == "webp"
+    assert choose_variant(None, "*/*") is None
+    with pytest.raises(KeyError):
+        choose_variant("huge", None)
+
+def test_store_derive_all(tmp_path):
+    store = DerivativeStore(tmp_path)
+    store.derive_all("chapter", 3, png(300, 300))
+    assert all(store.get("chapter", 3, variant) for variant in VARIANTS)
+    assert store.get("chapter", 4, "thumb") is None
@@ -0,0 +1,83 @@
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import BytesIO
+
+import pytest
+from PIL import Image
+
+from integrity import check_image, sha256_of, ImageIntegrityError, IncompleteDownloadError
+from models import ChapterImage
+from scraper import ChapterImagesScraper
+
+def png(width: int) -> bytes:
+    buffer = BytesIO()
+    Image.effect_noise((width, 200), 64).save(buffer, format="PNG")  # larger than a stream chunk
+    return buffer.getvalue()
+
+PAGES = {f"/{n}.png": png(100 + 40 * n) for n in range(4)}
+
+class Upstream(BaseHTTPRequestHandler):
+    truncate = {"/2.png"}  # first response is cut short
+    ranges = []
+
+    def do_GET(self):
+        data = PAGES[self.path]
+        start = int(self.headers.get("Range", "bytes=0-")[6:-1])
+        Upstream.ranges.append((self.path, start))
+        self.send_response(206 if start else 200)
+        self.send_header("Content-Length", str(len(data) - start))
+        if start:
+            self.send_header("Content-Range", f"bytes {start}-{len(data) - 1}/{len(data)}")
+        self.end_headers()
+        if self.path in Upstream.truncate:
+            Upstream.truncate.discard(self.path)
+            self.wfile.write(data[:len(data) // 2])
+            self.close_connection = True
+            return
+        self.wfile.write(data[start:])
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def upstream():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Upstream)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+
+def test_check_image():
+    data = PAGES["/0.png"]
+    check_image(data, expected_size=len(data), sha256=sha256_of(data))
+    with pytest.raises(IncompleteDownloadError):
+        check_image(data[:-10], expected_size=len(data))
+    with pytest.raises(ImageIntegrityError):
+        check_image(data, sha256="0" * 64)
+    with pytest.raises(ImageIntegrityError):
+        check_image(data[:len(data) // 2])
+
+def test_pdf_resumes_truncated_page_and_keeps_order(upstream, tmp_path, monkeypatch):
+    monkeypatch.setattr(ChapterImagesScraper, "RETRY_BACKOFF", 0)
+    scraper = ChapterImagesScraper(f"{upstream}/series/title/chapter-1/")
+    scraper.images = [ChapterImage(order_no=n, url=f"{upstream}/{n}.png") for n in range(4)]
+    out = tmp_path / "chapter.pdf"
+    scraper.download_images_as_pdf(str(out), max_workers=4)
+    assert [start > 0 for path, start in Upstream.ranges if path == "/2.png"] == [False, True]
+    widths = [int(float(w)) for w in re.findall(rb"/MediaBox \[\s*0 0 ([\d.]+)", out.read_bytes())]
+    assert widths == sorted(widths) and len(set(widths)) == 4  # pages in chapter order
+    assert not (tmp_path / "chapter.pdf.parts").exists()
+
+def test_failed_pages_keep_verified_ones(upstream, tmp_path, monkeypatch):
+    monkeypatch.setattr(ChapterImagesScraper, "RETRY_BACKOFF", 0)
+    scraper = ChapterImagesScraper(f"{upstream}/series/title/chapter-1/")
+    scraper.images = [ChapterImage(order_no=0, url=f"{upstream}/0.png"),
+                      ChapterImage(order_no=1, url=f"{upstream}/1.png")]
+    out = tmp_path / "chapter.pdf"
+    with pytest.raises(RuntimeError):
+        scraper.download_images_as_pdf(str(out), checksums={f"{upstream}/1.png": "0" * 64})
+    assert [p.name for p in (tmp_path / "chapter.pdf.parts").iterdir()] == ["0000.png"]
+    Upstream.ranges.clear()
+    scraper.download_images_as_pdf(str(out))
+    assert Upstream.ranges == [("/1.png", 0)]
+    assert out.exists()
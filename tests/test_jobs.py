@@ -0,0 +1,104 @@
+from datetime import datetime, timedelta
+
+import pytest
+import jobs
+from jobs import JobQueue, PRIORITY_READER, PRIORITY_ARCHIVE, QUEUED, RUNNING, DONE, FAILED, CANCELLED
+from repository import MangaRepository
+from db_models import DownloadJobDB
+from models import MangaDetails, ChapterDetailed, ChapterImage
+
+@pytest.fixture
+def repo(tmp_path):
+    return MangaRepository(f"sqlite:///{tmp_path / 'manga.db'}")
+
+@pytest.fixture
+def queue(repo):
+    return JobQueue(session_factory=repo.session_factory)
+
+def make_chapters(repo, count=2, images=3):
+    url = "https://example.com/manga/a"
+    repo.save_manga(MangaDetails(
+        url=url, title="A", poster="p", genres=[], status="Ongoing", rate=0, description="d",
+        chapters=[ChapterDetailed(url=f"{url}/chapter-{n}", title=f"{n}", order_no=n) for n in range(count)]
+    ))
+    ids = [repo.get_chapter_by_url(f"{url}/chapter-{n}").id for n in range(count)]
+    for chapter_id in ids:
+        repo.upsert_chapter_images(chapter_id, [ChapterImage(order_no=i, url=f"img{i}") for i in range(images)])
+    return ids
+
+def test_claim_by_priority_and_dedup(repo, queue):
+    archive, reader = make_chapters(repo)
+    archive_job = queue.enqueue(archive, priority=PRIORITY_ARCHIVE)
+    reader_job = queue.enqueue(reader, priority=PRIORITY_READER)
+    assert queue.enqueue(archive, priority=PRIORITY_ARCHIVE) == archive_job
+    assert queue.claim("w").id == reader_job
+    assert queue.claim("w").id == archive_job
+    assert queue.claim("w") is None
+    assert queue.depth() == {RUNNING: 2}
+
+def test_retry_backoff_then_fail(repo, queue):
+    chapter_id, = make_chapters(repo, count=1)
+    job_id = queue.enqueue(chapter_id, max_attempts=2)
+    queue.claim("w")
+    assert queue.fail(job_id, "w", "boom") == QUEUED
+    assert queue.claim("w") is None  # waiting for backoff
+    with queue.session_factory() as session:
+        job = session.get(DownloadJobDB, job_id)
+        job.available_at = job.created_at
+        session.commit()
+    assert queue.claim("w").attempts == 2
+    assert queue.fail(job_id, "w", "boom") == FAILED
+
+def test_process_job_and_cancel(repo, queue, monkeypatch):
+    done, cancelled = make_chapters(repo)
+    monkeypatch.setattr(jobs, "fetch_image", lambda url: (url.encode(), "image/png"))
+    queue.enqueue(done)
+    jobs.process_job(queue.claim("w"), queue, repo)
+    assert repo.chapter_status(done) == (3, 3)
+    assert queue.latest_for_chapter(done).status == DONE
+
+    job_id = queue.enqueue(cancelled)
+    job = queue.claim("w")
+    assert queue.cancel(job_id)
+    with pytest.raises(jobs.JobCancelled):
+        jobs.process_job(job, queue, repo)
+    assert repo.chapter_status(cancelled) == (3, 1)
+    assert queue.get(job_id).status == CANCELLED
+
+def test_worker_stops_after_losing_its_lease(repo, queue, monkeypatch):
+    chapter_id, _ = make_chapters(repo)
+    monkeypatch.setattr(jobs, "fetch_image", lambda url: (url.encode(), "image/png"))
+    job_id = queue.enqueue(chapter_id)
+    stale = queue.claim("w1")
+    with repo.session_factory() as session:
+        session.get(DownloadJobDB, job_id).updated_at = datetime.utcnow() - timedelta(seconds=queue.LEASE_SECONDS + 1)
+        session.commit()
+    assert queue.claim("w2").worker == "w2"
+    lease = queue.get(job_id).updated_at
+    assert not queue.heartbeat(job_id, "w1", 50.0)
+    with pytest.raises(jobs.JobCancelled):
+        jobs.process_job(stale, queue, repo)
+    job = queue.get(job_id)
+    assert (job.worker, job.updated_at, job.status) == ("w2", lease, RUNNING)
+    assert queue.heartbeat(job_id, "w2", 50.0)
+
+def test_stale_worker_cannot_fail_or_complete_the_job(repo, queue, monkeypatch):
+    chapter_id, _ = make_chapters(repo)
+    job_id = queue.enqueue(chapter_id)
+    stale = queue.claim("w1")
+    with repo.session_factory() as session:
+        session.get(DownloadJobDB, job_id).updated_at = datetime.utcnow() - timedelta(seconds=queue.LEASE_SECONDS + 1)
+        session.commit()
+    assert queue.claim("w2").worker == "w2"
+    before = queue.get(job_id)
+
+    def slow_fetch(url):
+        raise TimeoutError(url)
+    monkeypatch.setattr(jobs, "fetch_image", slow_fetch)
+    with pytest.raises(TimeoutError) as failure:
+        jobs.process_job(stale, queue, repo)
+    assert queue.fail(stale.id, stale.worker, str(failure.value)) == RUNNING
+    assert not queue.complete(stale.id, stale.worker)
+    job = queue.get(job_id)
+    assert (job.worker, job.status, job.attempts, job.updated_at) == ("w2", RUNNING, 2, before.updated_at)
+    assert queue.complete(job_id, "w2") and queue.get(job_id).status == DONE
@@ -0,0 +1,30 @@
+import json
+import logging
+from logging_config import JsonFormatter, DebugSampler, setup_logging, shutdown_logging
+
+def make_record(level=logging.INFO, **extra):
+    record = logging.LogRecord("scraper", level, __file__, 1, "GET %s", ("https://example.com",), None)
+    record.__dict__.update(extra)
+    return record
+
+def test_json_formatter_includes_structured_fields():
+    entry = json.loads(JsonFormatter().format(make_record(url="https://example.com", status=200, elapsed=0.1)))
+    assert entry["message"] == "GET https://example.com"
+    assert (entry["url"], entry["status"], entry["elapsed"]) == ("https://example.com", 200, 0.1)
+    assert "worker" not in entry
+
+def test_debug_sampler_only_drops_debug():
+    sampler = DebugSampler(0.0)
+    assert not sampler.filter(make_record(logging.DEBUG))
+    assert sampler.filter(make_record(logging.WARNING))
+
+def test_setup_logging_writes_through_queue(tmp_path):
+    log_file = tmp_path / "api.log"
+    setup_logging(level="DEBUG", log_file=str(log_file))
+    try:
+        logging.getLogger("test").info("hello", extra={"worker": "w1"})
+        logging.getLogger("urllib3.connectionpool").debug("noise")
+    finally:
+        shutdown_logging()
+    lines = [json.loads(line) for line in log_file.read_text(encoding="utf-8").splitlines()]
+    assert [(line["message"], line["worker"]) for line in lines] == [("hello", "w1")]
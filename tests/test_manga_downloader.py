@@ -0,0 +1,34 @@
+import io
+
+import img2pdf
+from PIL import Image
+
+import manga_downloader
+from manga_downloader import MangaDownloader
+from models import MangaDetails, ChapterDetailed, ChapterImage
+
+def png():
+    out = io.BytesIO()
+    Image.new("RGB", (4, 4), "white").save(out, "PNG")
+    return out.getvalue()
+
+class FakeChapter:
+    def __init__(self, chapter_url):
+        self.images = [ChapterImage(order_no=n, url=f"{chapter_url}{n}.png") for n in range(2)]
+
+    def download_images_as_pdf(self, out_path, cache=None, series=None):
+        with open(out_path, "wb") as f:
+            f.write(img2pdf.convert([png() for _ in self.images]))
+
+def test_downloaded_chapter_pdf_is_served(tmp_path, monkeypatch):
+    monkeypatch.setattr(manga_downloader, "ChapterImagesScraper", FakeChapter)
+    downloader = MangaDownloader(f"sqlite:///{tmp_path / 'manga.db'}", str(tmp_path / "downloads"))
+    url = "https://example.com/series/a/"
+    downloader.db.upsert_manga([MangaDetails(
+        url=url, title="A", poster="p", genres=[], status="Ongoing", rate=4.5, description="d",
+        chapters=[ChapterDetailed(url=f"{url}chapter-1/", title="Chapter 1", order_no=0)])])
+    assert downloader.download_chapter(f"{url}chapter-1/", download_images=True)
+    chapter = downloader.db.get_chapter_by_url(f"{url}chapter-1/")
+    assert downloader.db.chapter_status(chapter.id) == (2, 2)
+    with open(chapter.pdf_path, "rb") as f:
+        assert downloader.db.chapter_pdf(chapter.id) == f.read()
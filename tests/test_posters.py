@@ -0,0 +1,71 @@
+import time
+from io import BytesIO
+
+from fastapi.testclient import TestClient
+from PIL import Image
+
+import api
+from fake_upstream import FakeUpstream, synthetic_jpeg
+from models import MangaDetails
+from posters import PosterPipeline, POSTER_SIZES, resize_poster
+from repository import MangaRepository
+
+def test_resize_poster_standard_sizes():
+    sizes = resize_poster(synthetic_jpeg(0, 500, 700))
+    assert {name: size[2:] for name, size in sizes.items()} == {
+        "large": (500, 700), "medium": (360, 504), "small": (160, 224)}
+    assert Image.open(BytesIO(sizes["small"][0])).format == "JPEG"
+
+def test_pipeline_dedupes_and_stores_once(tmp_path):
+    repo = MangaRepository(f"sqlite:///{tmp_path / 'manga.db'}")
+    fetched = []
+    def fetch(url):
+        fetched.append(url)
+        if "broken" in url:
+            raise ValueError("not an image")
+        return synthetic_jpeg(1, 400, 600), "image/jpeg"
+    ids = [repo.save_manga(MangaDetails(url=f"https://x/{n}/", title=str(n), poster="https://x/shared.jpg",
+                                        genres=[], status="Ongoing", rate=0, description="d", chapters=[]))
+           for n in range(2)]
+    pipeline = PosterPipeline(repo, fetch=fetch, flush_interval=0.05)
+    assert pipeline.submit(["https://x/shared.jpg", "https://x/shared.jpg", "https://x/broken.jpg"]) == 2
+    pipeline.stop()
+    assert sorted(fetched) == ["https://x/broken.jpg", "https://x/shared.jpg"]
+    assert (pipeline.stored, pipeline.failures) == (1, 1)
+    assert pipeline.ingest(["https://x/shared.jpg"]) == 0 and pipeline.submit(["https://x/broken.jpg"]) == 0
+    assert repo.get_poster(ids[0], "large") == repo.get_poster(ids[1], "large")
+    assert repo.has_poster(ids[1]) and repo.posters_of_stored_manga() == []
+
+def test_save_returns_before_poster_is_fetched(tmp_path, monkeypatch):
+    repo = MangaRepository(f"sqlite:///{tmp_path / 'manga.db'}")
+    pipeline = PosterPipeline(repo, flush_interval=0.05)
+    monkeypatch.setattr(api, "repository", repo)
+    monkeypatch.setattr(api, "poster_pipeline", pipeline)
+    client = TestClient(api.app)
+    with FakeUpstream(latency=0.05) as upstream:
+        manga_id = client.post("/manga/save", params={"url": f"{upstream.url}/series/title-3/"}).json()["manga_id"]
+        pipeline.stop()
+    for size, width in POSTER_SIZES.items():
+        resp = client.get(f"/manga/{manga_id}/poster", params={"size": size})
+        assert resp.headers["content-type"] == "image/jpeg"
+        assert Image.open(BytesIO(resp.content)).width == width
+    assert client.get(f"/manga/{manga_id}").json()["has_poster"] is True
+    assert client.get(f"/manga/{manga_id}/poster", params={"size": "huge"}).status_code == 400
+
+def test_failed_poster_is_retried_after_a_while(tmp_path):
+    repo = MangaRepository(f"sqlite:///{tmp_path / 'manga.db'}")
+    repo.save_manga(MangaDetails(url="https://x/0/", title="0", poster="https://x/p.jpg", genres=[],
+                                 status="Ongoing", rate=0, description="d", chapters=[]))
+    attempts = []
+    def fetch(url):
+        attempts.append(url)
+        if len(attempts) == 1:
+            raise ConnectionError("reset by peer")
+        return synthetic_jpeg(2, 400, 600), "image/jpeg"
+    pipeline = PosterPipeline(repo, fetch=fetch, flush_interval=0.05, retry_after=0.2)
+    assert pipeline.ingest(["https://x/p.jpg"]) == 0
+    assert pipeline.submit(["https://x/p.jpg"]) == 0
+    time.sleep(0.25)
+    assert pipeline.submit(["https://x/p.jpg"]) == 1
+    pipeline.stop()
+    assert (pipeline.stored, pipeline.failures, len(pipeline._failed)) == (1, 1, 0)
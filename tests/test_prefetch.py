@@ -0,0 +1,46 @@
+import threading
+import time
+from cache import TTLCache
+from models import ChapterDetailed, ChapterImage
+from prefetch import ReadAhead, manga_url_of
+
+MANGA = "https://example.com/series/a"
+CHAPTERS = [ChapterDetailed(url=f"{MANGA}/chapter-{n}/", title=str(n), order_no=n) for n in range(6)]
+
+def wait_for(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not predicate() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return predicate()
+
+def test_cache_expiry_and_lru():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert "b" not in cache and cache.get("a") == 1
+    cache.set("d", 4, ttl=-1)
+    assert cache.get("d") is None
+
+def test_manga_url_of():
+    assert manga_url_of(f"{MANGA}/chapter-1/") == MANGA
+
+def test_schedule_warms_next_chapters_within_budget():
+    release = threading.Event()
+    fetched = []
+    def fetch_images(url):
+        fetched.append(url)
+        release.wait(2)
+        return [ChapterImage(order_no=0, url=url + "1.jpg")]
+    read_ahead = ReadAhead(TTLCache(), budget=2, max_workers=4,
+                           fetch_images=fetch_images, fetch_chapters=lambda url: CHAPTERS)
+    read_ahead.schedule(CHAPTERS[1].url, depth=3)
+    assert wait_for(lambda: len(fetched) == 2)
+    time.sleep(0.05)
+    release.set()
+    assert set(fetched) == {CHAPTERS[2].url, CHAPTERS[3].url}
+    assert wait_for(lambda: CHAPTERS[3].url in read_ahead.image_cache)
+    read_ahead.chapter_images(CHAPTERS[2].url)
+    assert len(fetched) == 2
+    assert read_ahead.next_chapters(CHAPTERS[5].url, 2) == []
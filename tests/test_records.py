@@ -0,0 +1,28 @@
+import pickle
+
+from models import MangaDetails, ChapterDetailed
+from records import MangaRecord, ChapterRecord
+from repository import MangaRepository
+
+URL = "https://example.com/series/title/"
+
+def test_build_shares_strings():
+    a = MangaRecord.build(URL, "T", "p", ["Act" + "ion"], "On" + "going", "4.5", "d",
+                          [(URL + "chapter-1/", "Chapter 1"), ("https://other.com/c/", "Extra")])
+    b = MangaRecord.build(URL, "T", "p", ["Action"], "Ongoing", 0, "d", [])
+    assert a.genres[0] is b.genres[0] and a.status is b.status
+    assert a.rate == 4.5 and b.rate == 0.0
+    assert a.chapters[0] == ChapterRecord(URL, "chapter-1/", "Chapter 1", 0)
+    assert a.chapters[0].base is a.url
+    assert [c.url for c in a.chapters] == [URL + "chapter-1/", "https://other.com/c/"]
+    assert pickle.loads(pickle.dumps(a)) == a
+
+def test_model_round_trip_and_repository(tmp_path):
+    details = MangaDetails(url=URL, title="T", poster="p", genres=["Action"], status="Ongoing", rate=4.5,
+                           description="d", chapters=[ChapterDetailed(url=URL + "chapter-3/", title="3", order_no=7)])
+    record = MangaRecord.from_model(details)
+    assert record.to_model() == details
+    repo = MangaRepository(f"sqlite:///{tmp_path / 'manga.db'}")
+    manga_id = repo.upsert_manga([record])[URL]
+    assert repo.chapter_count(manga_id) == 1
+    assert repo.get_chapter_by_url(URL + "chapter-3/") is not None
@@ -0,0 +1,71 @@
+import sqlite3
+
+import pytest
+from repository import MangaRepository
+from models import MangaDetails, ChapterDetailed, ChapterImage
+
+@pytest.fixture
+def repo(tmp_path):
+    return MangaRepository(f"sqlite:///{tmp_path / 'manga.db'}")
+
+def make_details(url="https://example.com/manga/a", chapters=2):
+    return MangaDetails(
+        url=url, title="A", poster="p", genres=["Action", "Drama"], status="Ongoing",
+        rate=4.5, description="d",
+        chapters=[ChapterDetailed(url=f"{url}/chapter-{n}", title=f"Chapter {n}", order_no=n)
+                  for n in range(1, chapters + 1)]
+    )
+
+def test_upsert_manga_is_idempotent(repo):
+    details = make_details()
+    first = repo.upsert_manga([details])
+    second = repo.upsert_manga([make_details(chapters=3)])
+    assert first == second
+    assert repo.existing_manga_urls([details.url, "https://example.com/other"]) == {details.url}
+    assert repo.manga_stats(first[details.url]) == (3, 0)
+
+def test_image_download_status(repo):
+    manga_id = repo.save_manga(make_details(chapters=1))
+    chapter_id = repo.get_chapter_by_url("https://example.com/manga/a/chapter-1").id
+    repo.upsert_chapter_images(chapter_id, [ChapterImage(order_no=i, url=f"img{i}") for i in range(3)])
+    assert repo.chapter_status(chapter_id) == (3, 0)
+    repo.mark_images_downloaded(chapter_id, [(0, b"a", "image/png", None), (2, b"c", "image/png", None)])
+    assert repo.chapter_status(chapter_id) == (3, 2)
+    assert repo.pending_images(chapter_id) == [(1, "img1")]
+    assert repo.get_image(chapter_id, 2).image_data == b"c"
+    repo.mark_images_downloaded(chapter_id, [(1, b"b", "image/png", None)])
+    assert repo.manga_stats(manga_id) == (1, 1)
+
+def test_database_of_original_crawler_is_upgraded(tmp_path):
+    db = sqlite3.connect(tmp_path / "old.db")
+    db.executescript("""
+        CREATE TABLE manga (id VARCHAR(36) PRIMARY KEY, title VARCHAR(255) NOT NULL, url VARCHAR(500) NOT NULL,
+            poster VARCHAR(500), description TEXT, status VARCHAR(50), rate FLOAT, created_at DATETIME,
+            updated_at DATETIME);
+        CREATE UNIQUE INDEX ix_manga_url ON manga (url);
+        CREATE TABLE genre (id VARCHAR(36) PRIMARY KEY, manga_id VARCHAR(36) NOT NULL REFERENCES manga (id),
+            name VARCHAR(100) NOT NULL);
+        CREATE TABLE chapter (id VARCHAR(36) PRIMARY KEY, manga_id VARCHAR(36) NOT NULL REFERENCES manga (id),
+            order_no VARCHAR NOT NULL, title VARCHAR(255) NOT NULL, url VARCHAR(500) NOT NULL, created_at DATETIME);
+        CREATE UNIQUE INDEX ix_chapter_url ON chapter (url);
+        CREATE TABLE chapter_image (id VARCHAR(36) PRIMARY KEY, chapter_id VARCHAR(36) NOT NULL
+            REFERENCES chapter (id), order_no VARCHAR NOT NULL, url VARCHAR(500) NOT NULL);
+        INSERT INTO manga (id, title, url) VALUES ('m', 'A', 'https://example.com/manga/a');
+        INSERT INTO chapter VALUES ('c', 'm', '10', 'Chapter 1', 'https://example.com/manga/a/chapter-1', NULL),
+            ('p', 'm', '9', 'Prologue', 'https://example.com/manga/a/prologue', NULL),
+            ('x', 'm', '11', 'Chapter 1 Extra', 'https://example.com/manga/a/chapter-1-extra', NULL);
+        INSERT INTO chapter_image VALUES ('i1', 'c', '10', 'old10'), ('i2', 'c', '2', 'img2'),
+            ('i3', 'c', '10', 'img10');
+    """)
+    db.commit()
+    db.close()
+
+    repo = MangaRepository(f"sqlite:///{tmp_path / 'old.db'}")
+    assert repo.pending_images("c") == [(2, "img2"), (10, "img10")]
+    repo.upsert_chapter_images("c", [ChapterImage(order_no=2, url="new2")])
+    assert repo.chapter_status("c") == (2, 0)
+    assert repo.get_chapter_by_url("https://example.com/manga/a/chapter-1").order_no == 10
+    assert [(c.title, c.number, c.sort_key) for c in repo.chapters_after("m")] == [
+        ("Prologue", None, 0), ("Chapter 1", 1.0, 1000), ("Chapter 1 Extra", 1.0, 1001)]
+    assert repo.adjacent_chapter("p").id == "c"
+    assert repo.upsert_manga([make_details(chapters=2)])["https://example.com/manga/a"] == "m"
@@ -0,0 +1,55 @@
+import json
+
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse, Response
+from fastapi.testclient import TestClient
+
+import benchmarks
+from responses import CompressionMiddleware, FastJSONResponse, dumps, negotiate
+
+def make_client():
+    app = FastAPI(default_response_class=FastJSONResponse)
+    app.add_middleware(CompressionMiddleware, minimum_size=100)
+
+    @app.get("/details")
+    def details():
+        return FastJSONResponse(benchmarks.synthetic_details(1, 50)[0])
+
+    @app.get("/small")
+    def small():
+        return {"ok": True}
+
+    @app.get("/image")
+    def image():
+        return Response(b"\xff" * 500, media_type="image/jpeg")
+
+    @app.get("/stream")
+    def stream():
+        return StreamingResponse((b"x" * 200 for _ in range(3)), media_type="text/plain")
+
+    return TestClient(app)
+
+def test_dumps_matches_pydantic():
+    details = benchmarks.synthetic_details(1, 3)[0]
+    assert json.loads(dumps(details)) == details.model_dump(mode="json")
+    assert json.loads(dumps([details])) == [details.model_dump(mode="json")]
+    assert json.loads(dumps({"a": [1, 2]})) == {"a": [1, 2]}
+
+def test_negotiate():
+    assert negotiate("gzip, deflate", ["zstd", "br", "gzip"]) == "gzip"
+    assert negotiate("gzip;q=0.5, br", ["zstd", "br", "gzip"]) == "br"
+    assert negotiate("*", ["zstd", "br", "gzip"]) == "zstd"
+    assert negotiate("gzip;q=0, identity", ["gzip"]) is None
+
+def test_compression_middleware():
+    client = make_client()
+    resp = client.get("/details", headers={"Accept-Encoding": "gzip"})
+    assert resp.headers["content-encoding"] == "gzip"
+    assert resp.headers["vary"] == "Accept-Encoding"
+    assert int(resp.headers["content-length"]) < len(resp.content)
+    assert resp.json()["chapters"][49]["title"] == "Chapter 49"
+    raw = client.get("/details", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in raw.headers and raw.json() == resp.json()
+    for path in ("/small", "/image", "/stream"):
+        assert "content-encoding" not in client.get(path, headers={"Accept-Encoding": "gzip"}).headers
+    assert len(client.get("/stream", headers={"Accept-Encoding": "gzip"}).content) == 600
@@ -0,0 +1,76 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+from selectolax.lexbor import LexborHTMLParser
+
+import benchmarks
+import scraper
+from models import MangaDetails, ChapterDetailed
+from records import ListingCard, MangaRecord
+from repository import MangaRepository
+from scraper import SearchResultsScraper, SerieScraper
+
+def test_iter_details_threads_and_processes_agree():
+    urls = [f"https://example.com/series/title-{n}/" for n in range(7)]
+    for processes in (1, 2):
+        batches = list(SerieScraper.iter_details(urls, max_workers=2, processes=processes, shard_size=3,
+                                                 fetch=benchmarks.parse_details_page))
+        assert sum(done for done, _ in batches) == len(urls)
+        details = [d for _, batch in batches for d in batch]
+        assert sorted(d.url for d in details) == sorted(urls)
+        assert details[0].chapters[0].title == "Chapter 1"
+
+def test_import_is_lazy(tmp_path):
+    code = ("import sys, api; "
+            "print(' '.join(m for m in ('img2pdf', 'tqdm', 'sqlalchemy.dialects.postgresql') if m in sys.modules))")
+    out = subprocess.run([sys.executable, "-c", code], cwd=tmp_path, capture_output=True, text=True, check=True,
+                         env={**os.environ, "PYTHONPATH": str(Path(__file__).parent.parent)})
+    assert out.stdout.strip() == ""
+
+def test_changed_links_compares_listing_cards(tmp_path):
+    repo = MangaRepository(f"sqlite:///{tmp_path / 'manga.db'}")
+    stored = [MangaRecord.from_model(MangaDetails(
+        url=f"https://example.com/series/{n}/", title=str(n), poster="p", genres=[], status="Ongoing", rate=4.5,
+        description="d", chapters=[ChapterDetailed(url=f"https://example.com/series/{n}/chapter-1/",
+                                                   title="Chapter 1", order_no=0)]))
+        for n in range(4)]
+    repo.upsert_manga(stored)
+    chapter = lambda n, c: (f"https://example.com/series/{n}/chapter-{c}/", f"Chapter {c}")
+    cards = [
+        ListingCard("https://example.com/series/0/", "0", (chapter(0, 1),), "OnGoing", 4.5),
+        ListingCard("https://example.com/series/1/", "1", (chapter(1, 2), chapter(1, 1)), "Ongoing", 4.5),
+        ListingCard("https://example.com/series/2/", "2", (chapter(2, 1),), "Completed", None),
+        ListingCard("https://example.com/series/3/", "3", ()),
+        ListingCard("https://example.com/series/new/", "new", (chapter("new", 1),)),
+    ]
+    assert SerieScraper.changed_links(cards, repo) == {
+        "https://example.com/series/1/", "https://example.com/series/2/",
+        "https://example.com/series/3/", "https://example.com/series/new/"}
+
+def test_listing_links_outside_cards_are_kept(monkeypatch):
+    page = LexborHTMLParser(
+        "<div class='h4'>3 results</div>"
+        "<div class='page-item-detail'><h3><a href='https://example.com/series/a/'>A</a></h3>"
+        "<span class='chapter'><a href='https://example.com/series/a/chapter-2/'>Chapter 2</a></span></div>"
+        "<div class='item'><h3><a href='https://example.com/series/b/'>B</a></h3></div>"
+        "<h3><a href='https://example.com/series/c/'>C</a></h3>")
+    monkeypatch.setattr(scraper, "get_html", lambda url, params=None: page)
+    cards = SerieScraper.get_cards(1)
+    assert [card.url for card in cards] == [f"https://example.com/series/{s}/" for s in "abc"]
+    assert cards[0].chapters and cards[1] == ListingCard("https://example.com/series/b/", "B", ())
+    assert SerieScraper.start() == {card.url for card in cards} == set(SerieScraper.start_cards())
+
+def test_malformed_search_result_is_not_read_as_no_results(monkeypatch):
+    html = benchmarks.search_page_html(3).replace('class="latest-chap"', 'class="other"', 1)
+    monkeypatch.setattr(scraper, "get_html", lambda url, params=None: LexborHTMLParser(html))
+    search = SearchResultsScraper("title")
+    with pytest.raises(AttributeError):
+        search.prepare_results()
+    assert search.result_no == 3
+    monkeypatch.setattr(scraper, "get_html", lambda url, params=None: LexborHTMLParser("<p>Nothing found</p>"))
+    search = SearchResultsScraper("nothing")
+    search.prepare_results()
+    assert (search.result_no, search.results) == (0, [])
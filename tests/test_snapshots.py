@@ -0,0 +1,82 @@
+import gzip
+
+import pytest
+
+from models import ChapterDetailed, ChapterImage, MangaDetails
+from repository import MangaRepository
+from snapshots import SnapshotError, diff_snapshots, export_snapshot, import_snapshot
+
+def details(n, chapters=3, title=None):
+    return MangaDetails(url=f"https://x/series/{n}/", title=title or f"Title {n}", poster=f"https://x/{n}.jpg",
+                        genres=["Drama", "Action"], status="Ongoing", rate=4.5, description="d",
+                        chapters=[ChapterDetailed(url=f"https://x/series/{n}/chapter-{c}/", title=f"Chapter {c}",
+                                                  order_no=c) for c in range(chapters)])
+
+def source(tmp_path, name="source"):
+    repo = MangaRepository(f"sqlite:///{tmp_path / f'{name}.db'}")
+    repo.upsert_manga([details(n) for n in range(3)])
+    chapter = repo.get_chapter_by_url("https://x/series/0/chapter-1/")
+    repo.upsert_chapter_images(chapter.id, [ChapterImage(url=f"https://x/p{n}.jpg", order_no=n) for n in range(2)])
+    return repo
+
+def test_full_snapshot_round_trip(tmp_path):
+    repo = source(tmp_path)
+    info = export_snapshot(repo, str(tmp_path / "full.jsonl.gz"))
+    assert (info.kind, info.manga, info.base) == ("full", 3, None)
+
+    fresh = MangaRepository(f"sqlite:///{tmp_path / 'fresh.db'}")
+    assert import_snapshot(fresh, [str(tmp_path / "full.jsonl.gz")], batch_size=2)[0].id == info.id
+    assert list(fresh.iter_catalog()) == list(repo.iter_catalog())
+    assert fresh.last_snapshot().snapshot_id == info.id
+    assert export_snapshot(fresh, str(tmp_path / "again.jsonl.gz")).id == info.id
+
+def test_diff_carries_changes_and_deletes(tmp_path):
+    repo = source(tmp_path)
+    export_snapshot(repo, str(tmp_path / "v1.jsonl.gz"))
+    fresh = MangaRepository(f"sqlite:///{tmp_path / 'fresh.db'}")
+    import_snapshot(fresh, [str(tmp_path / "v1.jsonl.gz")])
+
+    repo.upsert_manga([details(1, chapters=5, title="Renamed"), details(3)])
+    repo.delete_manga(["https://x/series/2/"])
+    diff = export_snapshot(repo, str(tmp_path / "v2.diff.jsonl.gz"), base=str(tmp_path / "v1.jsonl.gz"))
+    assert (diff.kind, diff.manga, diff.deleted) == ("diff", 2, 1)
+    export_snapshot(repo, str(tmp_path / "v2.jsonl.gz"))
+    assert diff_snapshots(str(tmp_path / "v1.jsonl.gz"), str(tmp_path / "v2.jsonl.gz"),
+                          str(tmp_path / "d.jsonl.gz"))[:] == diff[:]
+
+    import_snapshot(fresh, [str(tmp_path / "v2.diff.jsonl.gz")])
+    assert list(fresh.iter_catalog()) == list(repo.iter_catalog())
+    assert fresh.get_manga_by_url("https://x/series/2/") is None
+
+def test_diff_only_applies_to_its_base(tmp_path):
+    repo = source(tmp_path)
+    export_snapshot(repo, str(tmp_path / "v1.jsonl.gz"))
+    repo.upsert_manga([details(4)])
+    export_snapshot(repo, str(tmp_path / "v2.jsonl.gz"), base=str(tmp_path / "v1.jsonl.gz"))
+
+    fresh = MangaRepository(f"sqlite:///{tmp_path / 'fresh.db'}")
+    with pytest.raises(SnapshotError, match="applies to state"):
+        import_snapshot(fresh, [str(tmp_path / "v2.jsonl.gz")])
+    assert import_snapshot(fresh, [str(tmp_path / "v2.jsonl.gz")], force=True)[0].manga == 1
+
+def test_failed_export_leaves_no_snapshot(tmp_path, monkeypatch):
+    repo = source(tmp_path)
+    def failing(batch_size=500):
+        yield next(MangaRepository.iter_catalog(repo))
+        raise RuntimeError("database went away")
+    monkeypatch.setattr(repo, "iter_catalog", failing)
+    with pytest.raises(RuntimeError):
+        export_snapshot(repo, str(tmp_path / "full.jsonl.gz"))
+    assert list(tmp_path.glob("full.jsonl.gz*")) == []
+
+def test_truncated_snapshot_is_rejected(tmp_path):
+    repo = source(tmp_path)
+    export_snapshot(repo, str(tmp_path / "full.jsonl.gz"))
+    with gzip.open(tmp_path / "full.jsonl.gz", "rt") as f:
+        lines = f.readlines()
+    with gzip.open(tmp_path / "cut.jsonl.gz", "wt") as f:
+        f.writelines(lines[:-1])
+    fresh = MangaRepository(f"sqlite:///{tmp_path / 'fresh.db'}")
+    with pytest.raises(SnapshotError, match="footer is missing"):
+        import_snapshot(fresh, [str(tmp_path / "full.jsonl.gz"), str(tmp_path / "cut.jsonl.gz")])
+    assert fresh.last_snapshot() is None and list(fresh.iter_catalog()) == []
@@ -0,0 +1,27 @@
+import json
+import pytest
+from models import ChapterImage
+from streaming import ndjson_lines, sse_events, stream_format, NDJSON, SSE
+
+IMAGES = [ChapterImage(order_no=n, url=f"https://example.com/{n}.jpg") for n in range(2)]
+
+def failing():
+    yield IMAGES[0]
+    raise RuntimeError("upstream down")
+
+def test_ndjson_lines():
+    lines = list(ndjson_lines(IMAGES))
+    assert [json.loads(line)["order_no"] for line in lines] == [0, 1]
+    assert json.loads(list(ndjson_lines(failing()))[-1]) == {"error": "upstream down"}
+
+def test_sse_events():
+    events = list(sse_events(IMAGES))
+    assert events[0].startswith("data: {") and events[-1] == 'event: end\ndata: {"count": 2}\n\n'
+    assert list(sse_events(failing()))[-1].startswith("event: error")
+
+def test_stream_format():
+    assert stream_format(None, "text/event-stream") == SSE
+    assert stream_format(None, None) == NDJSON
+    assert stream_format("ndjson", "text/event-stream") == NDJSON
+    with pytest.raises(KeyError):
+        stream_format("xml", None)
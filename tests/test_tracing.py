@@ -0,0 +1,46 @@
+import json
+import time
+import scraper
+import tracing
+from models import MangaDetails
+from records import MangaRecord
+from repository import MangaRepository
+from scraper import SerieScraper
+
+def test_percentile():
+    assert tracing.percentile([], 50) == 0.0
+    assert tracing.percentile([1.0, 2.0, 3.0, 4.0], 50) == 2.5
+    assert tracing.percentile([1.0, 2.0], 100) == 2.0
+
+def test_stages_are_charged_to_bound_urls():
+    trace = tracing.CrawlTrace()
+    with tracing.stage("fetch"):
+        pass  # inactive, not recorded
+    with trace.active():
+        with tracing.bind("a", "manga"), tracing.stage("fetch"):
+            time.sleep(0.01)
+        with tracing.bind(["a", "b"], "manga"), tracing.stage("write"):
+            time.sleep(0.01)
+    report = trace.report()
+    assert report["urls"] == 2
+    assert set(report["stages"]) == {"manga.fetch", "manga.write"}
+    assert report["slowest"][0]["url"] == "a"
+    shares = {item["url"]: item["stages"]["manga.write"] for item in report["slowest"]}
+    assert abs(shares["a"] - shares["b"]) < 1e-9
+
+def test_save_all_manga_writes_trace(tmp_path, monkeypatch):
+    urls = {f"https://example.com/series/{n}/" for n in range(3)}
+    class FakeDetails:
+        def __init__(self, url):
+            self.record = MangaRecord.from_model(MangaDetails(
+                url=url, title=url, poster="p", genres=["Action"], status="Ongoing",
+                rate=1.0, description="d", chapters=[]))
+    monkeypatch.setattr(SerieScraper, "start", staticmethod(lambda: set(urls)))
+    monkeypatch.setattr(scraper, "MangaDetailsScarper", FakeDetails)
+    repo = MangaRepository(f"sqlite:///{tmp_path / 'manga.db'}")
+    path = tmp_path / "trace.json"
+    SerieScraper.save_all_manga(max_workers=2, batch_size=2, repository=repo, trace_path=str(path))
+    report = json.loads(path.read_text())
+    assert repo.existing_manga_urls(urls) == urls
+    assert {"manga.exists", "manga.write", "manga.commit"} <= set(report["stages"])
+    assert report["urls"] == 3
@@ -0,0 +1,84 @@
+import asyncio
+import json
+
+import scraper
+
+from models import MangaDetails, ChapterDetailed
+from records import MangaRecord, ListingCard
+from repository import MangaRepository
+from scraper import SerieScraper
+from updates import UpdatePoller, UpdateBroadcaster
+
+URL = "https://example.com/series/title/"
+
+CARDS_HTML = """
+<div class="page-item-detail"><h3><a href="https://example.com/series/title/">Title</a></h3>
+  <div class="meta-item rating"><span class="score">4.5</span></div>
+  <span class="chapter"><a href="https://example.com/series/title/chapter-3/">Chapter 3</a></span>
+  <span class="chapter"><a href="https://example.com/series/title/chapter-2/">Chapter 2</a></span>
+</div>
+"""
+
+def chapter(n):
+    return (f"{URL}chapter-{n}/", f"Chapter {n}")
+
+def stored_repo(tmp_path, count):
+    repo = MangaRepository(f"sqlite:///{tmp_path / 'manga.db'}")
+    details = MangaDetails(url=URL, title="Title", poster="p", genres=[], status="Ongoing", rate=0, description="d",
+                           chapters=[ChapterDetailed(url=u, title=t, order_no=n)
+                                     for n, (u, t) in enumerate(chapter(n) for n in range(1, count + 1))])
+    manga_id = repo.upsert_manga([MangaRecord.from_model(details)])[URL]
+    return repo, manga_id
+
+def test_get_cards(monkeypatch):
+    from selectolax.lexbor import LexborHTMLParser
+    requested = []
+    monkeypatch.setattr(scraper, "get_html", lambda url: requested.append(url) or LexborHTMLParser(CARDS_HTML))
+    cards = SerieScraper.get_cards(1, latest=True)
+    assert cards == [ListingCard(URL, "Title", (chapter(3), chapter(2)), None, 4.5)]
+    assert requested == ["https://azoramoon.com/series/page/1/?m_orderby=latest"]
+
+def test_poller_stores_new_chapters_and_notifies(tmp_path):
+    repo, manga_id = stored_repo(tmp_path, 2)
+    pages = {1: [ListingCard(URL, "Title", (chapter(3), chapter(2))),
+                 ListingCard("https://example.com/series/unknown/", "Other", (("https://example.com/x/", "1"),))]}
+    received = []
+    poller = UpdatePoller(repo, [received.extend], fetch_cards=lambda page: pages.get(page, []),
+                          fetch_details=lambda url: None)
+    updates = poller.poll_once()
+    assert [(u.url, u.number, u.manga_id) for u in updates] == [(f"{URL}chapter-3/", 3.0, manga_id)]
+    assert received == updates
+    assert repo.chapter_count(manga_id) == 3
+    assert poller.poll_once() == []
+
+def test_poller_fills_gaps_from_details(tmp_path):
+    repo, manga_id = stored_repo(tmp_path, 2)
+    details = MangaDetails(url=URL, title="Title", poster="p", genres=[], status="Ongoing", rate=0, description="d",
+                           chapters=[ChapterDetailed(url=u, title=t, order_no=n)
+                                     for n, (u, t) in enumerate(chapter(n) for n in range(1, 6))])
+    poller = UpdatePoller(repo, fetch_cards=lambda page: [ListingCard(URL, "Title", (chapter(5), chapter(4)))] if page == 1 else [],
+                          fetch_details=lambda url: details)
+    updates = poller.poll_once()
+    assert [u.number for u in updates] == [3.0, 4.0, 5.0]
+    assert repo.chapter_count(manga_id) == 5
+
+def test_broadcaster_filters_by_manga(tmp_path):
+    repo, manga_id = stored_repo(tmp_path, 1)
+    poller = UpdatePoller(repo, fetch_cards=lambda page: [ListingCard(URL, "Title", (chapter(2), chapter(1)))] if page == 1 else [])
+    broadcaster = UpdateBroadcaster()
+
+    async def consume():
+        other = broadcaster.events("other-id")
+        events = broadcaster.events(manga_id)
+        first = asyncio.ensure_future(events.__anext__())
+        asyncio.ensure_future(other.__anext__())
+        while len(broadcaster) < 2:
+            await asyncio.sleep(0.01)
+        broadcaster.publish(poller.poll_once())
+        frame = await asyncio.wait_for(first, 1)
+        await events.aclose()
+        return frame
+
+    frame = asyncio.run(consume())
+    assert frame.startswith("event: chapter\n")
+    assert json.loads(frame.split("data: ", 1)[1])["url"] == f"{URL}chapter-2/"
@@ -0,0 +1,180 @@
+"""
+Per-stage timing traces for catalog crawls.
+
+When a CrawlTrace is active, hot paths report how long each stage took
+(listing pages, network fetch, HTML parse, database existence check, write
+and commit) for the URL the current thread is working on. At the end of the
+crawl the trace summarizes percentiles, the slowest URLs and the share of
+time spent in each stage, so we can decide whether to scale threads, the
+database or parsing.
+
+When no trace is active ``stage()`` costs a single global lookup.
+"""
+
+import json
+import logging
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+_local = threading.local()
+_active: Optional["CrawlTrace"] = None
+
+def percentile(values: Sequence[float], q: float) -> float:
+    """
+    Compute a percentile with linear interpolation.
+
+    Args:
+        values (Sequence[float]): Sorted values
+        q (float): Percentile between 0 and 100
+
+    Returns:
+        float: The percentile, 0.0 for no values
+    """
+    if not values:
+        return 0.0
+    pos = (len(values) - 1) * q / 100
+    low = int(pos)
+    high = min(low + 1, len(values) - 1)
+    return values[low] + (values[high] - values[low]) * (pos - low)
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """
+    Time a stage for the URLs bound to the current thread.
+
+    Args:
+        name (str): Stage name, prefixed with the category of the binding
+    """
+    trace = _active
+    keys = getattr(_local, "keys", None)
+    if trace is None or keys is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        trace.record(keys, f"{_local.category}.{name}", time.perf_counter() - start)
+
+@contextmanager
+def bind(keys, category: str) -> Iterator[None]:
+    """
+    Attribute stages timed by the current thread to one or more URLs.
+
+    When several URLs are bound (a batched write), each one is charged an
+    equal share of the stage time.
+
+    Args:
+        keys (str | Sequence[str]): URL or URLs being processed
+        category (str): Stage category, such as "listing", "manga" or "db"
+    """
+    previous = (getattr(_local, "keys", None), getattr(_local, "category", None))
+    _local.keys = [keys] if isinstance(keys, str) else list(keys)
+    _local.category = category
+    try:
+        yield
+    finally:
+        _local.keys, _local.category = previous
+
+class CrawlTrace:
+    """
+    Collect stage timings of a crawl and build a report.
+
+    Example:
+        >>> trace = CrawlTrace()
+        >>> with trace.active():
+        ...     SerieScraper.save_all_manga()
+        >>> trace.write("crawl-trace.json")
+    """
+
+    def __init__(self):
+        """Initialize an empty trace."""
+        self.durations: Dict[str, List[float]] = defaultdict(list)
+        self.per_url: Dict[str, Dict[str, float]] = defaultdict(lambda: defaultdict(float))
+        self.started = time.perf_counter()
+        self.finished: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def record(self, keys: Sequence[str], name: str, seconds: float) -> None:
+        """
+        Record a stage duration.
+
+        Args:
+            keys (Sequence[str]): URLs charged for the stage
+            name (str): Stage name
+            seconds (float): Stage duration
+        """
+        share = seconds / len(keys) if keys else seconds
+        with self._lock:
+            self.durations[name].append(seconds)
+            for key in keys:
+                self.per_url[key][name] += share
+
+    @contextmanager
+    def active(self) -> Iterator["CrawlTrace"]:
+        """Make this trace the one receiving stage timings."""
+        global _active
+        previous, _active = _active, self
+        try:
+            yield self
+        finally:
+            _active = previous
+            self.finished = time.perf_counter()
+
+    def report(self, slowest: int = 20) -> dict:
+        """
+        Summarize the trace.
+
+        Args:
+            slowest (int): Number of slowest URLs listed
+
+        Returns:
+            dict: Wall time, per-stage percentiles, stage breakdown and slowest URLs
+        """
+        with self._lock:
+            durations = {name: sorted(values) for name, values in self.durations.items()}
+            per_url = {url: dict(stages) for url, stages in self.per_url.items()}
+        stage_total = sum(sum(values) for values in durations.values()) or 1.0
+        stages = {
+            name: {
+                "count": len(values),
+                "total": sum(values),
+                "p50": percentile(values, 50),
+                "p90": percentile(values, 90),
+                "p99": percentile(values, 99),
+                "max": values[-1],
+                "share": sum(values) / stage_total,
+            }
+            for name, values in sorted(durations.items())
+        }
+        ranked = sorted(per_url.items(), key=lambda item: sum(item[1].values()), reverse=True)
+        return {
+            "wall_time": (self.finished or time.perf_counter()) - self.started,
+            "urls": len(per_url),
+            "stages": stages,
+            "slowest": [{"url": url, "total": sum(s.values()), "stages": s} for url, s in ranked[:slowest]],
+        }
+
+    def write(self, path: str) -> dict:
+        """
+        Write the report as JSON and log a short summary.
+
+        Args:
+            path (str): Output file path
+
+        Returns:
+            dict: The report
+        """
+        report = self.report()
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        logger.info("Crawl trace: %d URLs in %.1fs, written to %s", report["urls"], report["wall_time"], path)
+        for name, s in report["stages"].items():
+            logger.info("  %-16s n=%-6d total=%8.2fs share=%5.1f%% p50=%.3fs p99=%.3fs max=%.3fs",
+                        name, s["count"], s["total"], s["share"] * 100, s["p50"], s["p99"], s["max"])
+        return report
@@ -0,0 +1,323 @@
+"""
+New chapter detection and push notifications.
+
+Clients used to detect releases by polling ``/manga?url=``, each poll
+scraping a whole details page. The UpdatePoller instead watches the series
+listing sorted by latest update: one page shows the newest chapters of a
+dozen series, so a release is detected with a single small fetch. New
+chapters of stored manga are written to the database and pushed to
+listeners: SSE subscribers of the API (UpdateBroadcaster) and webhooks
+(WebhookNotifier).
+
+Run it inside the API by setting ``MANGA_POLL_INTERVAL`` (seconds), or as a
+standalone process with ``manga poll``.
+"""
+
+import asyncio
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import AsyncIterator, Callable, Iterable, List, Optional, Sequence
+
+from chapters import parse_chapter_number
+from models import ChapterUpdate, MangaDetails
+from records import ChapterRecord, ListingCard
+from repository import MangaRepository
+
+logger = logging.getLogger(__name__)
+
+Listener = Callable[[List[ChapterUpdate]], None]
+
+class UpdatePoller:
+    """
+    Detect new chapters from the latest-updates listing.
+
+    Pages are read newest first and polling stops at the first page without
+    any new chapter of a stored manga. When none of the chapters shown on a
+    card is stored yet, more chapters may have been released than the card
+    shows, so the details page of that series is scraped to fill the gap.
+
+    Attributes:
+        repository (MangaRepository): Repository the chapters are written to
+        listeners (List[Callable]): Functions called with each batch of updates
+        interval (float): Seconds between polls
+        max_pages (int): Maximum number of listing pages read per poll
+
+    Example:
+        >>> poller = UpdatePoller(repository, [print], interval=300)
+        >>> poller.start()
+    """
+
+    def __init__(self, repository: MangaRepository, listeners: Sequence[Listener] = (),
+                 interval: float = 300.0, max_pages: int = 3,
+                 fetch_cards: Optional[Callable[[int], List[ListingCard]]] = None,
+                 fetch_details: Optional[Callable[[str], MangaDetails]] = None):
+        """
+        Initialize the poller.
+
+        Args:
+            repository (MangaRepository): Repository the chapters are written to
+            listeners (Sequence[Callable]): Functions called with each batch of updates
+            interval (float): Seconds between polls
+            max_pages (int): Maximum number of listing pages read per poll
+            fetch_cards (Callable, optional): Page number to listing cards, defaults to the latest listing
+            fetch_details (Callable, optional): Manga URL to details, used to fill gaps
+        """
+        self.repository = repository
+        self.listeners = list(listeners)
+        self.interval = interval
+        self.max_pages = max_pages
+        self.fetch_cards = fetch_cards or self._latest_cards
+        self.fetch_details = fetch_details or self._details
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @staticmethod
+    def _latest_cards(page: int) -> List[ListingCard]:
+        """Fetch a page of the latest-updates listing."""
+        from scraper import SerieScraper
+        return SerieScraper.get_cards(page, latest=True)
+
+    @staticmethod
+    def _details(manga_url: str) -> MangaDetails:
+        """Scrape the details of a manga."""
+        from scraper import MangaDetailsScarper
+        return MangaDetailsScarper(manga_url).details
+
+    def poll_once(self) -> List[ChapterUpdate]:
+        """
+        Read the listing once, store new chapters and notify the listeners.
+
+        Returns:
+            List[ChapterUpdate]: The new chapters, in reading order per manga
+        """
+        updates: List[ChapterUpdate] = []
+        for page in range(1, self.max_pages + 1):
+            cards = self.fetch_cards(page)
+            found = self._process_page(cards)
+            updates += found
+            if not found:
+                break
+        if updates:
+            logger.info("Detected %d new chapters", len(updates))
+            for listener in self.listeners:
+                try:
+                    listener(updates)
+                except Exception:
+                    logger.exception("Error notifying update listener")
+        return updates
+
+    def _process_page(self, cards: List[ListingCard]) -> List[ChapterUpdate]:
+        """
+        Store the new chapters of the stored manga listed on a page.
+
+        Args:
+            cards (List[ListingCard]): Cards of the page
+
+        Returns:
+            List[ChapterUpdate]: The new chapters
+        """
+        manga_ids = self.repository.manga_ids(card.url for card in cards)
+        known = self.repository.existing_chapter_urls(
+            url for card in cards if card.url in manga_ids for url, _ in card.chapters)
+        updates = []
+        for card in cards:
+            manga_id = manga_ids.get(card.url)
+            new = [(url, title) for url, title in reversed(card.chapters) if url not in known]
+            if manga_id is None or not new:
+                continue
+            try:
+                if len(new) == len(card.chapters) and self.repository.chapter_count(manga_id):
+                    new = self._fill_gap(card.url)
+                updates += self._store(manga_id, card, new)
+            except Exception:
+                logger.exception("Error storing new chapters of %s", card.url, extra={"manga_url": card.url})
+        return updates
+
+    def _fill_gap(self, manga_url: str) -> List[tuple]:
+        """
+        List every chapter of a manga missing from the database.
+
+        Args:
+            manga_url (str): Manga URL
+
+        Returns:
+            List[tuple]: (url, title) of the missing chapters, in reading order
+        """
+        chapters = self.fetch_details(manga_url).chapters
+        known = self.repository.existing_chapter_urls(chapter.url for chapter in chapters)
+        return [(chapter.url, chapter.title) for chapter in chapters if chapter.url not in known]
+
+    def _store(self, manga_id: str, card: ListingCard, chapters: Iterable[tuple]) -> List[ChapterUpdate]:
+        """
+        Insert new chapters and build their update events.
+
+        Args:
+            manga_id (str): Manga id
+            card (ListingCard): Card of the manga
+            chapters (Iterable[tuple]): (url, title) of the new chapters, in reading order
+
+        Returns:
+            List[ChapterUpdate]: One event per chapter
+        """
+        count = self.repository.chapter_count(manga_id)
+        records = [ChapterRecord.build(card.url, url, title, count + n) for n, (url, title) in enumerate(chapters)]
+        ids = self.repository.upsert_chapters(manga_id, records)
+        now = datetime.utcnow()
+        updates = []
+        for record in records:
+            number = parse_chapter_number(record.title, record.url)
+            updates.append(ChapterUpdate(
+                manga_id=manga_id, manga_url=card.url, manga_title=card.title,
+                chapter_id=ids[record.url], url=record.url, title=record.title,
+                number=number.number if number else None, detected_at=now,
+            ))
+        return updates
+
+    def run(self) -> None:
+        """Poll until stopped."""
+        while not self._stop.is_set():
+            try:
+                self.poll_once()
+            except Exception:
+                logger.exception("Error polling latest updates")
+            self._stop.wait(self.interval)
+
+    def start(self) -> None:
+        """Poll in a background thread."""
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.run, name="update-poller", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the background thread."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+class UpdateBroadcaster:
+    """
+    Fan updates out to the Server-Sent Events subscribers of the API.
+
+    ``publish`` may be called from any thread; each subscriber has a bounded
+    queue on the event loop and updates are dropped for subscribers too slow
+    to keep up.
+
+    Attributes:
+        KEEPALIVE (float): Seconds of silence before a keep-alive comment is sent
+        max_queue (int): Updates buffered per subscriber
+    """
+
+    KEEPALIVE = 15.0
+
+    def __init__(self, max_queue: int = 256):
+        """
+        Initialize the broadcaster.
+
+        Args:
+            max_queue (int): Updates buffered per subscriber
+        """
+        self.max_queue = max_queue
+        self._subscribers: set = set()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        """Number of connected subscribers."""
+        return len(self._subscribers)
+
+    def publish(self, updates: List[ChapterUpdate]) -> None:
+        """
+        Send updates to every subscriber.
+
+        Args:
+            updates (List[ChapterUpdate]): New chapters
+        """
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for loop, queue in subscribers:
+            loop.call_soon_threadsafe(self._offer, queue, updates)
+
+    @staticmethod
+    def _offer(queue: asyncio.Queue, updates: List[ChapterUpdate]) -> None:
+        """Queue updates for a subscriber, dropping them when it lags behind."""
+        for update in updates:
+            try:
+                queue.put_nowait(update)
+            except asyncio.QueueFull:
+                logger.warning("Dropping update for a slow subscriber")
+                return
+
+    async def events(self, manga_id: Optional[str] = None) -> AsyncIterator[str]:
+        """
+        Subscribe and yield updates as Server-Sent Event frames.
+
+        Args:
+            manga_id (str, optional): Only send updates of this manga
+
+        Yields:
+            str: Event frames, with keep-alive comments while idle
+        """
+        subscriber = (asyncio.get_running_loop(), asyncio.Queue(self.max_queue))
+        with self._lock:
+            self._subscribers.add(subscriber)
+        try:
+            while True:
+                try:
+                    update = await asyncio.wait_for(subscriber[1].get(), self.KEEPALIVE)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                if manga_id is None or update.manga_id == manga_id:
+                    yield f"event: chapter\ndata: {update.model_dump_json()}\n\n"
+        finally:
+            with self._lock:
+                self._subscribers.discard(subscriber)
+
+class WebhookNotifier:
+    """
+    POST updates as a JSON array to webhook URLs.
+
+    Deliveries run on a small thread pool so a slow endpoint never delays
+    the poller; failures are logged and not retried beyond the shared
+    session's retry policy.
+
+    Attributes:
+        urls (List[str]): Webhook endpoints
+        timeout (float): Request timeout in seconds
+    """
+
+    def __init__(self, urls: Iterable[str], timeout: float = 5.0, max_workers: int = 4):
+        """
+        Initialize the notifier.
+
+        Args:
+            urls (Iterable[str]): Webhook endpoints
+            timeout (float): Request timeout in seconds
+            max_workers (int): Concurrent deliveries
+        """
+        self.urls = [url for url in urls if url]
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="webhook")
+
+    def __call__(self, updates: List[ChapterUpdate]) -> None:
+        """
+        Deliver updates to every webhook in the background.
+
+        Args:
+            updates (List[ChapterUpdate]): New chapters
+        """
+        body = "[" + ",".join(update.model_dump_json() for update in updates) + "]"
+        for url in self.urls:
+            self._executor.submit(self._deliver, url, body)
+
+    def _deliver(self, url: str, body: str) -> None:
+        """POST a JSON body to one webhook."""
+        from scraper import get_session
+        try:
+            resp = get_session().post(url, data=body, timeout=self.timeout,
+                                      headers={"Content-Type": "application/json"})
+            resp.raise_for_status()
+        except Exception:
+            logger.exception("Webhook delivery to %s failed", url, extra={"url": url})